@@ -1,5 +1,9 @@
-from django.contrib import admin
-from .models import OfferingCard, CardAssignment, OfferingEntry, SecretaryTask, MemberRequest, ActivityLog
+from django import forms
+from django.contrib import admin, messages
+from django.db import transaction
+
+from . import ledger, periods
+from .models import OfferingCard, CardAssignment, OfferingEntry, CardLedger, OfferingPeriod, SecretaryTask, MemberRequest, ActivityLog
 
 
 @admin.register(OfferingCard)
@@ -16,12 +20,91 @@ class CardAssignmentAdmin(admin.ModelAdmin):
     search_fields = ("card__code", "full_name", "phone_number")
 
 
+class OfferingEntryForm(forms.ModelForm):
+    class Meta:
+        model = OfferingEntry
+        fields = "__all__"
+
+    def clean_date(self):
+        date = self.cleaned_data["date"]
+        if date and periods.closed_period([date]):
+            raise forms.ValidationError("This month is closed; reopen it to record entries in it.")
+        return date
+
+
 @admin.register(OfferingEntry)
 class OfferingEntryAdmin(admin.ModelAdmin):
+    form = OfferingEntryForm
     list_display = ("card", "entry_type", "amount", "date")
     list_filter = ("entry_type", "date")
     search_fields = ("card__code",)
 
+    # Entries of closed months are read-only
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and periods.closed_period([obj.date]):
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and periods.closed_period([obj.date]):
+            return False
+        return super().has_delete_permission(request, obj)
+
+    # Keep CardLedger in step with edits made here
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = list(OfferingEntry.objects.select_for_update().filter(pk=obj.pk)) if change else []
+            periods.ensure_open([obj.date] + [entry.date for entry in old])
+            ledger.unrecord(old)
+            super().save_model(request, obj, form, change)
+            ledger.record([obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            periods.ensure_open([obj.date])
+            super().delete_model(request, obj)
+            ledger.unrecord([obj])
+
+    def delete_queryset(self, request, queryset):
+        try:
+            with transaction.atomic():
+                entries = list(queryset.select_for_update())
+                periods.ensure_open([entry.date for entry in entries])
+                super().delete_queryset(request, queryset)
+                ledger.unrecord(entries)
+        except periods.ClosedPeriodError as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+
+
+@admin.register(CardLedger)
+class CardLedgerAdmin(admin.ModelAdmin):
+    list_display = ("card", "year", "entry_type", "total", "entry_count", "updated_at")
+    list_filter = ("year", "entry_type")
+    search_fields = ("card__code",)
+
+    # Maintained by ChurchSecreatary.ledger; repair with rebuild_card_ledger
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OfferingPeriod)
+class OfferingPeriodAdmin(admin.ModelAdmin):
+    list_display = ("year", "month", "is_closed", "closed_at", "closed_by", "reopened_at", "reopened_by")
+    list_filter = ("is_closed", "year")
+
+    # Closed and reopened with the closeOfferingMonth / reopenOfferingMonth mutations
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 admin.site.register(SecretaryTask)
 admin.site.register(MemberRequest)
@@ -0,0 +1,98 @@
+"""
+Running totals of offering entries per card (``CardLedger``).
+
+Every (card, year, entry_type) has one ledger row with the collected total and
+the number of entries. Writers of ``OfferingEntry`` (``RecordOfferingEntry``,
+``BulkRecordOfferingEntries`` and the admin) call ``record()`` / ``unrecord()``
+in the same transaction as the entries. The deltas are added by the database
+(``SmartChurch.counters``), so concurrent writers never overwrite each other.
+
+Readers (offering card progress, cardsOverview, memberOfferingHistory totals)
+sum at most a handful of ledger rows per card instead of the whole entry
+history.
+
+``rebuild()`` (``manage.py rebuild_card_ledger``) recomputes the ledger from
+the entries and repairs any drift, e.g. after rows were changed in SQL.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from SmartChurch.counters import increment
+from .models import CardLedger, OfferingEntry
+
+_CENTS = Decimal('0.01')
+_amount_field = OfferingEntry._meta.get_field('amount')
+
+
+def _amount(value):
+    # The amount as the database stores it (inputs arrive as floats)
+    return _amount_field.to_python(value).quantize(_CENTS)
+
+
+def deltas(entries, sign=1):
+    """``{(card_id, year, entry_type): [amount, count]}`` of ``entries``."""
+    changes = defaultdict(lambda: [Decimal(0), 0])
+    for entry in entries:
+        change = changes[(entry.card_id, entry.date.year, entry.entry_type)]
+        change[0] += sign * _amount(entry.amount)
+        change[1] += sign
+    return changes
+
+
+def apply(changes):
+    """Add ``changes`` (see ``deltas``) to the ledger."""
+    increment(CardLedger, ('card_id', 'year', 'entry_type'), ('total', 'entry_count'), changes)
+
+
+def record(entries):
+    """Add newly saved ``entries`` to the ledger."""
+    apply(deltas(entries))
+
+
+def unrecord(entries):
+    """Take deleted ``entries`` (or the old state of changed ones) off the ledger."""
+    apply(deltas(entries, sign=-1))
+
+
+def rebuild():
+    """Recompute the ledger from ``OfferingEntry``. Returns the number of rows repaired."""
+    repaired = 0
+    with transaction.atomic():
+        stored = {}
+        for row in CardLedger.objects.select_for_update().order_by():
+            stored[(row.card_id, row.year, row.entry_type)] = row
+        actual = {
+            (card_id, year, entry_type): (total, count)
+            for card_id, year, entry_type, total, count in (
+                OfferingEntry.objects.annotate(year=ExtractYear('date'))
+                .values('card_id', 'year', 'entry_type')
+                .annotate(total=Sum('amount'), count=Count('id'))
+                .order_by()
+                .values_list('card_id', 'year', 'entry_type', 'total', 'count')
+            )
+        }
+        # Rows of (card, year, type) without entries; emptied ones are not drift
+        stale = [row for key, row in stored.items() if key not in actual]
+        if stale:
+            CardLedger.objects.filter(id__in=[row.id for row in stale]).delete()
+            repaired += sum(1 for row in stale if row.total or row.entry_count)
+        missing, changed = [], []
+        for key, (total, count) in actual.items():
+            total = _amount(total)
+            row = stored.get(key)
+            if row is None:
+                card_id, year, entry_type = key
+                missing.append(CardLedger(card_id=card_id, year=year, entry_type=entry_type, total=total,
+                                          entry_count=count))
+            elif row.total != total or row.entry_count != count:
+                row.total, row.entry_count, row.updated_at = total, count, timezone.now()
+                changed.append(row)
+        CardLedger.objects.bulk_create(missing, batch_size=500)
+        CardLedger.objects.bulk_update(changed, ['total', 'entry_count', 'updated_at'], batch_size=500)
+        repaired += len(missing) + len(changed)
+    return repaired
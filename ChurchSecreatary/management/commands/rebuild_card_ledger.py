@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ChurchSecreatary import ledger
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-card ledger totals from the offering entries and repair any drift."
+
+    def handle(self, *args, **options):
+        repaired = ledger.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} card ledger rows"))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ChurchSecreatary', '0007_offeringbatch_offeringentry_batch'),
+        ('UserAuthentication', '0004_revokedtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cardapplication',
+            index=models.Index(fields=['-created_at', '-id'], name='cardapplication_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberrequest',
+            index=models.Index(fields=['-submitted_at', '-id'], name='memberrequest_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offeringentry',
+            index=models.Index(fields=['card', '-date', '-id'], name='offeringentry_card_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='secretarytask',
+            index=models.Index(fields=['due_date', 'id'], name='secretarytask_due_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear
+
+
+def build_ledger(apps, schema_editor):
+    OfferingEntry = apps.get_model('ChurchSecreatary', 'OfferingEntry')
+    CardLedger = apps.get_model('ChurchSecreatary', 'CardLedger')
+    totals = (
+        OfferingEntry.objects.annotate(year=ExtractYear('date'))
+        .values('card_id', 'year', 'entry_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    CardLedger.objects.bulk_create(
+        (
+            CardLedger(card_id=row['card_id'], year=row['year'], entry_type=row['entry_type'],
+                       total=row['total'], entry_count=row['count'])
+            for row in totals
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ChurchSecreatary', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('entry_type', models.CharField(choices=[('AHADI', 'Ahadi'), ('SHUKRANI', 'Shukrani'), ('MAJENGO', 'Majengo')], max_length=16)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='ChurchSecreatary.offeringcard')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'card'], name='cardledger_year_card_idx')],
+                'unique_together': {('card', 'year', 'entry_type')},
+            },
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
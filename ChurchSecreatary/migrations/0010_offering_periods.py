@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ChurchSecreatary', '0009_card_ledger'),
+        ('UserAuthentication', '0004_revokedtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('is_closed', models.BooleanField(default=False)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('reopened_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_offering_periods', to=settings.AUTH_USER_MODEL)),
+                ('reopened_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reopened_offering_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+                'unique_together': {('year', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyOfferingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mass_type', models.CharField(choices=[('MAJOR', 'Major'), ('MORNING_GLORY', 'Morning Glory'), ('EVENING_GLORY', 'Evening Glory'), ('SELI', 'SELI')], max_length=50)),
+                ('offering_type', models.CharField(max_length=50)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('count', models.PositiveIntegerField()),
+                ('street', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offering_snapshots', to='UserAuthentication.street')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offering_totals', to='ChurchSecreatary.offeringperiod')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyCardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('AHADI', 'Ahadi'), ('SHUKRANI', 'Shukrani'), ('MAJENGO', 'Majengo')], max_length=16)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('entry_count', models.PositiveIntegerField()),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='ChurchSecreatary.offeringcard')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='card_totals', to='ChurchSecreatary.offeringperiod')),
+            ],
+            options={
+                'unique_together': {('period', 'card', 'entry_type')},
+            },
+        ),
+    ]
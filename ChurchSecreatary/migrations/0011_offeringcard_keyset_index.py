@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ChurchSecreatary', '0010_offering_periods'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offeringcard',
+            index=models.Index(fields=['street', 'number', 'id'], name='offeringcard_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ChurchSecreatary', '0011_offeringcard_keyset_index'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='MonthlyCardSnapshot',
+        ),
+    ]
@@ -1,3 +1,6 @@
+import calendar
+import datetime
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -38,6 +41,9 @@ class SecretaryTask(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["due_date", "id"], name="secretarytask_due_idx")]
+
     def __str__(self):
         return f"{self.title} ({self.priority})"
 
@@ -66,6 +72,9 @@ class MemberRequest(models.Model):
     details = models.TextField(blank=True)
     submitted_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [models.Index(fields=["-submitted_at", "-id"], name="memberrequest_submitted_idx")]
+
     def __str__(self):
         return f"{self.member} - {self.request_type}"
 
@@ -98,17 +107,24 @@ class OfferingCard(models.Model):
     class Meta:
         unique_together = ("street", "number")
         ordering = ["street__name", "number"]
+        indexes = [models.Index(fields=["street", "number", "id"], name="offeringcard_keyset_idx")]
 
     def __str__(self):
         return self.code
 
+    @staticmethod
+    def code_prefix(street_name):
+        # first two alphabetic characters of the street name, e.g. "PR" for Pride Street
+        return "".join([c for c in (street_name or "").upper() if c.isalpha()][:2])
+
+    @staticmethod
+    def make_code(prefix, number):
+        return f"{prefix}-{number:03d}"
+
     def save(self, *args, **kwargs):
         # Generate code like PR-001 using first two letters of street name
         if self.street and self.number and not self.code:
-            name = (self.street.name or "").upper()
-            # pick first two alphabetic characters
-            prefix = "".join([c for c in name if c.isalpha()][:2])
-            self.code = f"{prefix}-{self.number:03d}"
+            self.code = self.make_code(self.code_prefix(self.street.name), self.number)
         super().save(*args, **kwargs)
 
 
@@ -152,6 +168,9 @@ class CardApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"], name="cardapplication_created_idx")]
+
     def __str__(self):
         return f"{self.full_name} - {self.street.name} ({self.preferred_number or 'any'})"
 
@@ -194,10 +213,33 @@ class OfferingEntry(models.Model):
     batch = models.ForeignKey('OfferingBatch', null=True, blank=True, on_delete=models.SET_NULL, related_name='entries')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["card", "-date", "-id"], name="offeringentry_card_date_idx")]
+
     def __str__(self):
         return f"{self.card.code} {self.entry_type} {self.amount} on {self.date}"
 
 
+class CardLedger(models.Model):
+    """Collected totals of a card per year and entry type.
+    Kept in step with OfferingEntry by ChurchSecreatary.ledger; repair drift
+    with the rebuild_card_ledger command.
+    """
+    card = models.ForeignKey(OfferingCard, on_delete=models.CASCADE, related_name="ledger")
+    year = models.PositiveIntegerField()
+    entry_type = models.CharField(max_length=16, choices=OfferingEntry.Type.choices)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("card", "year", "entry_type")
+        indexes = [models.Index(fields=["year", "card"], name="cardledger_year_card_idx")]
+
+    def __str__(self):
+        return f"{self.card_id} {self.year} {self.entry_type}: {self.total} ({self.entry_count})"
+
+
 class RegistrationWindow(models.Model):
     """Represents a window during which members can auto-request cards.
     Only one active window is expected at a time; latest created takes precedence.
@@ -218,3 +260,46 @@ class RegistrationWindow(models.Model):
         if not w:
             return False, None, None
         return w.start_at <= now <= w.end_at, w.start_at, w.end_at
+
+
+class OfferingPeriod(models.Model):
+    """A calendar month of offerings that has been closed (and maybe reopened).
+    While closed, its totals are frozen in MonthlyOfferingSnapshot and its
+    entries cannot change; see ChurchSecreatary.periods. Months without a row
+    are open.
+    """
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    is_closed = models.BooleanField(default=False)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    closed_by = models.ForeignKey(Member, null=True, blank=True, on_delete=models.SET_NULL, related_name="closed_offering_periods")
+    reopened_at = models.DateTimeField(null=True, blank=True)
+    reopened_by = models.ForeignKey(Member, null=True, blank=True, on_delete=models.SET_NULL, related_name="reopened_offering_periods")
+
+    class Meta:
+        unique_together = ("year", "month")
+        ordering = ["-year", "-month"]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} ({'closed' if self.is_closed else 'open'})"
+
+    @property
+    def first_day(self):
+        return datetime.date(self.year, self.month, 1)
+
+    @property
+    def last_day(self):
+        return datetime.date(self.year, self.month, calendar.monthrange(self.year, self.month)[1])
+
+
+class MonthlyOfferingSnapshot(models.Model):
+    """churchMember.Offering totals of a closed month per street, mass type and offering type."""
+    period = models.ForeignKey(OfferingPeriod, on_delete=models.CASCADE, related_name="offering_totals")
+    street = models.ForeignKey(Street, null=True, on_delete=models.SET_NULL, related_name="offering_snapshots")
+    mass_type = models.CharField(max_length=50, choices=OfferingBatch.MASS_TYPES)
+    offering_type = models.CharField(max_length=50)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.period} {self.street_id} {self.mass_type} {self.offering_type}: {self.amount}"
@@ -1,12 +1,20 @@
+from functools import reduce
+from operator import or_
+
 import graphene
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime
 
 from UserAuthentication.models import Street, Member
 from .models import OfferingCard, CardAssignment, OfferingEntry, CardApplication, RegistrationWindow, OfferingBatch, ActivityLog
-from .outputs import CardAssignmentType, OfferingEntryType, CardApplicationType, RegistrationWindowStatusType, BulkOfferingResultType, OfferingBatchType
+from .outputs import CardAssignmentType, OfferingEntryType, CardApplicationType, RegistrationWindowStatusType, BulkOfferingResultType, OfferingBatchType, OfferingPeriodType
+from .queries import offering_period_nodes
 from .Inputs import CreateOfferingCardInput, AssignCardInput, UpdateAssignmentInput, OfferingEntryInput, BulkGenerateCardsInput, CardApplicationInput, BulkOfferingEntryInput
+from churchMember import rollups
 from churchMember.models import Offering as CMOffering
+from . import ledger, periods
 
 
 class CreateOfferingCard(graphene.Mutation):
@@ -139,25 +147,22 @@ class RecordOfferingEntry(graphene.Mutation):
                 dt = datetime.strptime(input.date, "%Y-%m-%d").date()
             except Exception:
                 raise Exception("Invalid date format, expected YYYY-MM-DD")
-        entry = OfferingEntry.objects.create(
-            card=card,
-            entry_type=input.entry_type,
-            amount=input.amount,
-            date=dt or timezone.now().date(),
-        )
-        # Best-effort sync to churchMember.Offering so dashboards remain consistent
-        try:
-            ent_date = entry.date
-            # Prefer active assignment for the entry year
-            assign = (
-                CardAssignment.objects
-                .filter(card=card, year=getattr(ent_date, 'year', timezone.now().year))
-                .order_by('-active')
-                .first()
+        dt = dt or timezone.now().date()
+        # Prefer active assignment for the entry year
+        assign = CardAssignment.objects.filter(card=card, year=dt.year).order_by('-active').first()
+        # One transaction with the period lock: the entry and its
+        # churchMember.Offering (for the dashboards) land in the same open month
+        with transaction.atomic():
+            periods.ensure_open([dt])
+            entry = OfferingEntry.objects.create(
+                card=card,
+                entry_type=input.entry_type,
+                amount=input.amount,
+                date=dt,
             )
-            cm_member = assign.member if assign else None
-            CMOffering.objects.create(
-                member=cm_member,
+            ledger.record([entry])
+            offering = CMOffering.objects.create(
+                member=assign.member if assign else None,
                 amount=entry.amount,
                 offering_type=entry.entry_type,
                 mass_type='MAJOR',  # single-entry API lacks mass context
@@ -165,8 +170,7 @@ class RecordOfferingEntry(graphene.Mutation):
                 date=entry.date,
                 attendant=None,
             )
-        except Exception:
-            pass
+            rollups.record([offering])
         return RecordOfferingEntry(ok=True, entry=OfferingEntryType(
             id=str(entry.id),
             card_code=card.code,
@@ -297,6 +301,9 @@ class SecretaryMutation(graphene.ObjectType):
     create_card_application = CreateCardApplication.Field()
 
 
+CARD_BATCH_SIZE = 500
+
+
 class BulkGenerateCards(graphene.Mutation):
     class Arguments:
         input = BulkGenerateCardsInput(required=True)
@@ -304,6 +311,8 @@ class BulkGenerateCards(graphene.Mutation):
     ok = graphene.Boolean()
     created = graphene.Int()
     skipped = graphene.Int()
+    # Codes not created because another street (same two-letter prefix) has them
+    conflicts = graphene.List(graphene.String)
 
     def mutate(self, info, input: BulkGenerateCardsInput):
         streets = []
@@ -313,25 +322,41 @@ class BulkGenerateCards(graphene.Mutation):
                 raise Exception("Street not found")
             streets = [st]
         else:
-            streets = list(Street.objects.all())
+            # Earlier streets keep a shared prefix's codes
+            streets = list(Street.objects.order_by('id'))
 
         start = max(1, int(input.start_number or 1))
         end = min(300, int(input.end_number or 300))
         if start > end:
             raise Exception("start_number cannot be greater than end_number")
 
-        created = 0
-        skipped = 0
-        for st in streets:
-            for n in range(start, end + 1):
-                if OfferingCard.objects.filter(street=st, number=n).exists():
-                    skipped += 1
-                    continue
-                card = OfferingCard(street=st, number=n)
-                card.save()
-                created += 1
-
-        return BulkGenerateCards(ok=True, created=created, skipped=skipped)
+        # Existing numbers and codes of every street in one query each; the
+        # codes are derived here, so no card is saved one row at a time
+        prefixes = {st.id: OfferingCard.code_prefix(st.name) for st in streets}
+        with transaction.atomic():
+            existing = set(
+                OfferingCard.objects.filter(street__in=streets, number__range=(start, end))
+                .order_by().values_list('street_id', 'number')
+            )
+            taken = set(
+                OfferingCard.objects.filter(
+                    reduce(or_, (Q(code__startswith=f"{prefix}-") for prefix in set(prefixes.values())))
+                ).order_by().values_list('code', flat=True)
+            ) if streets else set()
+            cards, conflicts = [], []
+            for st in streets:
+                for n in range(start, end + 1):
+                    if (st.id, n) in existing:
+                        continue
+                    code = OfferingCard.make_code(prefixes[st.id], n)
+                    if code in taken:
+                        conflicts.append(code)
+                        continue
+                    taken.add(code)
+                    cards.append(OfferingCard(street=st, number=n, code=code))
+            OfferingCard.objects.bulk_create(cards, batch_size=CARD_BATCH_SIZE)
+
+        return BulkGenerateCards(ok=True, created=len(cards), skipped=len(existing), conflicts=conflicts)
 
 
 class SecretaryMutation(SecretaryMutation):
@@ -526,22 +551,13 @@ class BulkRecordOfferingEntries(graphene.Mutation):
         if mass_type == "MAJOR" and (major_num not in (1, 2)):
             raise Exception("major_mass_number must be 1 or 2 when mass_type is MAJOR")
 
-        # Create batch
-        batch = OfferingBatch.objects.create(
-            street=street,
-            recorder_name=meta.recorder_name,
-            date=batch_date,
-            mass_type=mass_type,
-            major_mass_number=major_num if mass_type == "MAJOR" else None,
-        )
-
-        # Process entries
-        total_ahadi = 0.0
-        total_shukrani = 0.0
-        total_majengo = 0.0
-        count = 0
-        for item in input.entries or []:
-            card = OfferingCard.objects.filter(id=item.card_id).select_related('street').first()
+        # Resolve every item before writing anything: the cards in one query,
+        # then the (card, year) assignments for the churchMember.Offering sync
+        items = input.entries or []
+        cards = OfferingCard.objects.order_by().in_bulk({item.card_id for item in items})
+        rows = []
+        for item in items:
+            card = cards.get(int(item.card_id))
             if not card:
                 raise Exception("Card not found: " + str(item.card_id))
             if card.street_id != street.id:
@@ -554,43 +570,49 @@ class BulkRecordOfferingEntries(graphene.Mutation):
                     raise Exception("Invalid date format in entries, expected YYYY-MM-DD")
             else:
                 ent_date = batch_date
-
-            entry = OfferingEntry.objects.create(
-                card=card,
-                entry_type=item.entry_type,
-                amount=item.amount,
-                date=ent_date,
-                batch=batch,
+            rows.append((card, item, ent_date))
+
+        assignments = CardAssignment.objects.filter(
+            card_id__in={card.id for card, _, _ in rows},
+            year__in={ent_date.year for _, _, ent_date in rows},
+        ).values_list('card_id', 'year', 'member_id')
+        members = {(card_id, year): member_id for card_id, year, member_id in assignments}
+
+        # One transaction: a failure leaves no half-written batch behind
+        with transaction.atomic():
+            periods.ensure_open({ent_date for _, _, ent_date in rows})
+            batch = OfferingBatch.objects.create(
+                street=street,
+                recorder_name=meta.recorder_name,
+                date=batch_date,
+                mass_type=mass_type,
+                major_mass_number=major_num if mass_type == "MAJOR" else None,
             )
-            # Best-effort sync to churchMember.Offering with batch mass context
-            try:
-                assign = (
-                    CardAssignment.objects
-                    .filter(card=card, year=getattr(ent_date, 'year', timezone.now().year))
-                    .order_by('-active')
-                    .first()
-                )
-                cm_member = assign.member if assign else None
-                CMOffering.objects.create(
-                    member=cm_member,
+            entries = OfferingEntry.objects.bulk_create(
+                OfferingEntry(card=card, entry_type=item.entry_type, amount=item.amount, date=ent_date, batch=batch)
+                for card, item, ent_date in rows
+            )
+            ledger.record(entries)
+            offerings = CMOffering.objects.bulk_create(
+                CMOffering(
+                    member_id=members.get((entry.card_id, entry.date.year)),
                     amount=entry.amount,
                     offering_type=entry.entry_type,
                     mass_type=batch.mass_type,
-                    street=card.street,
+                    street=street,
                     date=entry.date,
                     attendant=None,
                 )
-            except Exception:
-                pass
-            amt = float(entry.amount)
-            et = entry.entry_type
-            if et == 'AHADI':
-                total_ahadi += amt
-            elif et == 'SHUKRANI':
-                total_shukrani += amt
-            elif et == 'MAJENGO':
-                total_majengo += amt
-            count += 1
+                for entry in entries
+            )
+            rollups.record(offerings)
+
+        totals = {'AHADI': 0.0, 'SHUKRANI': 0.0, 'MAJENGO': 0.0}
+        for entry in entries:
+            if entry.entry_type in totals:
+                totals[entry.entry_type] += float(entry.amount)
+        total_ahadi, total_shukrani, total_majengo = totals['AHADI'], totals['SHUKRANI'], totals['MAJENGO']
+        count = len(entries)
 
         # Activity log
         try:
@@ -623,3 +645,49 @@ class BulkRecordOfferingEntries(graphene.Mutation):
 class SecretaryMutation(SecretaryMutation):
     bulk_record_offering_entries = BulkRecordOfferingEntries.Field()
 
+
+PERIOD_MANAGER_ROLES = ('CHURCH_SECRETARY', 'PASTOR')
+
+
+def _period_args(info, year, month):
+    user = info.context.user
+    if not user.is_authenticated or user.role not in PERIOD_MANAGER_ROLES:
+        raise Exception("Only secretaries can close or reopen offering months")
+    if not 1 <= month <= 12:
+        raise Exception("month must be between 1 and 12")
+    return user
+
+
+class CloseOfferingMonth(graphene.Mutation):
+    """Freeze a finished month's offering totals and lock its entries."""
+    class Arguments:
+        year = graphene.Int(required=True)
+        month = graphene.Int(required=True)
+
+    ok = graphene.Boolean()
+    period = graphene.Field(OfferingPeriodType)
+
+    def mutate(self, info, year, month):
+        user = _period_args(info, year, month)
+        period = periods.close(year, month, user)
+        return CloseOfferingMonth(ok=True, period=offering_period_nodes([period])[0])
+
+
+class ReopenOfferingMonth(graphene.Mutation):
+    """Unlock a closed month so its entries can be corrected; close it again afterwards."""
+    class Arguments:
+        year = graphene.Int(required=True)
+        month = graphene.Int(required=True)
+
+    ok = graphene.Boolean()
+    period = graphene.Field(OfferingPeriodType)
+
+    def mutate(self, info, year, month):
+        user = _period_args(info, year, month)
+        period = periods.reopen(year, month, user)
+        return ReopenOfferingMonth(ok=True, period=offering_period_nodes([period])[0])
+
+
+class SecretaryMutation(SecretaryMutation):
+    close_offering_month = CloseOfferingMonth.Field()
+    reopen_offering_month = ReopenOfferingMonth.Field()
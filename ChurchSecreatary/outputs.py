@@ -133,7 +133,7 @@ class OfferingEntryItemType(graphene.ObjectType):
 class MemberOfferingHistoryType(graphene.ObjectType):
     member_id = graphene.ID()
     year = graphene.Int()
-    entries = graphene.List(OfferingEntryItemType)
+    entries = graphene.List(OfferingEntryItemType, deprecation_reason='Use memberOfferingEntries')
     total_ahadi = graphene.Float()
     total_shukrani = graphene.Float()
     total_majengo = graphene.Float()
@@ -161,3 +161,45 @@ class BulkOfferingResultType(graphene.ObjectType):
     total_ahadi = graphene.Float()
     total_shukrani = graphene.Float()
     total_majengo = graphene.Float()
+
+
+class OfferingPeriodType(graphene.ObjectType):
+    year = graphene.Int()
+    month = graphene.Int()
+    is_closed = graphene.Boolean()
+    closed_at = graphene.String()
+    closed_by = graphene.String()
+    reopened_at = graphene.String()
+    # Frozen churchMember.Offering totals; 0 while the month is open
+    total_amount = graphene.Float()
+    offering_count = graphene.Int()
+
+
+class SecretaryTaskConnection(graphene.relay.Connection):
+    class Meta:
+        node = SecretaryTaskType
+
+
+class MemberRequestConnection(graphene.relay.Connection):
+    class Meta:
+        node = MemberRequestType
+
+
+class OfferingCardConnection(graphene.relay.Connection):
+    class Meta:
+        node = OfferingCardType
+
+
+class AvailableCardNumberConnection(graphene.relay.Connection):
+    class Meta:
+        node = AvailableCardNumberType
+
+
+class CardApplicationConnection(graphene.relay.Connection):
+    class Meta:
+        node = CardApplicationType
+
+
+class OfferingEntryItemConnection(graphene.relay.Connection):
+    class Meta:
+        node = OfferingEntryItemType
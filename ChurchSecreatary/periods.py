@@ -0,0 +1,173 @@
+"""
+Month close for offerings.
+
+Once a month has been reconciled, a secretary closes it (``close()``). Its
+churchMember.Offering totals per street, mass type and offering type are then
+frozen into ``MonthlyOfferingSnapshot``. Per-card totals need no snapshot:
+they are kept per year in ``CardLedger`` (``ChurchSecreatary.ledger``), and
+the entries they count cannot change while the month is closed.
+
+Writers of ``OfferingEntry`` / ``Offering`` call ``ensure_open()`` with the
+dates they are about to touch, inside their transaction. For a closed month
+it raises ``ClosedPeriodError``, and the month has to be reopened
+(``reopen()``) before its entries can change. Closing it again takes fresh
+snapshots.
+
+``offering_totals()`` is for reports. It reads the snapshots of the closed
+months in a range and aggregates the daily rollups (``churchMember.rollups``)
+only for the days that are still open.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from churchMember.models import DailyOfferingRollup, Offering
+from .models import ActivityLog, MonthlyOfferingSnapshot, OfferingPeriod
+
+
+class ClosedPeriodError(Exception):
+    pass
+
+
+def _periods(dates):
+    match = Q()
+    for year, month in {(d.year, d.month) for d in dates}:
+        match |= Q(year=year, month=month)
+    if not match:
+        return OfferingPeriod.objects.none()
+    return OfferingPeriod.objects.filter(match).order_by('year', 'month')
+
+
+def closed_period(dates):
+    """The first closed ``OfferingPeriod`` among the months of ``dates``, or None."""
+    return _periods(dates).filter(is_closed=True).first()
+
+
+def ensure_open(dates):
+    """
+    Raise ``ClosedPeriodError`` if any of ``dates`` falls in a closed month.
+    Call inside the writer's transaction: each month's period row is created
+    if missing and locked until it ends, so a concurrent ``close()`` waits for
+    the write, even for a month that had no row yet.
+    """
+    # Locked in month order, so writers spanning several months cannot deadlock
+    for year, month in sorted({(d.year, d.month) for d in dates}):
+        period, _ = OfferingPeriod.objects.select_for_update().get_or_create(year=year, month=month)
+        if period.is_closed:
+            raise ClosedPeriodError(
+                f"Offerings for {period.year}-{period.month:02d} are closed; reopen the month to change them"
+            )
+
+
+def close(year, month, user=None):
+    """Freeze the totals of ``year``-``month`` and close it to edits."""
+    with transaction.atomic():
+        period, _ = OfferingPeriod.objects.select_for_update().get_or_create(year=year, month=month)
+        if period.is_closed:
+            raise ClosedPeriodError(f"{year}-{month:02d} is already closed")
+        if period.last_day >= timezone.localdate():
+            raise ClosedPeriodError(f"{year}-{month:02d} has not ended yet")
+        days = {'date__range': (period.first_day, period.last_day)}
+
+        period.offering_totals.all().delete()
+        MonthlyOfferingSnapshot.objects.bulk_create(
+            (
+                MonthlyOfferingSnapshot(period=period, amount=row.pop('total'), **row)
+                for row in Offering.objects.filter(**days)
+                .values('street_id', 'mass_type', 'offering_type')
+                .annotate(total=Sum('amount'), count=Count('id'))
+                .order_by()
+            ),
+            batch_size=500,
+        )
+
+        period.is_closed = True
+        period.closed_at = timezone.now()
+        period.closed_by = user
+        period.save()
+        ActivityLog.objects.create(
+            action=f"Closed offerings for {year}-{month:02d}", user=user, type=ActivityLog.Type.SUCCESS,
+        )
+    return period
+
+
+def reopen(year, month, user=None):
+    """Open a closed month to edits again; its snapshots are dropped."""
+    with transaction.atomic():
+        period = OfferingPeriod.objects.select_for_update().filter(year=year, month=month, is_closed=True).first()
+        if period is None:
+            raise ClosedPeriodError(f"{year}-{month:02d} is not closed")
+        period.offering_totals.all().delete()
+        period.is_closed = False
+        period.reopened_at = timezone.now()
+        period.reopened_by = user
+        period.save()
+        ActivityLog.objects.create(
+            action=f"Reopened offerings for {year}-{month:02d}", user=user, type=ActivityLog.Type.WARNING,
+        )
+    return period
+
+
+def _closed_spans(periods):
+    """Consecutive closed months merged into ``(first_day, last_day)`` ranges."""
+    spans = []
+    for period in sorted(periods, key=lambda p: (p.year, p.month)):
+        if spans and (period.first_day - spans[-1][1]).days == 1:
+            spans[-1][1] = period.last_day
+        else:
+            spans.append([period.first_day, period.last_day])
+    return spans
+
+
+def _open_ranges(closed, start=None, end=None):
+    """
+    ``(first, last)`` date ranges (``None`` for open bounds) from ``start`` to
+    ``end`` that lie outside the ``closed`` periods. Each one is aggregated on
+    its own so the date index serves it; an exclude of the closed spans, or an
+    OR of the ranges, scans the table on SQLite.
+    """
+    ranges = []
+    for first_day, last_day in _closed_spans(closed):
+        if start is None or start < first_day:
+            ranges.append((start, first_day - timedelta(days=1)))
+        start = last_day + timedelta(days=1)
+    if start is None or end is None or start <= end:
+        ranges.append((start, end))
+    return ranges
+
+
+def offering_totals(group_by=(), start=None, end=None):
+    """
+    ``{(values of group_by...): amount}`` of the offerings from ``start`` to
+    ``end`` (dates, inclusive, either open). ``group_by`` names fields shared by
+    the rollups and the snapshots: 'street_id', 'street__name', 'mass_type',
+    'offering_type'. Closed months that lie wholly in the range are read from
+    their snapshots; everything else from the daily rollups.
+    """
+    closed = [
+        period for period in OfferingPeriod.objects.filter(is_closed=True)
+        if (start is None or period.first_day >= start) and (end is None or period.last_day <= end)
+    ]
+    sources = []
+    for first, last in _open_ranges(closed, start, end):
+        live = DailyOfferingRollup.objects.filter(count__gt=0)
+        if first:
+            live = live.filter(date__gte=first)
+        if last:
+            live = live.filter(date__lte=last)
+        sources.append(live)
+    if closed:
+        sources.append(MonthlyOfferingSnapshot.objects.filter(period__in=closed))
+
+    totals = defaultdict(Decimal)
+    for qs in sources:
+        if not group_by:
+            totals[()] += qs.aggregate(total=Sum('amount'))['total'] or 0
+            continue
+        for row in qs.values(*group_by).annotate(total=Sum('amount')).order_by().values_list(*group_by, 'total'):
+            totals[row[:-1]] += row[-1] or 0
+    return totals
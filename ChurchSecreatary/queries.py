@@ -3,8 +3,9 @@ from graphene import ObjectType, List, Int, String
 from django.utils import timezone
 from datetime import timedelta
 
-from django.db.models import Sum, Count
-from .models import SecretaryTask, MemberRequest as MemberRequestModel, ActivityLog, OfferingCard, CardAssignment, OfferingEntry, RegistrationWindow
+from django.db.models import Sum, FloatField, Value
+from django.db.models.functions import Cast, NullIf
+from .models import SecretaryTask, MemberRequest as MemberRequestModel, ActivityLog, OfferingCard, CardAssignment, OfferingEntry, CardLedger, RegistrationWindow, CardApplication, OfferingPeriod, MonthlyOfferingSnapshot
 from django.db.models import Q
 from .outputs import (
     SecretaryTaskType,
@@ -20,46 +21,286 @@ from .outputs import (
     OfferingEntryItemType,
     CardApplicationType,
     MyCardStateType,
+    OfferingPeriodType,
+    SecretaryTaskConnection,
+    MemberRequestConnection,
+    OfferingCardConnection,
+    AvailableCardNumberConnection,
+    CardApplicationConnection,
+    OfferingEntryItemConnection,
 )
+from SmartChurch.optimizer import selected_fields
+from SmartChurch.pagination import Keyset, connection_field, connection_from_queryset
+from SmartChurch.projection import DateFormat, Projection, record_type
+
+
+# Keyset orderings for the connection fields; each is backed by an index
+SECRETARY_TASKS = Keyset(SecretaryTask, 'due_date', 'id')
+MEMBER_REQUESTS = Keyset(MemberRequestModel, '-submitted_at', '-id')
+CARD_APPLICATIONS = Keyset(CardApplication, '-created_at', '-id')
+# Cards group by street on local columns; ordering by street name would need a
+# join that no index can serve
+OFFERING_CARDS = Keyset(OfferingCard, 'street_id', 'number', 'id')
+OFFERING_ENTRIES = Keyset(OfferingEntry, '-date', '-id')
+
+# Row projections for the large lists: values_list() rows as slotted records
+CARD_APPLICATION_ROWS = Projection(
+    CardApplicationType,
+    id='id',
+    full_name='full_name',
+    phone_number='phone_number',
+    street='street__name',
+    preferred_number=NullIf('preferred_number', Value(0)),
+    note='note',
+    pledged_ahadi=Cast('pledged_ahadi', FloatField()),
+    pledged_shukrani=Cast('pledged_shukrani', FloatField()),
+    pledged_majengo=Cast('pledged_majengo', FloatField()),
+    status='status',
+    created_at=DateFormat('created_at', '%Y-%m-%d %H:%M'),
+)
+OFFERING_ENTRY_ROWS = Projection(
+    OfferingEntryItemType,
+    code='card__code',
+    date=DateFormat('date', '%Y-%m-%d'),
+    entry_type='entry_type',
+    amount=Cast('amount', FloatField()),
+)
+# The card's own columns; _offering_card_nodes adds assignment and progress
+OFFERING_CARD_COLUMNS = Projection(
+    OfferingCardType,
+    id='id',
+    code='code',
+    street='street__name',
+    number='number',
+    is_taken='is_taken',
+    assigned_to_name='assigned_to__full_name',
+    assigned_to_id='assigned_to_id',
+)
+OfferingCardRow = record_type(OfferingCardType)
+
+
+def _secretary_tasks(time_filter):
+    qs = SecretaryTask.objects.select_related('assigned_to')
+    if time_filter == 'today':
+        today = timezone.now().date()
+        qs = qs.filter(due_date=today)
+    elif time_filter == 'week':
+        start = timezone.now().date()
+        end = start + timedelta(days=7)
+        qs = qs.filter(due_date__gte=start, due_date__lte=end)
+    return qs
+
+
+def _secretary_task_node(t):
+    return SecretaryTaskType(
+        id=str(t.id),
+        title=t.title,
+        status=t.Status(t.status).label,
+        due_date=t.due_date.strftime('%Y-%m-%d') if t.due_date else "",
+        assigned_to=(t.assigned_to.full_name if getattr(t.assigned_to, 'full_name', None) else (t.assigned_to.get_username() if t.assigned_to else "")),
+        category=t.Category(t.category).label,
+    )
+
+
+def _member_requests(status):
+    qs = MemberRequestModel.objects.select_related('member')
+    if status:
+        # status is provided like 'new'|'processing'|'completed'. Our enum stores uppercase keys.
+        status_map = {
+            'new': MemberRequestModel.Status.NEW,
+            'processing': MemberRequestModel.Status.PROCESSING,
+            'completed': MemberRequestModel.Status.COMPLETED,
+        }
+        enum_val = status_map.get(status.lower())
+        if enum_val:
+            qs = qs.filter(status=enum_val)
+    return qs
+
+
+def _member_request_node(r):
+    return MemberRequestType(
+        id=str(r.id),
+        member_name=(r.member.full_name if getattr(r.member, 'full_name', None) else r.member.get_username()),
+        request_type=MemberRequestModel.RequestType(r.request_type).label,
+        status=MemberRequestModel.Status(r.status).label,
+        submitted_date=r.submitted_at.strftime('%Y-%m-%d'),
+        urgency=MemberRequestModel.Urgency(r.urgency).label,
+        details=r.details or "",
+    )
+
+
+def _card_applications(status):
+    qs = CardApplication.objects.all()
+    if status:
+        status_key = status.upper()
+        valid = {"NEW", "APPROVED", "REJECTED"}
+        if status_key in valid:
+            qs = qs.filter(status=status_key)
+    return qs
+
+
+def _offering_cards(street_id, is_taken, search):
+    qs = OfferingCard.objects.all()
+    if street_id:
+        qs = qs.filter(street_id=street_id)
+    if is_taken is not None:
+        qs = qs.filter(is_taken=is_taken)
+    if search:
+        # Search across code, current/latest assignment full_name and phone_number
+        # Build a subquery of assignment ids by card prioritizing current year active, else latest year
+        # Simpler approach: filter via OR on code and assignments relation
+        qs = qs.filter(
+            Q(code__icontains=search)
+            | Q(assignments__full_name__icontains=search)
+            | Q(assignments__phone_number__icontains=search)
+        ).distinct()
+    return qs
+
+
+def _offering_card_nodes(cards, card_ids):
+    """
+    OfferingCardType rows for ``cards`` (OFFERING_CARD_COLUMNS records);
+    ``card_ids`` is their ids (list or subquery).
+    """
+    # Preload assignments; prefer current year active assignment, else latest by year
+    current_year = timezone.now().year
+    assignments_qs = (
+        CardAssignment.objects.filter(card_id__in=card_ids)
+        .order_by('-year')
+        .values_list(
+            'card_id', 'id', 'phone_number', 'year', 'active',
+            Cast('pledged_ahadi', FloatField()),
+            Cast('pledged_shukrani', FloatField()),
+            Cast('pledged_majengo', FloatField()),
+        )
+    )
+    assignments = {}
+    for a in assignments_qs:
+        cid, year, active = a[0], a[3], a[4]
+        if cid not in assignments:
+            # first seen (highest year due to ordering)
+            assignments[cid] = a
+        # prefer current year active
+        if year == current_year and active:
+            assignments[cid] = a
+    # Collected totals from the ledger: a few rows per card, not every entry
+    sums = (
+        CardLedger.objects.filter(card_id__in=card_ids)
+        .values('card_id', 'entry_type')
+        .annotate(total=Cast(Sum('total'), FloatField()))
+        .order_by()
+        .values_list('card_id', 'entry_type', 'total')
+    )
+    total_map = {}
+    for card_id, entry_type, total in sums:
+        total_map.setdefault(card_id, {})[entry_type] = total or 0.0
+
+    no_assignment = (None, '', '', 0, False, 0.0, 0.0, 0.0)
+    results = []
+    for c in cards:
+        _, assignment_id, phone, year, _, pledged_ahadi, pledged_shukrani, pledged_majengo = assignments.get(c.id, no_assignment)
+        tmap = total_map.get(c.id, {})
+        results.append(
+            OfferingCardRow(
+                id=c.id,
+                code=c.code,
+                street=c.street,
+                number=c.number,
+                is_taken=c.is_taken,
+                assigned_to_name=c.assigned_to_name or '',
+                assigned_to_id=(str(c.assigned_to_id) if c.assigned_to_id else ''),
+                assignment_id=(str(assignment_id) if assignment_id else ''),
+                assigned_phone=phone,
+                assigned_year=year,
+                pledged_ahadi=pledged_ahadi,
+                pledged_shukrani=pledged_shukrani,
+                pledged_majengo=pledged_majengo,
+                progress_ahadi=(tmap.get('AHADI', 0.0) / pledged_ahadi * 100 if pledged_ahadi > 0 else 0.0),
+                progress_shukrani=(tmap.get('SHUKRANI', 0.0) / pledged_shukrani * 100 if pledged_shukrani > 0 else 0.0),
+                progress_majengo=(tmap.get('MAJENGO', 0.0) / pledged_majengo * 100 if pledged_majengo > 0 else 0.0),
+            )
+        )
+    return results
+
+
+def _available_card_numbers(street_id):
+    qs = OfferingCard.objects.select_related('street').filter(is_taken=False)
+    if street_id:
+        qs = qs.filter(street_id=street_id)
+    return qs
+
+
+def _available_card_number_node(c):
+    return AvailableCardNumberType(street=c.street.name, number=c.number, code=c.code)
+
+
+def _member_offering_entries(member_id, year):
+    # Find cards assigned to the member (any year)
+    card_ids = CardAssignment.objects.filter(member_id=member_id).values('card_id')
+    ent_qs = OfferingEntry.objects.filter(card_id__in=card_ids)
+    if year:
+        ent_qs = ent_qs.filter(date__year=year)
+    return ent_qs
+
+
+def offering_period_nodes(periods):
+    """``OfferingPeriodType``s of ``periods`` with their snapshot totals (one query)."""
+    totals = {
+        period_id: (amount, count)
+        for period_id, amount, count in MonthlyOfferingSnapshot.objects.filter(period__in=periods)
+        .values('period_id')
+        .annotate(amount=Sum('amount'), count=Sum('count'))
+        .order_by()
+        .values_list('period_id', 'amount', 'count')
+    }
+    nodes = []
+    for p in periods:
+        amount, count = totals.get(p.id, (0, 0))
+        nodes.append(OfferingPeriodType(
+            year=p.year,
+            month=p.month,
+            is_closed=p.is_closed,
+            closed_at=(p.closed_at.isoformat(timespec='seconds') if p.closed_at else None),
+            closed_by=(p.closed_by.full_name if p.closed_by else None),
+            reopened_at=(p.reopened_at.isoformat(timespec='seconds') if p.reopened_at else None),
+            total_amount=float(amount or 0),
+            offering_count=count or 0,
+        ))
+    return nodes
 
 
 class SecretaryQuery(ObjectType):
-    secretary_tasks = List(SecretaryTaskType, time_filter=String(default_value="week"))
-    member_requests = List(MemberRequestType, status=String())
+    secretary_tasks = List(SecretaryTaskType, time_filter=String(default_value="week"),
+                           deprecation_reason="Use secretaryTasksConnection")
+    secretary_tasks_connection = connection_field(SecretaryTaskConnection, time_filter=String(default_value="week"))
+    member_requests = List(MemberRequestType, status=String(), deprecation_reason="Use memberRequestsConnection")
+    member_requests_connection = connection_field(MemberRequestConnection, status=String())
     secretary_quick_stats = List(QuickStatType)
     secretary_activity = List(ActivityLogType, limit=Int(default_value=10))
-    offering_cards = List(OfferingCardType, street_id=Int(), is_taken=graphene.Boolean(), search=String())
-    available_card_numbers = List(AvailableCardNumberType, street_id=Int())
+    offering_cards = List(OfferingCardType, street_id=Int(), is_taken=graphene.Boolean(), search=String(),
+                          deprecation_reason="Use offeringCardsConnection")
+    offering_cards_connection = connection_field(OfferingCardConnection, street_id=Int(), is_taken=graphene.Boolean(), search=String())
+    available_card_numbers = List(AvailableCardNumberType, street_id=Int(),
+                                  deprecation_reason="Use availableCardNumbersConnection")
+    available_card_numbers_connection = connection_field(AvailableCardNumberConnection, street_id=Int())
     cards_overview = graphene.Field(CardsOverviewType, street_id=Int())
     registration_window_status = graphene.Field(RegistrationWindowStatusType)
     number_suggestions = graphene.Field(NumberSuggestionResultType, street_id=Int(required=True), query_number=Int(required=True), limit=Int(default_value=5))
     member_offering_history = graphene.Field(MemberOfferingHistoryType, member_id=Int(required=True), year=Int())
-    card_applications = List(CardApplicationType, status=String())
+    member_offering_entries = connection_field(OfferingEntryItemConnection, member_id=Int(required=True), year=Int())
+    offering_periods = List(OfferingPeriodType, year=Int())
+    card_applications = List(CardApplicationType, status=String(), deprecation_reason="Use cardApplicationsConnection")
+    card_applications_connection = connection_field(CardApplicationConnection, status=String())
     my_card_state = graphene.Field(MyCardStateType)
 
     def resolve_secretary_tasks(self, info, time_filter="week"):
-        qs = SecretaryTask.objects.all().order_by('due_date')
-        if time_filter == 'today':
-            today = timezone.now().date()
-            qs = qs.filter(due_date=today)
-        elif time_filter == 'week':
-            start = timezone.now().date()
-            end = start + timedelta(days=7)
-            qs = qs.filter(due_date__gte=start, due_date__lte=end)
-        # map to GraphQL type
-        results = []
-        for t in qs:
-            results.append(
-                SecretaryTaskType(
-                    id=str(t.id),
-                    title=t.title,
-                    status=t.Status(t.status).label,
-                    due_date=t.due_date.strftime('%Y-%m-%d') if t.due_date else "",
-                    assigned_to=(t.assigned_to.full_name if getattr(t.assigned_to, 'full_name', None) else (t.assigned_to.get_username() if t.assigned_to else "")),
-                    category=t.Category(t.category).label,
-                )
-            )
-        return results
+        return [_secretary_task_node(t) for t in _secretary_tasks(time_filter).order_by('due_date')]
+
+    def resolve_secretary_tasks_connection(self, info, time_filter="week", first=None, after=None):
+        return connection_from_queryset(
+            SecretaryTaskConnection, _secretary_tasks(time_filter), SECRETARY_TASKS, first, after,
+            lambda tasks: [_secretary_task_node(t) for t in tasks],
+        )
 
     def resolve_my_card_state(self, info):
         from .models import Member as MemberModel, CardApplication
@@ -77,38 +318,40 @@ class SecretaryQuery(ObjectType):
         return MyCardStateType(has_pending_application=has_pending, has_current_assignment=has_current)
 
     def resolve_member_offering_history(self, info, member_id, year=None):
-        # Find cards assigned to the member (any year)
-        card_ids = list(CardAssignment.objects.filter(member_id=member_id).values_list('card_id', flat=True).distinct())
-        ent_qs = OfferingEntry.objects.filter(card_id__in=card_ids)
+        ent_qs = _member_offering_entries(member_id, year)
+        card_ledger = CardLedger.objects.filter(card_id__in=CardAssignment.objects.filter(member_id=member_id).values('card_id'))
         if year:
-            ent_qs = ent_qs.filter(date__year=year)
+            card_ledger = card_ledger.filter(year=year)
+        totals = card_ledger.aggregate(
+            ahadi=Sum('total', filter=Q(entry_type='AHADI')),
+            shukrani=Sum('total', filter=Q(entry_type='SHUKRANI')),
+            majengo=Sum('total', filter=Q(entry_type='MAJENGO')),
+        )
         items = []
-        total_ahadi = 0.0
-        total_shukrani = 0.0
-        total_majengo = 0.0
-        for e in ent_qs.select_related('card').order_by('-date'):
-            amt = float(e.amount)
-            if e.entry_type == 'AHADI':
-                total_ahadi += amt
-            elif e.entry_type == 'SHUKRANI':
-                total_shukrani += amt
-            elif e.entry_type == 'MAJENGO':
-                total_majengo += amt
-            items.append(OfferingEntryItemType(
-                code=e.card.code,
-                date=e.date.strftime('%Y-%m-%d'),
-                entry_type=e.entry_type,
-                amount=amt,
-            ))
+        # Only build the (deprecated, unbounded) entries list when it was asked for
+        if 'entries' in selected_fields(info):
+            items = OFFERING_ENTRY_ROWS.rows(ent_qs.order_by('-date'))
         return MemberOfferingHistoryType(
             member_id=str(member_id),
             year=year or None,
             entries=items,
-            total_ahadi=total_ahadi,
-            total_shukrani=total_shukrani,
-            total_majengo=total_majengo,
+            total_ahadi=float(totals['ahadi'] or 0),
+            total_shukrani=float(totals['shukrani'] or 0),
+            total_majengo=float(totals['majengo'] or 0),
         )
 
+    def resolve_member_offering_entries(self, info, member_id, year=None, first=None, after=None):
+        return connection_from_queryset(
+            OfferingEntryItemConnection, _member_offering_entries(member_id, year), OFFERING_ENTRIES, first, after,
+            projection=OFFERING_ENTRY_ROWS,
+        )
+
+    def resolve_offering_periods(self, info, year=None):
+        qs = OfferingPeriod.objects.select_related('closed_by')
+        if year:
+            qs = qs.filter(year=year)
+        return offering_period_nodes(list(qs))
+
     def resolve_registration_window_status(self, info):
         is_open, start, end = RegistrationWindow.current_status()
         return RegistrationWindowStatusType(
@@ -147,58 +390,22 @@ class SecretaryQuery(ObjectType):
         )
 
     def resolve_card_applications(self, info, status=None):
-        from .models import CardApplication
-        qs = CardApplication.objects.select_related('street', 'member').order_by('-created_at')
-        if status:
-            status_key = status.upper()
-            valid = {"NEW", "APPROVED", "REJECTED"}
-            if status_key in valid:
-                qs = qs.filter(status=status_key)
-        results = []
-        for app in qs:
-            results.append(
-                CardApplicationType(
-                    id=str(app.id),
-                    full_name=app.full_name,
-                    phone_number=app.phone_number,
-                    street=app.street.name,
-                    preferred_number=app.preferred_number or None,
-                    note=app.note,
-                    pledged_ahadi=float(app.pledged_ahadi or 0),
-                    pledged_shukrani=float(app.pledged_shukrani or 0),
-                    pledged_majengo=float(app.pledged_majengo or 0),
-                    status=app.status,
-                    created_at=app.created_at.strftime('%Y-%m-%d %H:%M'),
-                )
-            )
-        return results
+        return CARD_APPLICATION_ROWS.rows(_card_applications(status).order_by('-created_at'))
+
+    def resolve_card_applications_connection(self, info, status=None, first=None, after=None):
+        return connection_from_queryset(
+            CardApplicationConnection, _card_applications(status), CARD_APPLICATIONS, first, after,
+            projection=CARD_APPLICATION_ROWS,
+        )
 
     def resolve_member_requests(self, info, status=None):
-        qs = MemberRequestModel.objects.all().order_by('-submitted_at')
-        if status:
-            # status is provided like 'new'|'processing'|'completed'. Our enum stores uppercase keys.
-            status_map = {
-                'new': MemberRequestModel.Status.NEW,
-                'processing': MemberRequestModel.Status.PROCESSING,
-                'completed': MemberRequestModel.Status.COMPLETED,
-            }
-            enum_val = status_map.get(status.lower())
-            if enum_val:
-                qs = qs.filter(status=enum_val)
-        results = []
-        for r in qs:
-            results.append(
-                MemberRequestType(
-                    id=str(r.id),
-                    member_name=(r.member.full_name if getattr(r.member, 'full_name', None) else r.member.get_username()),
-                    request_type=MemberRequestModel.RequestType(r.request_type).label,
-                    status=MemberRequestModel.Status(r.status).label,
-                    submitted_date=r.submitted_at.strftime('%Y-%m-%d'),
-                    urgency=MemberRequestModel.Urgency(r.urgency).label,
-                    details=r.details or "",
-                )
-            )
-        return results
+        return [_member_request_node(r) for r in _member_requests(status).order_by('-submitted_at')]
+
+    def resolve_member_requests_connection(self, info, status=None, first=None, after=None):
+        return connection_from_queryset(
+            MemberRequestConnection, _member_requests(status), MEMBER_REQUESTS, first, after,
+            lambda requests: [_member_request_node(r) for r in requests],
+        )
 
     def resolve_secretary_quick_stats(self, info):
         # Simple initial stats; can be enhanced with real calculations
@@ -214,7 +421,7 @@ class SecretaryQuery(ObjectType):
         ]
 
     def resolve_secretary_activity(self, info, limit=10):
-        logs = ActivityLog.objects.order_by('-created_at')[:limit]
+        logs = ActivityLog.objects.select_related('user').order_by('-created_at')[:limit]
         results = []
         for a in logs:
             results.append(
@@ -228,85 +435,30 @@ class SecretaryQuery(ObjectType):
         return results
 
     def resolve_offering_cards(self, info, street_id=None, is_taken=None, search=None):
-        qs = OfferingCard.objects.select_related('street', 'assigned_to').all()
-        if street_id:
-            qs = qs.filter(street_id=street_id)
-        if is_taken is not None:
-            qs = qs.filter(is_taken=is_taken)
-        if search:
-            # Search across code, current/latest assignment full_name and phone_number
-            # Build a subquery of assignment ids by card prioritizing current year active, else latest year
-            # Simpler approach: filter via OR on code and assignments relation
-            qs = qs.filter(
-                Q(code__icontains=search)
-                | Q(assignments__full_name__icontains=search)
-                | Q(assignments__phone_number__icontains=search)
-            ).distinct()
-
-        # Preload assignments; prefer current year active assignment, else latest by year
-        current_year = timezone.now().year
-        assignments_qs = CardAssignment.objects.filter(card_id__in=qs.values_list('id', flat=True)).order_by('-year')
-        assignments = {}
-        for a in assignments_qs:
-            cid = a.card_id
-            chosen = assignments.get(cid)
-            if not chosen:
-                # first seen (highest year due to ordering)
-                assignments[cid] = a
-            # prefer current year active
-            if a.year == current_year and a.active:
-                assignments[cid] = a
-        # Precompute sums
-        sums = (
-            OfferingEntry.objects.filter(card_id__in=qs.values_list('id', flat=True))
-            .values('card_id', 'entry_type')
-            .annotate(total=Sum('amount'))
-        )
-        total_map = {}
-        for row in sums:
-            total_map.setdefault(row['card_id'], {})[row['entry_type']] = float(row['total'] or 0)
+        # Same order as offeringCardsConnection
+        qs = _offering_cards(street_id, is_taken, search).order_by(*OFFERING_CARDS.order_by())
+        return _offering_card_nodes(OFFERING_CARD_COLUMNS.rows(qs), qs.values_list('id', flat=True))
 
-        results = []
-        for c in qs:
-            a = assignments.get(c.id)
-            tmap = total_map.get(c.id, {})
-            pledged_ahadi = float(a.pledged_ahadi) if a else 0.0
-            pledged_shukrani = float(a.pledged_shukrani) if a else 0.0
-            pledged_majengo = float(a.pledged_majengo) if a else 0.0
-            pa = tmap.get('AHADI', 0.0)
-            ps = tmap.get('SHUKRANI', 0.0)
-            pm = tmap.get('MAJENGO', 0.0)
-            results.append(
-                OfferingCardType(
-                    id=str(c.id),
-                    code=c.code,
-                    street=c.street.name,
-                    number=c.number,
-                    is_taken=c.is_taken,
-                    assigned_to_name=(c.assigned_to.full_name if getattr(c.assigned_to, 'full_name', None) else ''),
-                    assigned_to_id=(str(c.assigned_to.id) if c.assigned_to else ''),
-                    assignment_id=(str(a.id) if a else ''),
-                    assigned_phone=(a.phone_number if a else ''),
-                    assigned_year=(a.year if a else 0),
-                    pledged_ahadi=pledged_ahadi,
-                    pledged_shukrani=pledged_shukrani,
-                    pledged_majengo=pledged_majengo,
-                    progress_ahadi=(pa / pledged_ahadi * 100 if pledged_ahadi > 0 else 0.0),
-                    progress_shukrani=(ps / pledged_shukrani * 100 if pledged_shukrani > 0 else 0.0),
-                    progress_majengo=(pm / pledged_majengo * 100 if pledged_majengo > 0 else 0.0),
-                )
-            )
-        return results
+    def resolve_offering_cards_connection(self, info, street_id=None, is_taken=None, search=None, first=None, after=None):
+        # Assignments and sums are only looked up for the cards on the page
+        return connection_from_queryset(
+            OfferingCardConnection, _offering_cards(street_id, is_taken, search), OFFERING_CARDS, first, after,
+            lambda cards: _offering_card_nodes(cards, [c.id for c in cards]),
+            projection=OFFERING_CARD_COLUMNS,
+        )
 
     def resolve_available_card_numbers(self, info, street_id=None):
-        qs = OfferingCard.objects.filter(is_taken=False)
-        if street_id:
-            qs = qs.filter(street_id=street_id)
         return [
-            AvailableCardNumberType(street=c.street.name, number=c.number, code=c.code)
-            for c in qs.order_by('street__name', 'number')
+            _available_card_number_node(c)
+            for c in _available_card_numbers(street_id).order_by(*OFFERING_CARDS.order_by())
         ]
 
+    def resolve_available_card_numbers_connection(self, info, street_id=None, first=None, after=None):
+        return connection_from_queryset(
+            AvailableCardNumberConnection, _available_card_numbers(street_id), OFFERING_CARDS, first, after,
+            lambda cards: [_available_card_number_node(c) for c in cards],
+        )
+
     def resolve_cards_overview(self, info, street_id=None):
         qs = OfferingCard.objects.all()
         if street_id:
@@ -316,34 +468,35 @@ class SecretaryQuery(ObjectType):
         free_cards = total_cards - taken_cards
         # activity: cards with at least one entry in current year
         year = timezone.now().year
-        active_card_ids = (
-            OfferingEntry.objects.filter(card_id__in=qs.values_list('id', flat=True), date__year=year)
-            .values('card_id')
-            .annotate(cnt=Count('id'))
-        )
-        actively_used_cards = sum(1 for _ in active_card_ids)
+        card_ledger = CardLedger.objects.filter(card_id__in=qs.values_list('id', flat=True), entry_count__gt=0)
+        actively_used_cards = card_ledger.filter(year=year).values('card_id').distinct().count()
         # least active card: min sum of entries
-        totals = (
-            OfferingEntry.objects.filter(card_id__in=qs.values_list('id', flat=True))
-            .values('card_id')
-            .annotate(total=Sum('amount'))
+        least_active_card = (
+            card_ledger.values('card_id', 'card__code')
+            .annotate(total=Sum('total'))
             .order_by('total')
+            .values_list('card__code', flat=True)
+            .first()
+        )
+
+        # One aggregate per table instead of one per column/entry type
+        pledged = CardAssignment.objects.filter(card_id__in=qs.values_list('id', flat=True)).aggregate(
+            ahadi=Sum('pledged_ahadi'),
+            shukrani=Sum('pledged_shukrani'),
+            majengo=Sum('pledged_majengo'),
+        )
+        total_pledged_ahadi = float(pledged['ahadi'] or 0)
+        total_pledged_shukrani = float(pledged['shukrani'] or 0)
+        total_pledged_majengo = float(pledged['majengo'] or 0)
+
+        collected = card_ledger.aggregate(
+            ahadi=Sum('total', filter=Q(entry_type='AHADI')),
+            shukrani=Sum('total', filter=Q(entry_type='SHUKRANI')),
+            majengo=Sum('total', filter=Q(entry_type='MAJENGO')),
         )
-        least_active_card = None
-        if totals:
-            first = list(totals)[0]
-            code = OfferingCard.objects.filter(id=first['card_id']).values_list('code', flat=True).first()
-            least_active_card = code
-
-        ass_qs = CardAssignment.objects.filter(card_id__in=qs.values_list('id', flat=True))
-        total_pledged_ahadi = float(ass_qs.aggregate(s=Sum('pledged_ahadi'))['s'] or 0)
-        total_pledged_shukrani = float(ass_qs.aggregate(s=Sum('pledged_shukrani'))['s'] or 0)
-        total_pledged_majengo = float(ass_qs.aggregate(s=Sum('pledged_majengo'))['s'] or 0)
-
-        ent_qs = OfferingEntry.objects.filter(card_id__in=qs.values_list('id', flat=True))
-        total_collected_ahadi = float(ent_qs.filter(entry_type='AHADI').aggregate(s=Sum('amount'))['s'] or 0)
-        total_collected_shukrani = float(ent_qs.filter(entry_type='SHUKRANI').aggregate(s=Sum('amount'))['s'] or 0)
-        total_collected_majengo = float(ent_qs.filter(entry_type='MAJENGO').aggregate(s=Sum('amount'))['s'] or 0)
+        total_collected_ahadi = float(collected['ahadi'] or 0)
+        total_collected_shukrani = float(collected['shukrani'] or 0)
+        total_collected_majengo = float(collected['majengo'] or 0)
 
         return CardsOverviewType(
             total_cards=total_cards,
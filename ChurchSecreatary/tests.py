@@ -1,3 +1,263 @@
-from django.test import TestCase
+import datetime
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib import admin
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from churchMember.models import DailyOfferingRollup, Offering
+from UserAuthentication.identity import local_identities
+from UserAuthentication.models import Member, Street
+from UserAuthentication.tokens import issue_access_token, token_cache
+from . import ledger, periods
+from .models import (CardAssignment, CardLedger, MonthlyOfferingSnapshot, OfferingBatch, OfferingCard, OfferingEntry,
+                     OfferingPeriod)
+from .queries import OFFERING_CARDS
+
+
+def graphql(client, query, variables=None, **headers):
+    response = client.post('/graphql/', json.dumps({'query': query, 'variables': variables or {}}),
+                           content_type='application/json', **headers)
+    return response.json()
+
+
+class OfferingCardsConnectionTests(TestCase):
+    PAGE = '''query($after: String) {
+        offeringCardsConnection(first: 2, after: $after) {
+            edges { node { code } } pageInfo { hasNextPage endCursor }
+        }
+    }'''
+
+    def setUp(self):
+        for name in ('Zion Street', 'Amani Street'):
+            street = Street.objects.create(name=name)
+            for number in (3, 1, 2):
+                OfferingCard.objects.create(street=street, number=number)
+
+    def page(self, after=None):
+        return graphql(self.client, self.PAGE, {'after': after})['data']['offeringCardsConnection']
+
+    def test_pages_follow_street_and_number_without_overlap(self):
+        codes, after = [], None
+        while True:
+            page = self.page(after)
+            codes += [edge['node']['code'] for edge in page['edges']]
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+        self.assertEqual(codes, ['ZI-001', 'ZI-002', 'ZI-003', 'AM-001', 'AM-002', 'AM-003'])
+
+    def test_seek_uses_local_columns(self):
+        self.assertEqual(OFFERING_CARDS.paths, ['street_id', 'number', 'id'])
+        after = self.page()['pageInfo']['endCursor']
+        with CaptureQueriesContext(connection) as queries:
+            self.page(after)
+        [page_sql] = [q['sql'] for q in queries if 'LIMIT' in q['sql']]
+        self.assertIn('"street_id" >=', page_sql)
+
+    def test_deprecated_lists_share_the_connection_order(self):
+        # Unfiltered lists are over the anonymous budget
+        token_cache.clear()
+        local_identities.clear()
+        secretary = Member.objects.create_user(email='secretary@example.com', full_name='Secretary',
+                                               role='CHURCH_SECRETARY')
+        data = graphql(self.client, '{ offeringCards { code } availableCardNumbers { code } }',
+                       HTTP_AUTHORIZATION=f'Bearer {issue_access_token(secretary)}')['data']
+        expected = ['ZI-001', 'ZI-002', 'ZI-003', 'AM-001', 'AM-002', 'AM-003']
+        self.assertEqual([card['code'] for card in data['offeringCards']], expected)
+        self.assertEqual([card['code'] for card in data['availableCardNumbers']], expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        data = graphql(self.client, self.PAGE, {'after': 'not-a-cursor'})
+        self.assertEqual(data['errors'][0]['extensions']['code'], 'INVALID_CURSOR')
+
+
+BULK_RECORD = '''mutation($input: BulkOfferingEntryInput!) {
+    bulkRecordOfferingEntries(input: $input) { ok count totalAhadi totalShukrani }
+}'''
+
+
+def bulk_record(client, street, entries, date='2026-10-04'):
+    meta = {'streetId': street.id, 'recorderName': 'Recorder', 'date': date, 'massType': 'MORNING_GLORY'}
+    return graphql(client, BULK_RECORD, {'input': {'meta': meta, 'entries': entries}})
+
+
+class BulkRecordOfferingEntriesTests(TestCase):
+    def setUp(self):
+        self.street = Street.objects.create(name='Pride Street')
+        self.cards = [OfferingCard.objects.create(street=self.street, number=n) for n in range(1, 7)]
+        self.member = Member.objects.create_user(email='holder@example.com', full_name='Card Holder')
+        CardAssignment.objects.create(card=self.cards[0], member=self.member, full_name='Card Holder',
+                                      phone_number='0700000000', year=2026)
+
+    def entries(self, count, entry_type='AHADI', amount=1000):
+        return [{'cardId': card.id, 'entryType': entry_type, 'amount': amount} for card in self.cards[:count]]
+
+    def test_entries_and_member_offerings_are_recorded(self):
+        data = bulk_record(self.client, self.street, self.entries(2) + [
+            {'cardId': self.cards[0].id, 'entryType': 'SHUKRANI', 'amount': 500, 'date': '2026-10-05'}])
+        self.assertEqual(data['data']['bulkRecordOfferingEntries'],
+                         {'ok': True, 'count': 3, 'totalAhadi': 2000.0, 'totalShukrani': 500.0})
+        self.assertEqual(OfferingEntry.objects.count(), 3)
+        self.assertEqual(Offering.objects.filter(member=self.member).count(), 2)
+        self.assertEqual(Offering.objects.filter(member=None).count(), 1)
+
+    def test_invalid_item_writes_nothing(self):
+        other_card = OfferingCard.objects.create(street=Street.objects.create(name='Other Street'), number=1)
+        entries = self.entries(2) + [{'cardId': other_card.id, 'entryType': 'AHADI', 'amount': 1}]
+        data = bulk_record(self.client, self.street, entries)
+        self.assertIn('does not belong', data['errors'][0]['message'])
+        self.assertEqual((OfferingBatch.objects.count(), OfferingEntry.objects.count(), Offering.objects.count()),
+                         (0, 0, 0))
+
+    def test_query_count_does_not_grow_with_entries(self):
+        # The month's period row is created by the first write
+        OfferingPeriod.objects.create(year=2026, month=10)
+        counts = []
+        for size in (2, 6):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(bulk_record(self.client, self.street, self.entries(size))['data'])
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+BULK_GENERATE = '''mutation($input: BulkGenerateCardsInput!) {
+    bulkGenerateCards(input: $input) { ok created skipped conflicts }
+}'''
+
+
+class BulkGenerateCardsTests(TestCase):
+    def generate(self, **input):
+        return graphql(self.client, BULK_GENERATE, {'input': input})['data']['bulkGenerateCards']
+
+    def test_missing_cards_are_created_with_codes(self):
+        street = Street.objects.create(name='Pride Street')
+        OfferingCard.objects.create(street=street, number=2)
+        self.assertEqual(self.generate(streetId=street.id, startNumber=1, endNumber=4),
+                         {'ok': True, 'created': 3, 'skipped': 1, 'conflicts': []})
+        self.assertEqual(list(street.offering_cards.order_by('number').values_list('code', flat=True)),
+                         ['PR-001', 'PR-002', 'PR-003', 'PR-004'])
+        self.assertEqual(self.generate(streetId=street.id, startNumber=1, endNumber=4),
+                         {'ok': True, 'created': 0, 'skipped': 4, 'conflicts': []})
+
+    def test_code_collisions_are_reported(self):
+        pride = Street.objects.create(name='Pride Street')
+        prince = Street.objects.create(name='Prince Street')
+        with CaptureQueriesContext(connection) as queries:
+            result = self.generate(startNumber=1, endNumber=50)
+        self.assertEqual((result['created'], result['skipped']), (50, 0))
+        self.assertEqual(result['conflicts'], [f'PR-{n:03d}' for n in range(1, 51)])
+        self.assertEqual((pride.offering_cards.count(), prince.offering_cards.count()), (50, 0))
+        self.assertLess(len(queries), 15)
+
+        result = self.generate(streetId=prince.id, startNumber=40, endNumber=60)
+        self.assertEqual((result['created'], result['skipped'], len(result['conflicts'])), (10, 0, 11))
+
+
+class CardLedgerTests(TestCase):
+    def setUp(self):
+        self.street = Street.objects.create(name='Pride Street')
+        self.cards = [OfferingCard.objects.create(street=self.street, number=n) for n in (1, 2)]
+        self.admin = admin.site._registry[OfferingEntry]
+        self.request = RequestFactory().post('/admin/')
+
+    def assert_ledger_matches_entries(self):
+        entries = {
+            (card_id, year, entry_type): (total, count)
+            for card_id, year, entry_type, total, count in (
+                OfferingEntry.objects.annotate(year=ExtractYear('date')).values('card_id', 'year', 'entry_type')
+                .annotate(total=Sum('amount'), count=Count('id')).order_by()
+                .values_list('card_id', 'year', 'entry_type', 'total', 'count')
+            )
+        }
+        ledger_rows = {
+            (row.card_id, row.year, row.entry_type): (row.total, row.entry_count)
+            for row in CardLedger.objects.exclude(entry_count=0)
+        }
+        self.assertEqual(ledger_rows, entries)
+
+    def test_ledger_follows_record_edit_and_delete(self):
+        entries = [{'cardId': card.id, 'entryType': entry_type, 'amount': amount}
+                   for card in self.cards for entry_type, amount in (('AHADI', 1000.5), ('SHUKRANI', 250))]
+        bulk_record(self.client, self.street, entries)
+        bulk_record(self.client, self.street, entries[:1], date='2025-12-28')
+        self.assert_ledger_matches_entries()
+
+        entry = OfferingEntry.objects.filter(entry_type='AHADI', date__year=2026).first()
+        entry.amount, entry.entry_type, entry.date = Decimal('70.25'), 'MAJENGO', entry.date.replace(year=2025)
+        self.admin.save_model(self.request, entry, None, change=True)
+        self.assert_ledger_matches_entries()
+
+        self.admin.delete_model(self.request, OfferingEntry.objects.filter(entry_type='SHUKRANI').first())
+        self.admin.delete_queryset(self.request, OfferingEntry.objects.filter(card=self.cards[1]))
+        self.assert_ledger_matches_entries()
+        self.assertEqual(ledger.rebuild(), 0)
+
+
+RECORD_ENTRY = '''mutation($input: OfferingEntryInput!) {
+    recordOfferingEntry(input: $input) { ok }
+}'''
+
+
+class OfferingPeriodTests(TestCase):
+    def setUp(self):
+        self.street = Street.objects.create(name='Pride Street')
+        self.cards = [OfferingCard.objects.create(street=self.street, number=n) for n in (1, 2)]
+        self.secretary = Member.objects.create_user(email='secretary@example.com', full_name='Secretary')
+        entries = [{'cardId': card.id, 'entryType': entry_type, 'amount': amount}
+                   for card in self.cards for entry_type, amount in (('AHADI', 1000.5), ('SHUKRANI', 250))]
+        bulk_record(self.client, self.street, entries, date='2026-09-06')
+        bulk_record(self.client, self.street, entries[:1], date='2026-09-13')
+        Offering.objects.create(amount='300.00', offering_type='TITHE', mass_type='MAJOR', date='2026-09-20')
+
+    def test_writers_lock_a_period_row_for_each_month(self):
+        self.assertEqual(list(OfferingPeriod.objects.values_list('year', 'month', 'is_closed')), [(2026, 9, False)])
+
+    def test_snapshots_match_raw_totals(self):
+        periods.close(2026, 9, self.secretary)
+        september = {'date__range': ('2026-09-01', '2026-09-30')}
+        offerings = {
+            (row['street_id'], row['mass_type'], row['offering_type']): (row['total'], row['count'])
+            for row in Offering.objects.filter(**september).values('street_id', 'mass_type', 'offering_type')
+            .annotate(total=Sum('amount'), count=Count('id')).order_by()
+        }
+        snapshots = {
+            (row.street_id, row.mass_type, row.offering_type): (row.amount, row.count)
+            for row in MonthlyOfferingSnapshot.objects.all()
+        }
+        self.assertEqual(snapshots, offerings)
+        self.assertEqual(periods.offering_totals(start=datetime.date(2026, 9, 1))[()],
+                         Offering.objects.aggregate(total=Sum('amount'))['total'])
+
+    def test_writes_to_a_closed_month_are_rejected(self):
+        periods.close(2026, 9, self.secretary)
+        counts = (OfferingBatch.objects.count(), OfferingEntry.objects.count(), Offering.objects.count())
+        entries = [{'cardId': self.cards[0].id, 'entryType': 'AHADI', 'amount': 1000},
+                   {'cardId': self.cards[1].id, 'entryType': 'AHADI', 'amount': 1000, 'date': '2026-09-27'}]
+        data = bulk_record(self.client, self.street, entries, date='2026-10-04')
+        self.assertIn('2026-09 are closed', data['errors'][0]['message'])
+        self.assertEqual((OfferingBatch.objects.count(), OfferingEntry.objects.count(), Offering.objects.count()),
+                         counts)
+
+        periods.reopen(2026, 9, self.secretary)
+        self.assertTrue(bulk_record(self.client, self.street, entries, date='2026-10-04')['data']
+                        ['bulkRecordOfferingEntries']['ok'])
+
+    def test_single_entries_and_their_offerings_respect_the_close(self):
+        periods.close(2026, 9, self.secretary)
+        counts = (OfferingEntry.objects.count(), Offering.objects.count(), DailyOfferingRollup.objects.count())
+        entry = {'cardId': self.cards[0].id, 'entryType': 'AHADI', 'amount': 1000, 'date': '2026-09-27'}
+        data = graphql(self.client, RECORD_ENTRY, {'input': entry})
+        self.assertIn('2026-09 are closed', data['errors'][0]['message'])
+        self.assertEqual((OfferingEntry.objects.count(), Offering.objects.count(),
+                          DailyOfferingRollup.objects.count()), counts)
+
+        data = graphql(self.client, RECORD_ENTRY, {'input': dict(entry, date='2026-10-04')})
+        self.assertTrue(data['data']['recordOfferingEntry']['ok'])
+        offering = Offering.objects.get(date='2026-10-04')
+        self.assertEqual((offering.amount, offering.street_id), (Decimal('1000.00'), self.street.id))
+        self.assertEqual(DailyOfferingRollup.objects.get(date='2026-10-04').amount, Decimal('1000.00'))
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'operation_name', 'resolver_path', 'duration_ms', 'database')
+    list_filter = ('operation_name', 'database')
+    search_fields = ('fingerprint', 'operation_name', 'resolver_path')
+    readonly_fields = ('fingerprint', 'fingerprint_hash', 'sql', 'duration_ms', 'operation_name',
+                       'resolver_path', 'database', 'plan', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'Monitoring'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_database_metrics
+        from .registry import registry
+
+        connection_created.connect(install_database_metrics, dispatch_uid='monitoring_database_metrics')
+        registry.compact()
@@ -0,0 +1,178 @@
+"""
+Metrics for the whole request pipeline, kept in the shared registry
+(``Monitoring.registry``) and scraped at ``/metrics/``.
+
+* HTTP: ``http_requests_total`` and ``http_request_duration_seconds`` by
+  route and GraphQL operation (``Monitoring.middleware.MetricsMiddleware``).
+* Database: ``db_queries_total``, ``db_query_duration_seconds_total`` and
+  ``db_connections_opened_total`` per alias. An execute wrapper is attached to
+  every connection when it opens. There is no connection pool (psycopg2), so
+  the rate of new connections is the pool-pressure signal.
+* Caches, auth and background queues: these keep plain in-process counters,
+  which cost nothing on the hot path. ``process_collector`` copies their
+  deltas into the registry at most once per ``METRICS['SYNC_INTERVAL']``
+  seconds (at the end of a request) and again before a scrape.
+
+GraphQL operation names come from clients, so each process labels at most
+``METRICS['MAX_OPERATIONS']`` distinct names and reports the rest as
+``(other)``.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .registry import registry
+
+_metrics_settings = getattr(settings, 'METRICS', {})
+SYNC_INTERVAL = _metrics_settings.get('SYNC_INTERVAL', 5)
+MAX_OPERATIONS = _metrics_settings.get('MAX_OPERATIONS', 100)
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by method, route and status')
+http_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route and GraphQL operation',
+    buckets=HTTP_BUCKETS)
+db_queries = registry.counter(
+    'db_queries_total', 'SQL statements executed, by database alias')
+db_duration = registry.counter(
+    'db_query_duration_seconds_total', 'Time spent executing SQL, by database alias')
+db_connections = registry.counter(
+    'db_connections_opened_total', 'Database connections opened, by database alias')
+cache_requests = registry.counter(
+    'cache_requests_total', 'Cache lookups by namespace and result (hit/miss)')
+token_revocation_checks = registry.counter(
+    'auth_revocation_checks_total',
+    'Token revocation checks: bloom_negative (no query), confirmed, false_positive')
+login_rejected = registry.counter(
+    'auth_login_pool_rejected_total', 'Logins rejected because too many password checks were in flight')
+queue_depth = registry.gauge(
+    'background_queue_depth', 'Items waiting in in-process background queues')
+log_records_dropped = registry.counter(
+    'log_records_dropped_total', 'Log records dropped because the logging queue was full')
+
+_operations = set()
+_operations_lock = threading.Lock()
+
+
+def operation_name(name):
+    """``name`` if this process is still within its label budget, else ``(other)``."""
+    if not name or name in _operations:
+        return name or ''
+    with _operations_lock:
+        if name in _operations or len(_operations) < MAX_OPERATIONS:
+            _operations.add(name)
+            return name
+    return '(other)'
+
+
+def observe_request(method, route, status, operation, duration):
+    http_requests.inc(method=method, route=route, status=str(status))
+    http_duration.observe(duration, route=route, operation=operation_name(operation))
+
+
+class DatabaseMetricsWrapper:
+    """``execute_wrapper`` installed on each connection as it opens."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            db_queries.inc(alias=self.alias)
+            db_duration.inc(elapsed, alias=self.alias)
+
+
+def install_database_metrics(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if not any(isinstance(wrapper, DatabaseMetricsWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.insert(0, DatabaseMetricsWrapper(connection.alias))
+    db_connections.inc(alias=connection.alias)
+
+
+def _background_queue_handlers():
+    from SmartChurch.logging_setup import BackgroundQueueHandler
+
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    seen = set()
+    for logger in loggers:
+        for handler in logger.handlers:
+            if isinstance(handler, BackgroundQueueHandler) and id(handler) not in seen:
+                seen.add(id(handler))
+                yield handler
+
+
+def _process_counters():
+    """``(metric, labels, running total)`` for the in-process counters."""
+    from SmartChurch.graphql_view import document_cache
+    from SmartChurch.persisted_queries import persisted_queries
+    from UserAuthentication.identity import local_identities
+    from UserAuthentication.login_pool import login_slots
+    from UserAuthentication.revocation import revocation_list
+    from UserAuthentication.tokens import token_cache
+
+    for namespace, cache in (
+        ('auth_token', token_cache),
+        ('identity_local', local_identities),
+        ('graphql_document', document_cache),
+        ('persisted_query', persisted_queries),
+    ):
+        yield cache_requests, {'namespace': namespace, 'result': 'hit'}, cache.hits
+        yield cache_requests, {'namespace': namespace, 'result': 'miss'}, cache.misses
+    yield cache_requests, {'namespace': 'identity_shared', 'result': 'hit'}, local_identities.shared_hits
+    yield cache_requests, {'namespace': 'identity_shared', 'result': 'miss'}, local_identities.shared_misses
+    yield token_revocation_checks, {'result': 'bloom_negative'}, revocation_list.bloom_negatives
+    yield token_revocation_checks, {'result': 'confirmed'}, revocation_list.confirmed
+    yield token_revocation_checks, {'result': 'false_positive'}, revocation_list.false_positives
+    yield login_rejected, {}, login_slots.rejected
+    yield log_records_dropped, {}, sum(handler.dropped for handler in _background_queue_handlers())
+
+
+def _process_gauges():
+    from SmartChurch.parallel_execution import root_field_pool
+    from UserAuthentication.login_pool import login_slots
+
+    yield {'queue': 'logging'}, sum(handler.queue.qsize() for handler in _background_queue_handlers())
+    yield {'queue': 'login_hash'}, login_slots.in_flight
+    yield {'queue': 'graphql_root_field'}, root_field_pool.queue_depth
+
+
+class ProcessCollector:
+    """Copies in-process counters and gauges into the shared registry."""
+
+    def __init__(self, interval=SYNC_INTERVAL):
+        self.interval = interval
+        self._reported = {}
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sync = now + self.interval
+            for metric, labels, total in _process_counters():
+                key = (metric.name, tuple(sorted(labels.items())))
+                delta = total - self._reported.get(key, 0)
+                if delta > 0 or key not in self._reported:
+                    metric.inc(max(delta, 0), **labels)
+                self._reported[key] = total
+            for labels, value in _process_gauges():
+                queue_depth.set(value, **labels)
+        finally:
+            self._lock.release()
+
+
+process_collector = ProcessCollector()
@@ -0,0 +1,49 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import observe_request, process_collector
+
+OPERATION_ATTR = '_graphql_operation'
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Times every request for ``http_request_duration_seconds``. Sits first in
+    ``MIDDLEWARE`` so the whole pipeline is measured. The GraphQL view tags the
+    request with its operation name.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - start)
+        return response
+
+    def _observe(self, request, response, duration):
+        observe_request(
+            request.method, _route(request), response.status_code,
+            getattr(request, OPERATION_ATTR, ''), duration,
+        )
+        process_collector.sync()
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.TextField()),
+                ('fingerprint_hash', models.CharField(db_index=True, max_length=64)),
+                ('sql', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('operation_name', models.CharField(blank=True, db_index=True, max_length=200)),
+                ('resolver_path', models.CharField(blank=True, max_length=500)),
+                ('database', models.CharField(default='default', max_length=50)),
+                ('plan', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
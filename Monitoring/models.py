@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    An ORM statement that exceeded ``SLOW_QUERY_LOG['THRESHOLD_MS']`` during a
+    GraphQL operation. The table is trimmed to ``MAX_ROWS``.
+    """
+    fingerprint = models.TextField()
+    fingerprint_hash = models.CharField(max_length=64, db_index=True)
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    operation_name = models.CharField(max_length=200, blank=True, db_index=True)
+    resolver_path = models.CharField(max_length=500, blank=True)
+    database = models.CharField(max_length=50, default='default')
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return f"{self.operation_name or '(no operation)'} {self.duration_ms:.0f} ms"
@@ -0,0 +1,28 @@
+from graphene import ObjectType, String, Int, Float, List
+
+
+class SqlFingerprintCount(ObjectType):
+    fingerprint = String()
+    count = Int()
+
+
+class SqlOperationStatType(ObjectType):
+    operation = String()
+    calls = Int()
+    queries = Int()
+    avg_queries = Float()
+    max_queries = Int()
+    db_time_ms = Float()
+    avg_db_time_ms = Float()
+    n_plus_one_calls = Int()
+    n_plus_one = List(SqlFingerprintCount)
+
+
+class ResolverLatencyType(ObjectType):
+    field = String()
+    count = Int()
+    total_ms = Float()
+    avg_ms = Float()
+    p50_ms = Float()
+    p95_ms = Float()
+    p99_ms = Float()
@@ -0,0 +1,75 @@
+import json
+
+from graphene import ObjectType, List, Int, String
+from graphql import GraphQLError
+
+from .outputs import ResolverLatencyType, SqlFingerprintCount, SqlOperationStatType
+from .registry import histogram_quantile
+from .sql import operation_stats
+from .tracing import resolver_duration
+
+
+def require_staff(info):
+    user = getattr(info.context, 'user', None)
+    if not user or not user.is_authenticated or not (user.is_staff or user.is_superuser):
+        raise GraphQLError("Staff access required")
+    return user
+
+
+class MonitoringQuery(ObjectType):
+    sql_operation_stats = List(SqlOperationStatType)
+    resolver_latency = List(ResolverLatencyType, type_name=String(), limit=Int(default_value=50))
+
+    def resolve_sql_operation_stats(self, info):
+        require_staff(info)
+        results = []
+        for name, stats in operation_stats.snapshot().items():
+            calls = stats['calls'] or 1
+            results.append(
+                SqlOperationStatType(
+                    operation=name,
+                    calls=stats['calls'],
+                    queries=stats['queries'],
+                    avg_queries=round(stats['queries'] / calls, 2),
+                    max_queries=stats['max_queries'],
+                    db_time_ms=round(stats['db_time'] * 1000, 3),
+                    avg_db_time_ms=round(stats['db_time'] * 1000 / calls, 3),
+                    n_plus_one_calls=stats['n_plus_one_calls'],
+                    n_plus_one=[
+                        SqlFingerprintCount(fingerprint=key, count=count)
+                        for key, count in stats['n_plus_one'].items()
+                    ],
+                )
+            )
+        results.sort(key=lambda stat: stat.db_time_ms, reverse=True)
+        return results
+
+    def resolve_resolver_latency(self, info, type_name=None, limit=50):
+        require_staff(info)
+        samples = dict(resolver_duration.registry.collect()).get(resolver_duration, {})
+        results = []
+        for labels, histogram in samples.items():
+            field = json.loads(labels).get('field', '')
+            if type_name and not field.startswith(f'{type_name}.'):
+                continue
+            count = int(histogram['count'])
+            if not count:
+                continue
+
+            def quantile_ms(q):
+                value = histogram_quantile(q, histogram['buckets'])
+                return None if value is None else round(value * 1000, 3)
+
+            results.append(
+                ResolverLatencyType(
+                    field=field,
+                    count=count,
+                    total_ms=round(histogram['sum'] * 1000, 3),
+                    avg_ms=round(histogram['sum'] * 1000 / count, 3),
+                    p50_ms=quantile_ms(0.5),
+                    p95_ms=quantile_ms(0.95),
+                    p99_ms=quantile_ms(0.99),
+                )
+            )
+        results.sort(key=lambda stat: stat.p99_ms or 0, reverse=True)
+        return results[:limit]
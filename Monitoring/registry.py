@@ -0,0 +1,424 @@
+"""
+Multi-process metrics registry.
+
+Gunicorn runs several worker processes, so metrics kept in a worker's memory
+only describe that worker. Every process writes its samples to its own
+memory-mapped file in ``METRICS['DIRECTORY']`` (``<kind>_<pid>.db``). Writes
+never contend across processes. Collection reads every file in the directory
+and adds the values up.
+
+A file is a packed list of ``(key, float64)`` entries behind an 8-byte header
+holding the number of bytes used. A key is the JSON of ``(metric, labels,
+suffix)``. New keys are appended and existing values are updated in place; the
+file doubles in size when full.
+
+Counters and histograms from workers that have exited are still counted, so
+totals never go backwards when a worker is recycled. Gauges are only read from
+live processes. ``compact()`` runs when each process starts: it folds the
+files of exited processes into one ``<kind>_aggregate.db`` per kind and
+deletes their gauge files, so the directory does not grow with every worker
+restart.
+
+Without ``METRICS['DIRECTORY']`` values are kept in process memory. That is
+only correct for a single process, so the directory must be set when
+``METRICS['WORKERS']`` is above 1.
+"""
+import fcntl
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+_metrics_settings = getattr(settings, 'METRICS', {})
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HEADER = struct.Struct('i4x')
+_KEY_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+_INITIAL_SIZE = 1 << 16
+AGGREGATE = 'aggregate'
+
+
+class MmapedValues:
+    """A float per string key, stored in a memory-mapped file."""
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self._positions = {}
+        mode = 'rb' if read_only else 'a+b'
+        self._file = open(path, mode)
+        if not read_only and os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        access = mmap.ACCESS_READ if read_only else mmap.ACCESS_WRITE
+        self._map = mmap.mmap(self._file.fileno(), self._capacity, access=access)
+        if not read_only and self._used == 0:
+            self._used = _HEADER.size
+        for key, _, position in self._entries():
+            self._positions[key] = position
+
+    @property
+    def _used(self):
+        return _HEADER.unpack_from(self._map, 0)[0]
+
+    @_used.setter
+    def _used(self, value):
+        _HEADER.pack_into(self._map, 0, value)
+
+    def _entries(self):
+        used = min(self._used, self._capacity)
+        position = _HEADER.size
+        while position < used:
+            length = _KEY_LENGTH.unpack_from(self._map, position)[0]
+            key_start = position + _KEY_LENGTH.size
+            value_position = key_start + length + (-(_KEY_LENGTH.size + length) % 8)
+            key = self._map[key_start:key_start + length].decode('utf-8')
+            yield key, _VALUE.unpack_from(self._map, value_position)[0], value_position
+            position = value_position + _VALUE.size
+
+    def items(self):
+        return [(key, value) for key, value, _ in self._entries()]
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._map.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity, access=mmap.ACCESS_WRITE)
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is None:
+            encoded = key.encode('utf-8')
+            padding = -(_KEY_LENGTH.size + len(encoded)) % 8
+            entry_size = _KEY_LENGTH.size + len(encoded) + padding + _VALUE.size
+            start = self._used
+            if start + entry_size > self._capacity:
+                self._grow(start + entry_size)
+            _KEY_LENGTH.pack_into(self._map, start, len(encoded))
+            self._map[start + _KEY_LENGTH.size:start + _KEY_LENGTH.size + len(encoded)] = encoded
+            position = start + _KEY_LENGTH.size + len(encoded) + padding
+            _VALUE.pack_into(self._map, position, 0.0)
+            self._used = start + entry_size
+            self._positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        position = self._position(key)
+        _VALUE.pack_into(self._map, position, _VALUE.unpack_from(self._map, position)[0] + amount)
+
+    def set(self, key, value):
+        _VALUE.pack_into(self._map, self._position(key), value)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _key(name, labels, suffix=''):
+    return json.dumps([name, labels, suffix], separators=(',', ':'), sort_keys=True)
+
+
+def _stored_items(path):
+    """The entries of the store file at ``path``; none if it cannot be read."""
+    try:
+        store = MmapedValues(path, read_only=True)
+    except (OSError, ValueError):
+        return []
+    try:
+        return store.items()
+    finally:
+        store.close()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self._keys = {}
+
+    def _label_key(self, labels, suffix=''):
+        cache_key = (tuple(sorted(labels.items())), suffix)
+        key = self._keys.get(cache_key)
+        if key is None:
+            key = self._keys[cache_key] = _key(self.name, labels, suffix)
+        return key
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.kind, self._label_key(labels), amount)
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.registry.set(self.kind, self._label_key(labels), value)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation)
+        self.buckets = tuple(buckets)
+        self._suffixes = tuple('bucket:' + repr(bound) for bound in self.buckets) + ('bucket:+Inf',)
+
+    def _histogram_keys(self, labels):
+        cache_key = tuple(sorted(labels.items()))
+        keys = self._keys.get(cache_key)
+        if keys is None:
+            keys = self._keys[cache_key] = (
+                tuple(_key(self.name, labels, suffix) for suffix in self._suffixes),
+                _key(self.name, labels, 'sum'),
+                _key(self.name, labels, 'count'),
+            )
+        return keys
+
+    def observe(self, value, **labels):
+        bucket_keys, sum_key, count_key = self._histogram_keys(labels)
+        self.registry.add_many('counter', (
+            (bucket_keys[bisect_left(self.buckets, value)], 1),
+            (sum_key, value),
+            (count_key, 1),
+        ))
+
+
+class MetricsRegistry:
+    """
+    Metric definitions plus the storage for this process. ``directory=None``
+    keeps values in memory (a single process, or tests).
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.metrics = {}
+        self._files = {}
+        self._memory = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation):
+        return self._register(Counter(self, name, documentation))
+
+    def gauge(self, name, documentation):
+        return self._register(Gauge(self, name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, buckets))
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _store(self, kind):
+        if self.directory is None:
+            return self._memory.setdefault(kind, {})
+        pid = os.getpid()
+        if pid != self._pid:
+            # Forked: the parent's files belong to the parent
+            self._files = {}
+            self._pid = pid
+        store = self._files.get(kind)
+        if store is None:
+            os.makedirs(self.directory, exist_ok=True)
+            store = self._files[kind] = MmapedValues(os.path.join(self.directory, f'{kind}_{pid}.db'))
+        return store
+
+    def add(self, kind, key, amount):
+        self.add_many(kind, ((key, amount),))
+
+    def add_many(self, kind, items):
+        with self._lock:
+            store = self._store(kind)
+            if isinstance(store, dict):
+                for key, amount in items:
+                    store[key] = store.get(key, 0.0) + amount
+            else:
+                for key, amount in items:
+                    store.add(key, amount)
+
+    def set(self, kind, key, value):
+        with self._lock:
+            store = self._store(kind)
+            if isinstance(store, dict):
+                store[key] = value
+            else:
+                store.set(key, value)
+
+    def _files_on_disk(self):
+        """``(path, kind, pid)`` for every store file in the directory."""
+        for path in glob.glob(os.path.join(self.directory, '*.db')):
+            kind, _, pid = os.path.basename(path)[:-3].partition('_')
+            yield path, kind, pid
+
+    def compact(self):
+        """
+        Fold the files of processes that have exited into ``<kind>_aggregate.db``
+        and delete their gauge files. Runs under a file lock, so workers starting
+        together never fold the same file twice.
+        """
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'compact.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            aggregates = {}
+            try:
+                for path, kind, pid in self._files_on_disk():
+                    if not pid.isdigit() or _pid_alive(int(pid)):
+                        continue
+                    if kind != 'gauge':
+                        aggregate = aggregates.get(kind)
+                        if aggregate is None:
+                            aggregate = aggregates[kind] = MmapedValues(
+                                os.path.join(self.directory, f'{kind}_{AGGREGATE}.db'))
+                        for key, value in _stored_items(path):
+                            aggregate.add(key, value)
+                    os.remove(path)
+            finally:
+                for aggregate in aggregates.values():
+                    aggregate.close()
+
+    def _read(self):
+        """Sum every process's values: ``{(name, labels_json, suffix): value}``."""
+        totals = {}
+
+        def fold(items):
+            for key, value in items:
+                name, labels, suffix = json.loads(key)
+                total_key = (name, json.dumps(labels, sort_keys=True), suffix)
+                totals[total_key] = totals.get(total_key, 0.0) + value
+
+        if self.directory is None:
+            with self._lock:
+                for store in self._memory.values():
+                    fold(list(store.items()))
+            return totals
+
+        for path, kind, pid in self._files_on_disk():
+            if kind == 'gauge' and pid.isdigit() and not _pid_alive(int(pid)):
+                continue
+            fold(_stored_items(path))
+        return totals
+
+    def collect(self):
+        """
+        Yield ``(metric, samples)`` where samples is ``{labels_json: value}``
+        for counters and gauges, and ``{labels_json: {'buckets': {bound:
+        cumulative}, 'sum': s, 'count': n}}`` for histograms.
+        """
+        grouped = {}
+        for (name, labels, suffix), value in self._read().items():
+            grouped.setdefault(name, {}).setdefault(labels, {})[suffix] = value
+
+        for name, metric in sorted(self.metrics.items()):
+            samples = {}
+            for labels, values in grouped.get(name, {}).items():
+                if metric.kind != 'histogram':
+                    samples[labels] = values.get('', 0.0)
+                    continue
+                cumulative, buckets = 0.0, {}
+                for bound in metric.buckets:
+                    cumulative += values.get('bucket:' + repr(bound), 0.0)
+                    buckets[bound] = cumulative
+                buckets[math.inf] = cumulative + values.get('bucket:+Inf', 0.0)
+                samples[labels] = {'buckets': buckets, 'sum': values.get('sum', 0.0),
+                                   'count': values.get('count', 0.0)}
+            yield metric, samples
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric, samples in self.collect():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for labels_json, value in sorted(samples.items()):
+                labels = json.loads(labels_json)
+                if metric.kind != 'histogram':
+                    lines.append(f'{metric.name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                for bound, count in value['buckets'].items():
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{metric.name}_bucket{_format_labels(dict(labels, le=le))} {_format_value(count)}')
+                lines.append(f'{metric.name}_sum{_format_labels(labels)} {_format_value(value["sum"])}')
+                lines.append(f'{metric.name}_count{_format_labels(labels)} {_format_value(value["count"])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if math.isfinite(value) and value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def histogram_quantile(quantile, buckets):
+    """Estimate a quantile from cumulative ``{bound: count}`` buckets, like PromQL."""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if not total:
+        return None
+    rank = quantile * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == math.inf:
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def registry_directory(metrics_settings):
+    """``METRICS['DIRECTORY']``, or None for in-memory values in a single process."""
+    directory = metrics_settings.get('DIRECTORY') or None
+    if directory is None and metrics_settings.get('WORKERS', 1) > 1:
+        raise ImproperlyConfigured(
+            "METRICS['DIRECTORY'] (METRICS_DIR) must be set to a directory shared by all "
+            "worker processes when METRICS['WORKERS'] is above 1"
+        )
+    return directory
+
+
+registry = MetricsRegistry(directory=registry_directory(_metrics_settings))
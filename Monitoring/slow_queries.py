@@ -0,0 +1,189 @@
+"""
+Slow-query log for GraphQL operations.
+
+While ``SLOW_QUERY_LOG['ENABLED']`` is on, every GraphQL operation runs with a
+``SlowQueryWatcher`` execute wrapper next to the SQL recorder
+(``Monitoring.sql``). Statements faster than ``THRESHOLD_MS`` cost two
+``perf_counter`` calls. For a slower one the watcher notes the operationName
+and the resolver path. The path is found by walking the stack for the nearest
+``GraphQLResolveInfo``, so nothing is tracked for fast statements.
+
+It then hands the statement to a single background writer thread. The writer
+fingerprints the statement, captures the plan of SELECTs on its own
+connection, and stores a ``SlowQuery`` row. Postgres uses ``EXPLAIN (ANALYZE
+off)`` and SQLite ``EXPLAIN QUERY PLAN``. The table is trimmed to
+``MAX_ROWS``.
+
+Nothing is written on the request thread, so a slow request does not get
+slower, and rows survive even if a mutation's transaction rolls back. When the
+writer falls behind by ``MAX_PENDING`` statements, new ones are dropped.
+
+Settings: ``SLOW_QUERY_LOG``.
+"""
+import hashlib
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from graphql import GraphQLResolveInfo
+
+from .sql import fingerprint
+
+logger = logging.getLogger(__name__)
+
+_slow_settings = getattr(settings, 'SLOW_QUERY_LOG', {})
+ENABLED = _slow_settings.get('ENABLED', False)
+THRESHOLD_MS = _slow_settings.get('THRESHOLD_MS', 200)
+EXPLAIN = _slow_settings.get('EXPLAIN', True)
+MAX_ROWS = _slow_settings.get('MAX_ROWS', 1000)
+MAX_PENDING = _slow_settings.get('MAX_PENDING', 100)
+
+TRIM_EVERY = 50
+MAX_SQL_LENGTH = 20000
+
+
+def resolver_path():
+    """The path of the innermost GraphQL field on the current stack, if any."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        info = frame.f_locals.get('info')
+        if isinstance(info, GraphQLResolveInfo):
+            return '.'.join(str(key) for key in info.path.as_list())
+        frame = frame.f_back
+    return ''
+
+
+def _explain_sql(vendor, sql):
+    if vendor == 'postgresql':
+        return 'EXPLAIN (ANALYZE off) ' + sql
+    if vendor == 'sqlite':
+        return 'EXPLAIN QUERY PLAN ' + sql
+    return None
+
+
+def explain(alias, sql, params):
+    """The plan for a SELECT, or '' when it cannot be explained."""
+    if not sql.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+        return ''
+    connection = connections[alias]
+    explain_sql = _explain_sql(connection.vendor, sql)
+    if explain_sql is None:
+        return ''
+    with connection.cursor() as cursor:
+        cursor.execute(explain_sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(str(row[0]) for row in rows)
+
+
+class SlowQueryWriter:
+    def __init__(self, max_pending=MAX_PENDING, max_rows=MAX_ROWS, explain_plans=EXPLAIN):
+        self.max_rows = max_rows
+        self.explain_plans = explain_plans
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._pid = None
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Started lazily so forked gunicorn workers each get their own thread
+        if self._thread is None or self._pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name='slow-query-writer', daemon=True)
+                    self._thread.start()
+
+    def submit(self, entry):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                self.write(entry)
+            except Exception:
+                logger.exception('Could not record slow query')
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def write(self, entry):
+        from .models import SlowQuery
+
+        plan = ''
+        if self.explain_plans and not entry['many']:
+            try:
+                plan = explain(entry['database'], entry['sql'], entry['params'])
+            except Exception as e:
+                plan = f'EXPLAIN failed: {e}'
+        key = fingerprint(entry['sql'])
+        SlowQuery.objects.using(entry['database']).create(
+            fingerprint=key,
+            fingerprint_hash=hashlib.sha256(key.encode('utf-8')).hexdigest(),
+            sql=entry['sql'][:MAX_SQL_LENGTH],
+            duration_ms=entry['duration_ms'],
+            operation_name=entry['operation'][:200],
+            resolver_path=entry['path'][:500],
+            database=entry['database'],
+            plan=plan,
+        )
+        self._written += 1
+        if self._written % TRIM_EVERY == 0:
+            self.trim(entry['database'])
+
+    def trim(self, database='default'):
+        from .models import SlowQuery
+
+        rows = SlowQuery.objects.using(database)
+        cutoff = list(rows.order_by('-id').values_list('id', flat=True)[self.max_rows:self.max_rows + 1])
+        if cutoff:
+            rows.filter(id__lte=cutoff[0]).delete()
+
+    def flush(self, timeout=5):
+        """Wait until queued statements are written (tests, benchmarks)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+slow_query_writer = SlowQueryWriter()
+
+
+class SlowQueryWatcher:
+    """Execute wrapper that hands statements over the threshold to the writer."""
+
+    def __init__(self, operation, threshold_ms=THRESHOLD_MS, writer=slow_query_writer):
+        self.operation = operation
+        self.threshold = threshold_ms / 1000
+        self.writer = writer
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self.writer.submit({
+                    'sql': sql,
+                    'params': params,
+                    'many': many,
+                    'duration_ms': elapsed * 1000,
+                    'operation': self.operation,
+                    'path': resolver_path(),
+                    'database': context['connection'].alias,
+                })
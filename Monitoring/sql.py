@@ -0,0 +1,216 @@
+"""
+Per-operation SQL instrumentation for the GraphQL endpoint.
+
+``record_operation`` installs a ``QueryRecorder`` with
+``connection.execute_wrapper`` while one GraphQL operation executes, along
+with the slow-query watcher when ``SLOW_QUERY_LOG`` is on
+(``Monitoring.slow_queries``). Root fields that run on worker threads install
+the same wrappers on their own connection through ``recording(request)``. The recorder counts statements and
+DB time and groups them by fingerprint: the SQL with literals and placeholders
+replaced by ``?`` and ``IN`` lists collapsed. A fingerprint repeated at least
+``N_PLUS_ONE_THRESHOLD`` times in one operation is reported as a likely N+1.
+
+Every recorded operation is folded into ``operation_stats`` and N+1 findings
+are logged. Staff users who send the ``DEBUG_HEADER`` also get the numbers in
+the response's ``extensions.sql``.
+
+Settings: ``SQL_INSTRUMENTATION``.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_sql_settings = getattr(settings, 'SQL_INSTRUMENTATION', {})
+ENABLED = _sql_settings.get('ENABLED', True)
+SAMPLE_RATE = _sql_settings.get('SAMPLE_RATE', 1.0)
+N_PLUS_ONE_THRESHOLD = _sql_settings.get('N_PLUS_ONE_THRESHOLD', 10)
+DEBUG_HEADER = _sql_settings.get('DEBUG_HEADER', 'X-Debug-SQL')
+MAX_OPERATIONS = _sql_settings.get('MAX_OPERATIONS', 200)
+
+WRAPPERS_ATTR = '_sql_wrappers'
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Normalize ``sql`` so statements that differ only in values compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def operation_label(operation_ast):
+    """The operation's name, or its root field names for anonymous operations."""
+    if operation_ast is None:
+        return '(unknown)'
+    if operation_ast.name is not None:
+        return operation_ast.name.value
+    fields = sorted(
+        selection.name.value
+        for selection in operation_ast.selection_set.selections
+        if getattr(selection, 'name', None) is not None
+    )
+    return '{%s}' % ','.join(fields)[:100]
+
+
+class QueryRecorder:
+    def __init__(self, operation, threshold=N_PLUS_ONE_THRESHOLD):
+        self.operation = operation
+        self.threshold = threshold
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_time = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            key = fingerprint(sql)
+            with self._lock:
+                self.count += 1
+                self.duration += elapsed
+                self.fingerprints[key] += 1
+                self.fingerprint_time[key] += elapsed
+
+    def n_plus_one(self):
+        """``(fingerprint, count)`` pairs repeated at least ``threshold`` times."""
+        return [(key, count) for key, count in self.fingerprints.most_common() if count >= self.threshold]
+
+    def as_extension(self, top=10):
+        return {
+            'operation': self.operation,
+            'queries': self.count,
+            'dbTimeMs': round(self.duration * 1000, 3),
+            'nPlusOne': [
+                {'fingerprint': key, 'count': count, 'timeMs': round(self.fingerprint_time[key] * 1000, 3)}
+                for key, count in self.n_plus_one()
+            ],
+            'fingerprints': [
+                {'fingerprint': key, 'count': count, 'timeMs': round(self.fingerprint_time[key] * 1000, 3)}
+                for key, count in self.fingerprints.most_common(top)
+            ],
+        }
+
+
+class OperationSqlStats:
+    """Per-process totals of recorded operations, keyed by operation label."""
+
+    def __init__(self, max_operations=MAX_OPERATIONS):
+        self.max_operations = max_operations
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def add(self, recorder):
+        n_plus_one = recorder.n_plus_one()
+        with self._lock:
+            name = recorder.operation
+            if name not in self._operations and len(self._operations) >= self.max_operations:
+                name = '(other)'
+            stats = self._operations.get(name)
+            if stats is None:
+                stats = self._operations[name] = {
+                    'calls': 0, 'queries': 0, 'max_queries': 0, 'db_time': 0.0,
+                    'n_plus_one_calls': 0, 'n_plus_one': Counter(),
+                }
+            stats['calls'] += 1
+            stats['queries'] += recorder.count
+            stats['max_queries'] = max(stats['max_queries'], recorder.count)
+            stats['db_time'] += recorder.duration
+            if n_plus_one:
+                stats['n_plus_one_calls'] += 1
+                for key, _ in n_plus_one:
+                    stats['n_plus_one'][key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(stats, n_plus_one=dict(stats['n_plus_one'].most_common(5)))
+                for name, stats in self._operations.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._operations.clear()
+
+
+operation_stats = OperationSqlStats()
+
+
+def _debug_requested(request):
+    if not request.headers.get(DEBUG_HEADER):
+        return False
+    user = getattr(request, 'user', None)
+    return bool(getattr(user, 'is_staff', False) or getattr(user, 'is_superuser', False))
+
+
+@contextmanager
+def recording(request):
+    """Install ``request``'s operation wrappers, if any, on this thread's connection."""
+    wrappers = getattr(request, WRAPPERS_ATTR, None)
+    if not wrappers:
+        yield
+        return
+    with ExitStack() as stack:
+        for wrapper in wrappers:
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+@contextmanager
+def record_operation(request, operation_ast, install=True):
+    """
+    Record the SQL run while the block executes ``operation_ast`` for ``request``.
+    Yields the recorder, or None when this operation is not sampled.
+
+    Pass ``install=False`` when no SQL runs on the calling thread (the async
+    view's event loop); worker threads install the wrappers with ``recording``.
+    """
+    from .slow_queries import ENABLED as SLOW_QUERY_LOG_ENABLED, SlowQueryWatcher
+
+    label = operation_label(operation_ast)
+    debug = _debug_requested(request)
+    recorder = None
+    if debug or (ENABLED and (SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE)):
+        recorder = QueryRecorder(label)
+    wrappers = [recorder] if recorder is not None else []
+    if SLOW_QUERY_LOG_ENABLED:
+        wrappers.append(SlowQueryWatcher(label))
+    if not wrappers:
+        yield None
+        return
+
+    setattr(request, WRAPPERS_ATTR, wrappers)
+    try:
+        with recording(request) if install else nullcontext():
+            yield recorder
+    finally:
+        setattr(request, WRAPPERS_ATTR, None)
+        if recorder is not None:
+            operation_stats.add(recorder)
+            for key, count in recorder.n_plus_one():
+                logger.warning('Likely N+1 in %s: %d x %s', recorder.operation, count, key,
+                               extra={'operation': recorder.operation, 'sql_count': count})
+            if debug:
+                extensions = request.__dict__.setdefault('_graphql_extensions', {})
+                extensions['sql'] = recorder.as_extension()
@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from UserAuthentication.identity import local_identities
+from UserAuthentication.models import Member, Street
+from UserAuthentication.tokens import issue_access_token, token_cache
+from . import tracing
+from .slow_queries import SlowQueryWatcher, SlowQueryWriter
+from .models import SlowQuery
+from .registry import MetricsRegistry, MmapedValues, registry_directory
+
+
+def graphql(client, query, **headers):
+    response = client.post('/graphql/', json.dumps({'query': query}), content_type='application/json', **headers)
+    return response.json()
+
+
+class ResolverTracingTests(TestCase):
+    def setUp(self):
+        Street.objects.create(name='Main Street')
+        self.registry = MetricsRegistry()
+        self.histogram = self.registry.histogram('graphql_resolver_duration_seconds', 'test')
+        for name, value in (('SAMPLE_RATE', 1.0), ('resolver_duration', self.histogram)):
+            patcher = mock.patch.object(tracing, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def traced_fields(self):
+        samples = dict(self.registry.collect())[self.histogram]
+        return {json.loads(labels)['field']: value['count'] for labels, value in samples.items()}
+
+    def test_sampled_request_times_custom_resolvers_only(self):
+        data = graphql(self.client, '{ __typename streets { name } }')
+        self.assertEqual(data['data'], {'__typename': 'RootQuery', 'streets': [{'name': 'Main Street'}]})
+        self.assertEqual(self.traced_fields(), {'RootQuery.streets': 1.0})
+
+    def test_unsampled_request_records_nothing(self):
+        with mock.patch.object(tracing, 'SAMPLE_RATE', 0.0):
+            graphql(self.client, '{ streets { id name } }')
+        self.assertEqual(self.traced_fields(), {})
+
+
+class SqlDebugHeaderTests(TestCase):
+    QUERY = '{ streets { name } }'
+
+    def setUp(self):
+        token_cache.clear()
+        local_identities.clear()
+        Street.objects.create(name='Main Street')
+
+    def request_sql(self, **member_fields):
+        member = Member.objects.create_user(email=f'{len(member_fields)}@example.com', full_name='Member',
+                                            **member_fields)
+        token = issue_access_token(member)
+        return graphql(self.client, self.QUERY, HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_X_DEBUG_SQL='1')
+
+    @override_settings(DEBUG=True)
+    def test_members_never_get_sql(self):
+        data = self.request_sql()
+        self.assertEqual(data['data'], {'streets': [{'name': 'Main Street'}]})
+        self.assertNotIn('extensions', data)
+
+    def test_staff_get_sql(self):
+        data = self.request_sql(is_staff=True)
+        self.assertGreaterEqual(data['extensions']['sql']['queries'], 1)
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class RegistryCompactionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='metrics-test-')
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.registry = MetricsRegistry(directory=self.directory)
+        self.counter = self.registry.counter('jobs_total', 'test')
+        self.gauge = self.registry.gauge('queue_depth', 'test')
+
+    def write_exited_worker(self, jobs):
+        pid = exited_pid()
+        for kind, metric, value in (('counter', self.counter, jobs), ('gauge', self.gauge, 7)):
+            store = MmapedValues(os.path.join(self.directory, f'{kind}_{pid}.db'))
+            store.add(metric._label_key({}), value)
+            store.close()
+
+    def totals(self):
+        return {metric.name: samples for metric, samples in self.registry.collect()}
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        self.counter.inc(1)
+        self.gauge.set(2)
+        self.write_exited_worker(jobs=3)
+        self.write_exited_worker(jobs=5)
+        before = self.totals()
+        self.registry.compact()
+        self.registry.compact()
+        self.assertEqual(self.totals(), before)
+        self.assertEqual(before['jobs_total'], {'{}': 9.0})
+        self.assertEqual(before['queue_depth'], {'{}': 2.0})
+        self.assertEqual(sorted(name for name in os.listdir(self.directory) if name.endswith('.db')),
+                         sorted(['counter_aggregate.db', f'counter_{os.getpid()}.db', f'gauge_{os.getpid()}.db']))
+
+    def test_directory_is_required_with_several_workers(self):
+        self.assertIsNone(registry_directory({'DIRECTORY': '', 'WORKERS': 1}))
+        self.assertEqual(registry_directory({'DIRECTORY': '/srv/metrics', 'WORKERS': 4}), '/srv/metrics')
+        with self.assertRaises(ImproperlyConfigured):
+            registry_directory({'DIRECTORY': '', 'WORKERS': 4})
+
+
+@override_settings(METRICS={'TOKEN': 'scrape-secret'})
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        local_identities.clear()
+
+    def scrape(self, bearer=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {bearer}'} if bearer else {}
+        return self.client.get('/metrics/', **headers)
+
+    def member_token(self, **fields):
+        return issue_access_token(Member.objects.create_user(email=f'{len(fields)}@example.com',
+                                                             full_name='Member', **fields))
+
+    def test_scrape_token_or_staff_is_required(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape('wrong-secret').status_code, 403)
+        self.assertEqual(self.scrape(self.member_token()).status_code, 403)
+        response = self.scrape('scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE http_requests_total counter', response.content)
+        self.assertEqual(self.scrape(self.member_token(is_staff=True)).status_code, 200)
+
+
+class SlowQueryLogTests(TestCase):
+    def capture(self, threshold_ms):
+        entries = []
+        watcher = SlowQueryWatcher('StreetList', threshold_ms=threshold_ms, writer=mock.Mock(submit=entries.append))
+        with connection.execute_wrapper(watcher):
+            list(Street.objects.filter(name='Main Street'))
+        return entries
+
+    def test_only_statements_over_the_threshold_are_submitted(self):
+        self.assertEqual(self.capture(threshold_ms=60_000), [])
+        [entry] = self.capture(threshold_ms=0)
+        self.assertEqual((entry['operation'], entry['database']), ('StreetList', 'default'))
+        self.assertIn('SELECT', entry['sql'])
+
+    def test_writer_stores_fingerprint_and_plan_and_trims(self):
+        [entry] = self.capture(threshold_ms=0)
+        writer = SlowQueryWriter(max_rows=2)
+        for _ in range(3):
+            writer.write(entry)
+        writer.trim()
+        rows = list(SlowQuery.objects.all())
+        self.assertEqual(len(rows), 2)
+        self.assertIn('= ?', rows[0].fingerprint)
+        self.assertTrue(rows[0].plan)
+        self.assertEqual(rows[0].operation_name, 'StreetList')
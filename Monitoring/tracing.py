@@ -0,0 +1,87 @@
+"""
+Resolver tracing for the GraphQL schema.
+
+``ResolverTracingMiddleware`` is a Graphene field middleware. It times
+resolvers and records the latency in the ``graphql_resolver_duration_seconds``
+histogram, labelled by ``ParentType.field``. The histogram lives in the shared
+registry (``Monitoring.registry``), so every gunicorn worker feeds the same
+numbers. They can be read through the staff-only ``resolverLatency`` query and
+the ``/metrics/`` endpoint.
+
+Tracing is decided once per request (``TRACING['SAMPLE_RATE']``). For a
+request that is not sampled the middleware costs one dict lookup per field.
+Scalar fields that use the default attribute resolver are never timed: there
+are many of them and they only read an attribute.
+
+The time recorded is the resolver's own run time. A resolver that returns a
+``LoaderFuture`` is timed up to the point it queued its key; the batched query
+runs after the level is resolved and is not charged to any field.
+
+Settings: ``TRACING``.
+"""
+import random
+import time
+
+from django.conf import settings
+from graphene.utils.str_converters import to_snake_case
+from graphql import get_named_type, is_leaf_type
+
+from .registry import registry
+
+_tracing_settings = getattr(settings, 'TRACING', {})
+ENABLED = _tracing_settings.get('ENABLED', True)
+SAMPLE_RATE = _tracing_settings.get('SAMPLE_RATE', 0.1)
+
+TRACE_ATTR = '_trace_resolvers'
+
+RESOLVER_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+resolver_duration = registry.histogram(
+    'graphql_resolver_duration_seconds',
+    'Time spent in GraphQL resolvers, by ParentType.field',
+    buckets=RESOLVER_BUCKETS,
+)
+
+_traced_fields = {}
+
+
+def _is_traced_field(info):
+    key = (info.parent_type.name, info.field_name)
+    traced = _traced_fields.get(key)
+    if traced is None:
+        field = info.parent_type.fields.get(info.field_name)
+        if field is None:
+            # Meta fields (__typename) are not in the type's fields and never slow
+            _traced_fields[key] = False
+            return False
+        graphene_type = getattr(info.parent_type, 'graphene_type', None)
+        custom = graphene_type is not None and hasattr(graphene_type, f'resolve_{to_snake_case(info.field_name)}')
+        traced = _traced_fields[key] = (
+            custom
+            or info.parent_type is info.schema.query_type
+            or info.parent_type is info.schema.mutation_type
+            or not is_leaf_type(get_named_type(field.type))
+        )
+    return traced
+
+
+def is_sampled(request):
+    """Whether resolvers are traced for ``request``, decided on first use."""
+    traced = request.__dict__.get(TRACE_ATTR)
+    if traced is None:
+        traced = request.__dict__[TRACE_ATTR] = ENABLED and random.random() < SAMPLE_RATE
+    return traced
+
+
+class ResolverTracingMiddleware:
+    def resolve(self, next, root, info, **kwargs):
+        if not is_sampled(info.context) or not _is_traced_field(info):
+            return next(root, info, **kwargs)
+        start = time.perf_counter()
+        try:
+            return next(root, info, **kwargs)
+        finally:
+            resolver_duration.observe(
+                time.perf_counter() - start,
+                field=f'{info.parent_type.name}.{info.field_name}',
+            )
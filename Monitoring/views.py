@@ -0,0 +1,32 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from churchMember.User_Auth_middleware import authenticate_request
+from .metrics import process_collector
+from .registry import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _scrape_allowed(request):
+    token = getattr(settings, 'METRICS', {}).get('TOKEN')
+    auth_header = request.headers.get('Authorization', '')
+    if token and auth_header.startswith('Bearer ') and hmac.compare_digest(auth_header[7:], token):
+        return True
+    user = authenticate_request(request)
+    return user.is_authenticated and (user.is_staff or user.is_superuser)
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus text exposition of ``Monitoring.registry``. Scrapers send
+    ``METRICS['TOKEN']`` as a Bearer token; staff can use their own JWT.
+    """
+    if not _scrape_allowed(request):
+        return HttpResponseForbidden('Metrics require the scrape token or a staff account')
+    process_collector.sync(force=True)
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -217,12 +217,12 @@ class CreateDevotional(graphene.Mutation):
 
     def mutate(self, info, input):
         user = info.context.user
-        logger.info(f"Attempting to create devotional with input: {input}")
+        logger.debug("Attempting to create devotional: %s", input.title)
         if not user.is_authenticated:
             logger.error("User is not authenticated")
             raise Exception("User must be authenticated")
         if user.role != 'PASTOR':
-            logger.error(f"User role {user.role} is not PASTOR")
+            logger.error("User role %s is not PASTOR", user.role)
             raise Exception("Only pastors can create devotionals")
 
         try:
@@ -237,7 +237,7 @@ class CreateDevotional(graphene.Mutation):
                 video_url=input.video_url or ""
             )
             devotional.save()
-            logger.info(f"Devotional saved successfully: {devotional.id}")
+            logger.info("Devotional saved successfully: %s", devotional.id)
 
             return CreateDevotional(
                 devotional=Devotional(
@@ -253,7 +253,7 @@ class CreateDevotional(graphene.Mutation):
                 )
             )
         except Exception as e:
-            logger.error(f"Error saving devotional: {str(e)}")
+            logger.error("Error saving devotional: %s", e)
             raise Exception(f"Failed to save devotional: {str(e)}")
 
 class UpdateDevotional(graphene.Mutation):
@@ -3,6 +3,9 @@ from graphene_django.types import DjangoObjectType
 from graphene import ObjectType, String, Int, Float, Date, Time, List, Field, Boolean
 from churchMember.models import Announcement
 from UserAuthentication.models import Member, Group  # Assuming these models exist
+from SmartChurch.dataloader import load_related, maybe_then
+from SmartChurch.optimizer import resolver_hints
+from churchMember.loaders import prayer_replies, devotional_amen_count
 
 class DashboardStats(ObjectType):
     total_members = Int()
@@ -46,6 +49,22 @@ class PrayerRequest(ObjectType):
     status = String()
     replies = List(PrayerReply)
 
+    def resolve_replies(self, info):
+        if self.replies is not None:
+            return self.replies
+        return prayer_replies(info, int(self.id)).then(lambda replies: [
+            PrayerReply(
+                responder=rep.responder.full_name if rep.responder else 'Pastoral Team',
+                message=rep.message,
+                date=rep.created_at.strftime("%Y-%m-%d")
+            )
+            for rep in replies
+        ])
+
+class PrayerRequestConnection(graphene.relay.Connection):
+    class Meta:
+        node = PrayerRequest
+
 class OfferingStats(ObjectType):
     this_week = Float()
     last_week = Float()
@@ -68,6 +87,11 @@ class Devotional(ObjectType):
     video_url = String()
     amen_count = Int()
 
+    def resolve_amen_count(self, info):
+        if self.amen_count is not None:
+            return self.amen_count
+        return devotional_amen_count(info, int(self.id))
+
 
 class DevotionalInteraction(ObjectType):
     bookmarked = Boolean()
@@ -82,11 +106,25 @@ class AnnouncementType(DjangoObjectType):
     created_by_full_name = String()
     target_group_name = String()
 
+    def resolve_created_by(self, info):
+        return load_related(info, self, 'created_by')
+
+    def resolve_target_group(self, info):
+        return load_related(info, self, 'target_group')
+
+    @resolver_hints(select_related=('created_by',), only=('created_by__full_name',))
     def resolve_created_by_full_name(self, info):
-        return self.created_by.full_name if self.created_by else 'Church Office'
+        return maybe_then(load_related(info, self, 'created_by'),
+                          lambda member: member.full_name if member else 'Church Office')
 
+    @resolver_hints(select_related=('target_group',), only=('target_group__name',))
     def resolve_target_group_name(self, info):
-        return self.target_group.name if self.target_group else None
+        return maybe_then(load_related(info, self, 'target_group'),
+                          lambda group: group.name if group else None)
+
+class AnnouncementConnection(graphene.relay.Connection):
+    class Meta:
+        node = AnnouncementType
 
 class AnnouncementResponse(ObjectType):
     success = Boolean()
@@ -1,15 +1,13 @@
 import graphene
 from graphene import ObjectType, Field, List, Int
 from django.utils import timezone
-from asgiref.sync import sync_to_async
 from datetime import timedelta
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Q
 from .outputs import (
     DashboardStats,
     Member,
     Event,
     PrayerRequest,
-    PrayerReply as PrayerReplyType,
     OfferingStats,
     Devotional,
     DevotionalAuthor,
@@ -19,24 +17,60 @@ from .outputs import (
     MassTypeStat,
     OfferingTypeStat,
     StreetStat,
+    PrayerRequestConnection,
+    AnnouncementConnection,
 )
 from graphql import GraphQLError
-from churchMember.models import Member as MemberModel, Group, PrayerRequest as PrayerRequestModel, Offering, Event as EventModel, DailyDevotional, Announcement, DevotionalInteraction, PrayerReply
+from churchMember.models import Member as MemberModel, Group, PrayerRequest as PrayerRequestModel, Offering, DailyOfferingRollup, Event as EventModel, DailyDevotional, Announcement, DevotionalInteraction
+from ChurchSecreatary import periods
+from SmartChurch.optimizer import optimize, selected_fields
+from SmartChurch.pagination import Keyset, connection_field, connection_from_queryset
 import logging
 from datetime import datetime
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+PRAYER_REQUESTS = Keyset(PrayerRequestModel, '-created_at', '-id')
+ANNOUNCEMENTS = Keyset(Announcement, '-created_at', '-id')
+
+
+def _prayer_request_node(prayer):
+    return PrayerRequest(
+        id=str(prayer.id),
+        member=prayer.member.full_name,
+        request=prayer.request,
+        date=prayer.created_at.strftime("%Y-%m-%d"),
+        status=prayer.status,
+    )
+
+
+def _report_date(value):
+    """The ISO date ``value`` of a report bound, or None if it is missing or unparseable."""
+    if value:
+        try:
+            return datetime.fromisoformat(value).date()
+        except Exception:
+            pass
+    return None
+
+
+def _offering_totals(group_by, start=None, end=None):
+    """``[(group values..., amount)]`` largest first, closed months read from their snapshots."""
+    totals = periods.offering_totals(group_by, _report_date(start), _report_date(end))
+    return sorted((key + (amount,) for key, amount in totals.items()), key=lambda row: row[-1], reverse=True)
+
+
 class PastorQuery(ObjectType):
     dashboard_stats = Field(DashboardStats)
     recent_members = List(Member)
     upcoming_events = List(Event)
-    prayer_requests = List(PrayerRequest)
+    prayer_requests = List(PrayerRequest, deprecation_reason="Use prayerRequestsConnection")
+    prayer_requests_connection = connection_field(PrayerRequestConnection)
     offering_stats = Field(OfferingStats)
     devotionals = List(Devotional, limit=Int(default_value=10), offset=Int(default_value=0))
     my_devotional_interaction = Field(DevotionalInteractionType, devotional_id=graphene.String(required=True))
-    announcements = List(AnnouncementType)
+    announcements = List(AnnouncementType, deprecation_reason="Use announcementsConnection")
+    announcements_connection = connection_field(AnnouncementConnection)
     recent_offerings = List(OfferingRecord, limit=Int(default_value=10))
     offerings_by_mass = List(MassTypeStat, start=graphene.String(), end=graphene.String())
     offerings_by_type = List(OfferingTypeStat, start=graphene.String(), end=graphene.String())
@@ -46,18 +80,18 @@ class PastorQuery(ObjectType):
         now = timezone.now()
         this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        offerings = DailyOfferingRollup.objects.aggregate(
+            weekly=Sum('amount', filter=Q(date__gte=timezone.localdate(now - timedelta(days=7)))),
+            monthly=Sum('amount', filter=Q(date__gte=timezone.localdate(this_month_start))),
+        )
 
         return DashboardStats(
             total_members=MemberModel.objects.count(),
             active_groups=Group.objects.count(),
             prayer_requests=PrayerRequestModel.objects.count(),
-            total_offerings=Offering.objects.aggregate(total=Sum('amount'))['total'] or 0,
-            weekly_offerings=Offering.objects.filter(
-                date__gte=now - timedelta(days=7)
-            ).aggregate(total=Sum('amount'))['total'] or 0,
-            monthly_offerings=Offering.objects.filter(
-                date__gte=this_month_start
-            ).aggregate(total=Sum('amount'))['total'] or 0,
+            total_offerings=periods.offering_totals()[()],
+            weekly_offerings=offerings['weekly'] or 0,
+            monthly_offerings=offerings['monthly'] or 0,
             new_members_this_month=MemberModel.objects.filter(
                 created_at__gte=this_month_start
             ).count(),
@@ -75,7 +109,7 @@ class PastorQuery(ObjectType):
                 joined_date=member.created_at.strftime("%Y-%m-%d"),
                 profile_photo=member.profile_photo or ""
             )
-            for member in MemberModel.objects.order_by('-created_at')[:5]
+            for member in MemberModel.objects.select_related('street').order_by('-created_at')[:5]
         ]
 
     def resolve_upcoming_events(self, info):
@@ -93,28 +127,15 @@ class PastorQuery(ObjectType):
         ]
 
     def resolve_prayer_requests(self, info):
-        results = []
-        qs = PrayerRequestModel.objects.order_by('-created_at')[:10]
-        for prayer in qs:
-            replies = [
-                PrayerReplyType(
-                    responder=rep.responder.full_name if rep.responder else 'Pastoral Team',
-                    message=rep.message,
-                    date=rep.created_at.strftime("%Y-%m-%d")
-                )
-                for rep in PrayerReply.objects.filter(prayer=prayer).order_by('created_at')
-            ]
-            results.append(
-                PrayerRequest(
-                    id=str(prayer.id),
-                    member=prayer.member.full_name,
-                    request=prayer.request,
-                    date=prayer.created_at.strftime("%Y-%m-%d"),
-                    status=prayer.status,
-                    replies=replies,
-                )
-            )
-        return results
+        # Replies are batched per request by PrayerRequest.resolve_replies
+        qs = PrayerRequestModel.objects.select_related('member').order_by('-created_at')[:10]
+        return [_prayer_request_node(prayer) for prayer in qs]
+
+    def resolve_prayer_requests_connection(self, info, first=None, after=None):
+        return connection_from_queryset(
+            PrayerRequestConnection, PrayerRequestModel.objects.select_related('member'), PRAYER_REQUESTS,
+            first, after, lambda prayers: [_prayer_request_node(prayer) for prayer in prayers],
+        )
 
     def resolve_offering_stats(self, info):
         now = timezone.now()
@@ -124,18 +145,21 @@ class PastorQuery(ObjectType):
         last_month_end = this_month_start - timedelta(days=1)
         last_month_start = last_month_end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-        this_week = Offering.objects.filter(
-            date__gte=this_week_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        last_week = Offering.objects.filter(
-            date__gte=last_week_start, date__lt=this_week_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        this_month = Offering.objects.filter(
-            date__gte=this_month_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        last_month = Offering.objects.filter(
-            date__gte=last_month_start, date__lt=this_month_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        # The rollups are per day: compare local dates, as the DateField lookups did
+        this_week_start, last_week_start = timezone.localdate(this_week_start), timezone.localdate(last_week_start)
+        this_month_start, last_month_start = timezone.localdate(this_month_start), timezone.localdate(last_month_start)
+        totals = DailyOfferingRollup.objects.filter(
+            date__gte=min(last_week_start, last_month_start)
+        ).aggregate(
+            this_week=Sum('amount', filter=Q(date__gte=this_week_start)),
+            last_week=Sum('amount', filter=Q(date__gte=last_week_start, date__lt=this_week_start)),
+            this_month=Sum('amount', filter=Q(date__gte=this_month_start)),
+            last_month=Sum('amount', filter=Q(date__gte=last_month_start, date__lt=this_month_start)),
+        )
+        this_week = totals['this_week'] or 0
+        last_week = totals['last_week'] or 0
+        this_month = totals['this_month'] or 0
+        last_month = totals['last_month'] or 0
 
         trend = 'up' if this_week >= last_week else 'down'
 
@@ -166,86 +190,41 @@ class PastorQuery(ObjectType):
         return records
 
     def resolve_offerings_by_mass(self, info, start=None, end=None):
-        qs = Offering.objects.all()
-        if start:
-            try:
-                start_dt = datetime.fromisoformat(start).date()
-                qs = qs.filter(date__gte=start_dt)
-            except Exception:
-                pass
-        if end:
-            try:
-                end_dt = datetime.fromisoformat(end).date()
-                qs = qs.filter(date__lte=end_dt)
-            except Exception:
-                pass
-        total = qs.aggregate(total=Sum('amount'))['total'] or 0
-        total_f = float(total) if total else 0.0
-        agg = qs.values('mass_type').annotate(amount=Sum('amount')).order_by('-amount')
+        agg = _offering_totals(('mass_type',), start, end)
+        total_f = float(sum(amount for _, amount in agg))
         result = []
-        for row in agg:
-            amt = float(row['amount'] or 0)
+        for mass_type, amount in agg:
+            amt = float(amount)
             perc = ((amt / total_f) * 100) if total_f else 0.0
-            result.append(MassTypeStat(type=row['mass_type'], amount=amt, percentage=perc))
+            result.append(MassTypeStat(type=mass_type, amount=amt, percentage=perc))
         return result
 
     def resolve_offerings_by_type(self, info, start=None, end=None):
-        qs = Offering.objects.all()
-        if start:
-            try:
-                start_dt = datetime.fromisoformat(start).date()
-                qs = qs.filter(date__gte=start_dt)
-            except Exception:
-                pass
-        if end:
-            try:
-                end_dt = datetime.fromisoformat(end).date()
-                qs = qs.filter(date__lte=end_dt)
-            except Exception:
-                pass
-        total = qs.aggregate(total=Sum('amount'))['total'] or 0
-        total_f = float(total) if total else 0.0
-        agg = qs.values('offering_type').annotate(amount=Sum('amount')).order_by('-amount')
+        agg = _offering_totals(('offering_type',), start, end)
+        total_f = float(sum(amount for _, amount in agg))
         result = []
-        for row in agg:
-            amt = float(row['amount'] or 0)
+        for offering_type, amount in agg:
+            amt = float(amount)
             perc = ((amt / total_f) * 100) if total_f else 0.0
-            result.append(OfferingTypeStat(type=row['offering_type'], amount=amt, percentage=perc))
+            result.append(OfferingTypeStat(type=offering_type, amount=amt, percentage=perc))
         return result
 
     def resolve_offerings_by_street(self, info, start=None, end=None):
-        qs = Offering.objects.select_related('street').all()
-        if start:
-            try:
-                start_dt = datetime.fromisoformat(start).date()
-                qs = qs.filter(date__gte=start_dt)
-            except Exception:
-                pass
-        if end:
-            try:
-                end_dt = datetime.fromisoformat(end).date()
-                qs = qs.filter(date__lte=end_dt)
-            except Exception:
-                pass
         # Aggregate totals by street
-        agg = (
-            qs.values('street_id', 'street__name')
-              .annotate(amount=Sum('amount'))
-              .order_by('-amount')
-        )
+        agg = _offering_totals(('street_id', 'street__name'), start, end)
         # Member counts per street (single query)
         from UserAuthentication.models import Member as UMember
-        street_ids = [row['street_id'] for row in agg if row['street_id']]
+        street_ids = [street_id for street_id, _, _ in agg if street_id]
         counts = dict(UMember.objects.filter(street_id__in=street_ids)
                       .values('street_id')
                       .annotate(cnt=Count('id'))
                       .values_list('street_id', 'cnt')) if street_ids else {}
 
         result = []
-        for row in agg:
-            name = row['street__name'] or ''
-            total_amt = float(row['amount'] or 0)
-            member_count = int(counts.get(row['street_id'], 0))
+        for street_id, street_name, amount in agg:
+            name = street_name or ''
+            total_amt = float(amount)
+            member_count = int(counts.get(street_id, 0))
             avg = (total_amt / member_count) if member_count else 0.0
             # Trend placeholder; can be computed vs previous period if needed
             trend = 'up'
@@ -254,14 +233,19 @@ class PastorQuery(ObjectType):
 
     def resolve_devotionals(self, info, limit=10, offset=0):
         results = []
-        qs = DailyDevotional.objects.order_by('-published_at')[offset:offset+limit]
+        # content is the wide column; skip it for list views that only show titles
+        with_content = 'content' in selected_fields(info)
+        qs = DailyDevotional.objects.select_related('author').order_by('-published_at')
+        if not with_content:
+            qs = qs.defer('content')
+        qs = qs[offset:offset+limit]
         for devotional in qs:
-            amen_count = DevotionalInteraction.objects.filter(devotional=devotional, amened=True).count()
+            # amen_count is batched per request by Devotional.resolve_amen_count
             results.append(
                 Devotional(
                     id=str(devotional.id),
                     title=devotional.title,
-                    content=devotional.content,
+                    content=devotional.content if with_content else "",
                     scripture=devotional.scripture or "",
                     published_at=devotional.published_at.strftime("%Y-%m-%d"),
                     author=DevotionalAuthor(
@@ -270,7 +254,6 @@ class PastorQuery(ObjectType):
                     image_url=devotional.image_url or "",
                     audio_url=devotional.audio_url or "",
                     video_url=devotional.video_url or "",
-                    amen_count=amen_count,
                 )
             )
         return results
@@ -292,7 +275,12 @@ class PastorQuery(ObjectType):
     
     def resolve_announcements(self, info):
         # Return all announcements ordered by most recent first
-        return Announcement.objects.all().order_by('-created_at')
+        return optimize(Announcement.objects.all().order_by('-created_at'), info)
+
+    def resolve_announcements_connection(self, info, first=None, after=None):
+        return connection_from_queryset(
+            AnnouncementConnection, optimize(Announcement.objects.all(), info), ANNOUNCEMENTS, first, after,
+        )
         
 
 
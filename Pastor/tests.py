@@ -1,3 +1,39 @@
+import json
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from churchMember.models import Announcement
+from UserAuthentication.models import Group, Member
+
+
+def graphql(client, query, variables=None):
+    response = client.post('/graphql/', json.dumps({'query': query, 'variables': variables or {}}),
+                           content_type='application/json')
+    return response.json()
+
+
+class AnnouncementOptimizerTests(TestCase):
+    def setUp(self):
+        author = Member.objects.create_user(email='pastor@example.com', full_name='Pastor John')
+        choir = Group.objects.create(name='Choir')
+        for number in range(3):
+            Announcement.objects.create(title=f'Notice {number}', content='x' * 500,
+                                        created_by=author, target_group=choir)
+
+    def test_only_selected_columns_are_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = graphql(self.client, '{ announcements { title } }')
+        self.assertEqual(len(data['data']['announcements']), 3)
+        sql = [q['sql'] for q in queries if 'announcement' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('"content"', sql[0])
 
-# Create your tests here.
+    def test_hinted_fields_are_joined_into_one_query(self):
+        query = '{ announcements { title ...names } } fragment names on AnnouncementType { createdByFullName targetGroupName }'
+        with CaptureQueriesContext(connection) as queries:
+            data = graphql(self.client, query)
+        self.assertEqual({(a['createdByFullName'], a['targetGroupName']) for a in data['data']['announcements']},
+                         {('Pastor John', 'Choir')})
+        self.assertEqual(len([q for q in queries if 'announcement' in q['sql']]), 1)
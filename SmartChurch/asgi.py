@@ -3,6 +3,15 @@ ASGI config for SmartChurch project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Procfile's ``web`` process serves the WSGI app with sync gunicorn workers.
+The ASGI app, which serves /graphql/ with the async view, runs as a separate
+process, e.g.
+
+    gunicorn SmartChurch.asgi:application -k uvicorn.workers.UvicornWorker -w 2
+
+Size it against the database: each worker process can hold up to
+``GRAPHQL_ASYNC_ROOT_FIELDS['MAX_WORKERS'] + 1`` connections.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -12,5 +21,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SmartChurch.settings')
+os.environ.setdefault('GRAPHQL_ASYNC', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,64 @@
+"""
+Concurrent root fields for the async GraphQL view.
+
+Every root field of a query runs through ``sync_to_async`` on a dedicated
+thread pool and the results are gathered, so a dashboard that asks for stats,
+events, prayer requests and announcements waits for the slowest of them rather
+than for the sum. Each worker completes its own DataLoader futures
+(``BatchingExecutionContext.resolve_deferred``); loaders are per thread, so
+nothing is shared between the fields.
+
+The pool has ``GRAPHQL_ASYNC_ROOT_FIELDS['MAX_WORKERS']`` threads per process,
+and each thread holds at most one database connection, so the fan-out can never
+open more connections than that no matter how many requests are in flight.
+Fields beyond it wait for a free thread. After each field
+``close_old_connections()`` drops the connection unless ``CONN_MAX_AGE``
+allows it to be kept. Mutations never come through here:
+``AsyncSmartChurchGraphQLView`` runs them on a single thread in order.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from graphql.pyutils import Path, Undefined
+
+from Monitoring.sql import recording
+from SmartChurch.dataloader import BatchingExecutionContext
+from SmartChurch.parallel_execution import RootFieldPool, run_with_connection_cleanup
+
+_async_settings = getattr(settings, 'GRAPHQL_ASYNC_ROOT_FIELDS', {})
+
+async_root_field_pool = RootFieldPool(max_workers=_async_settings.get('MAX_WORKERS', 4))
+
+
+class AsyncBatchingExecutionContext(BatchingExecutionContext):
+    pool = async_root_field_pool
+
+    def execute_fields(self, parent_type, source_value, path, fields):
+        if path is not None or self._eager:
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        async def gather_root_fields():
+            names = list(fields)
+            run_field = sync_to_async(run_with_connection_cleanup, thread_sensitive=False,
+                                      executor=self.pool.executor)
+            results = await asyncio.gather(*(
+                run_field(
+                    self._execute_root_field,
+                    parent_type, source_value, fields[name], Path(None, name, parent_type.name),
+                )
+                for name in names
+            ))
+            data = {}
+            for name, result in zip(names, results):
+                if self.is_awaitable(result):
+                    result = await result
+                if result is not Undefined:
+                    data[name] = result
+            return data
+
+        return gather_root_fields()
+
+    def _execute_root_field(self, parent_type, source_value, field_nodes, field_path):
+        with recording(self.context_value):
+            return self.execute_root_field(parent_type, source_value, field_nodes, field_path)
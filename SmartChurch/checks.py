@@ -0,0 +1,65 @@
+"""
+System checks for state that every worker process must share.
+
+Identity records (``UserAuthentication.identity``) are invalidated through the
+cache when a member changes. With a per-process ``LocMemCache`` only the
+worker that saved the member sees the invalidation, so ``manage.py check``
+and server start-up warn when ``IDENTITY_CACHE['CACHE_ALIAS']`` is
+process-local (``CACHE_URL`` unset). Automatic persisted queries are
+registered in the cache the same way, so the same applies to
+``GRAPHQL_PERSISTED_QUERIES['CACHE_ALIAS']`` in ``apq`` mode, and to the login
+slots of ``LOGIN_HASH_POOL['CACHE_ALIAS']``.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+def process_local_cache(alias):
+    """True when the cache ``alias`` is private to this process."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+@register(Tags.caches)
+def check_identity_cache(app_configs, **kwargs):
+    from UserAuthentication.identity import CACHE_ALIAS, LOCAL_TTL
+
+    if not process_local_cache(CACHE_ALIAS):
+        return []
+    return [Warning(
+        f"IDENTITY_CACHE['CACHE_ALIAS'] ({CACHE_ALIAS!r}) is a process-local LocMemCache.",
+        hint=(f"Set CACHE_URL to a Redis cache shared by all workers. Until then identity records "
+              f"are cached for LOCAL_TTL ({LOCAL_TTL}s) only, so other workers may serve a "
+              f"deactivated member or old roles for that long."),
+        id='SmartChurch.W001',
+    )]
+
+
+@register(Tags.caches)
+def check_persisted_query_cache(app_configs, **kwargs):
+    from SmartChurch.persisted_queries import APQ, persisted_queries
+
+    if persisted_queries.mode != APQ or not process_local_cache(persisted_queries.cache_alias):
+        return []
+    return [Warning(
+        f"GRAPHQL_PERSISTED_QUERIES['CACHE_ALIAS'] ({persisted_queries.cache_alias!r}) is a "
+        f"process-local LocMemCache.",
+        hint=("Set CACHE_URL to a Redis cache shared by all workers. Until then a query registered "
+              "on one worker is unknown to the others, so clients keep getting "
+              "PersistedQueryNotFound and resending the full text."),
+        id='SmartChurch.W002',
+    )]
+
+
+@register(Tags.caches)
+def check_login_slot_cache(app_configs, **kwargs):
+    from UserAuthentication.login_pool import login_slots
+
+    if not process_local_cache(login_slots.cache_alias):
+        return []
+    return [Warning(
+        f"LOGIN_HASH_POOL['CACHE_ALIAS'] ({login_slots.cache_alias!r}) is a process-local LocMemCache.",
+        hint=("Set CACHE_URL to a Redis cache shared by all workers. Until then MAX_PENDING applies "
+              "per process, and sync workers, which serve one request each, never reject a login."),
+        id='SmartChurch.W003',
+    )]
@@ -0,0 +1,63 @@
+"""
+Counter tables kept up to date by adding deltas.
+
+``increment()`` adds per-key deltas to the rows of a table with a unique key,
+e.g. ``CardLedger`` (card, year, entry_type). Missing rows are created empty
+first, then the deltas are added with one UPDATE per chunk of keys:
+
+    UPDATE t SET total = total + CASE WHEN <key 1> THEN 5000 WHEN <key 2> ... END, ...
+    WHERE <key 1> OR <key 2> ...
+
+Because the new values are computed by the database, concurrent writers never
+overwrite each other's totals. Call it in the same transaction as the rows
+being counted.
+
+Missing rows are inserted with ``ignore_conflicts``, so every key must hit a
+unique constraint. NULLs are distinct in a unique key: give a nullable key
+field a partial ``UniqueConstraint`` over its NULL rows, as
+``DailyOfferingRollup`` does for rows without a street.
+"""
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+# Keys changed per UPDATE statement
+CHUNK_SIZE = 200
+
+
+def _key_q(key_fields, key):
+    return Q(**dict(zip(key_fields, key)))
+
+
+def increment(model, key_fields, value_fields, changes):
+    """
+    Add ``changes`` (``{key: (delta, ...)}``, keys and deltas ordered like
+    ``key_fields`` and ``value_fields``) to ``model``.
+    """
+    changes = [(key, deltas) for key, deltas in changes.items() if any(deltas)]
+    if not changes:
+        return
+    with transaction.atomic():
+        model.objects.bulk_create(
+            [model(**dict(zip(key_fields, key))) for key, _ in changes], ignore_conflicts=True
+        )
+
+        for start in range(0, len(changes), CHUNK_SIZE):
+            chunk = changes[start:start + CHUNK_SIZE]
+            updates = {}
+            for i, name in enumerate(value_fields):
+                field = model._meta.get_field(name)
+                zero = Decimal(0) if field.get_internal_type() == 'DecimalField' else 0
+                updates[name] = F(name) + Case(
+                    *[When(_key_q(key_fields, key), then=Value(deltas[i])) for key, deltas in chunk],
+                    default=Value(zero), output_field=field.clone(),
+                )
+            # update() skips auto_now
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    updates[field.name] = timezone.now()
+            model.objects.filter(reduce(or_, (_key_q(key_fields, key) for key, _ in chunk))).update(**updates)
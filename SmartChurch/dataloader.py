@@ -0,0 +1,452 @@
+"""
+Request-scoped DataLoaders for the synchronous GraphQL view.
+
+graphene 3 runs on graphql-core 3, which only batches through ``async``
+resolvers; the ``promise`` based loaders of graphene 2 no longer defer anything
+under ``GraphQLView``. Instead, a resolver returns a ``LoaderFuture`` from
+``loader.load(key)`` and ``BatchingExecutionContext`` sets the field aside
+rather than completing it immediately. Once every field of the current level
+has been resolved, each loader runs one query for all the keys it collected
+and the deferred fields are completed, which may queue the next level of loads.
+
+Loaders live on the request (``get_loader``), so every relation costs one query
+per request no matter how long the list is. Use the helpers at the bottom
+(``load_related``, ``load_many_related``) from resolvers: they return objects
+that are already cached on the instance (``select_related``/
+``prefetch_related``) without touching a loader.
+
+Mutations are executed serially, so under a mutation futures are resolved as
+soon as they are returned and later mutations cannot change what an earlier
+one reported.
+
+A deferred field that fails is reported like any other field error: a
+nullable field becomes null, and a non-null one nulls its nearest nullable
+ancestor (the whole ``data`` when there is none). To find that ancestor,
+completing a non-null object or list records its path.
+
+Loaders and pending fields are kept per thread, so root fields that are
+resolved on different threads (see ``SmartChurch.async_execution`` and
+``SmartChurch.parallel_execution``) batch independently and never share a
+loader.
+"""
+import threading
+from collections import defaultdict
+
+from django.db.models import Count, F
+from django.db.models.fields.related_descriptors import ManyToManyDescriptor
+from graphene.types.resolver import dict_or_attr_resolver
+from graphql import GraphQLNonNull, OperationType, is_leaf_type, located_error
+from graphql.execution import ExecutionContext
+
+from Monitoring.tracing import is_sampled
+
+from .projection import Record
+
+
+class LoaderFuture:
+    __slots__ = ('_loader', '_done', '_value', '_error')
+
+    def __init__(self, loader=None):
+        self._loader = loader
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def set_result(self, value):
+        self._value, self._done = value, True
+
+    def set_exception(self, error):
+        self._error, self._done = error, True
+
+    def get(self):
+        if not self._done:
+            self._loader.dispatch()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def then(self, fn):
+        """A future for ``fn(value)``, evaluated once this one resolves."""
+        return _MappedFuture(self, fn)
+
+
+class _MappedFuture(LoaderFuture):
+    __slots__ = ('_source', '_fn')
+
+    def __init__(self, source, fn):
+        super().__init__()
+        self._source, self._fn = source, fn
+
+    def get(self):
+        if not self._done:
+            try:
+                self.set_result(self._fn(self._source.get()))
+            except Exception as error:
+                self.set_exception(error)
+        return super().get()
+
+
+class _GatheredFuture(LoaderFuture):
+    __slots__ = ('_futures',)
+
+    def __init__(self, futures):
+        super().__init__()
+        self._futures = futures
+
+    def get(self):
+        if not self._done:
+            try:
+                self.set_result([future.get() for future in self._futures])
+            except Exception as error:
+                self.set_exception(error)
+        return super().get()
+
+
+def maybe_then(value, fn):
+    """Apply ``fn`` now for plain values, or once ``value`` resolves for futures."""
+    if isinstance(value, LoaderFuture):
+        return value.then(fn)
+    return fn(value)
+
+
+class DataLoader:
+    """
+    Collects keys passed to ``load`` and resolves them with a single call to
+    ``batch_load(keys)``, which must return one value per key in the same order.
+    Results are cached for the lifetime of the loader (one request).
+    """
+
+    def __init__(self):
+        self._futures = {}
+        self._queue = []
+
+    def batch_load(self, keys):
+        raise NotImplementedError
+
+    def load(self, key):
+        future = self._futures.get(key)
+        if future is None:
+            future = self._futures[key] = LoaderFuture(self)
+            self._queue.append(key)
+        return future
+
+    def load_many(self, keys):
+        return _GatheredFuture([self.load(key) for key in keys])
+
+    def prime(self, key, value):
+        if key not in self._futures:
+            future = self._futures[key] = LoaderFuture(self)
+            future.set_result(value)
+
+    def clear(self):
+        self._futures.clear()
+        self._queue = []
+
+    def dispatch(self):
+        while self._queue:
+            keys, self._queue = self._queue, []
+            try:
+                values = self.batch_load(keys)
+            except Exception as error:
+                for key in keys:
+                    self._futures[key].set_exception(error)
+                continue
+            for key, value in zip(keys, values):
+                self._futures[key].set_result(value)
+
+
+class ModelLoader(DataLoader):
+    """Model instances by primary key (forward ForeignKey / OneToOne)."""
+
+    def __init__(self, model, select_related=()):
+        super().__init__()
+        self.model = model
+        self.select_related = select_related
+
+    def batch_load(self, keys):
+        qs = self.model._default_manager.all()
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        found = qs.in_bulk(keys)
+        return [found.get(key) for key in keys]
+
+
+class RelatedListLoader(DataLoader):
+    """Lists of ``model`` rows keyed by the ``field`` column (reverse ForeignKey)."""
+
+    def __init__(self, model, field, order_by=(), select_related=()):
+        super().__init__()
+        self.model = model
+        self.field = field
+        self.order_by = order_by
+        self.select_related = select_related
+
+    def batch_load(self, keys):
+        qs = self.model._default_manager.filter(**{f'{self.field}__in': keys})
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        if self.order_by:
+            qs = qs.order_by(*self.order_by)
+        grouped = defaultdict(list)
+        for obj in qs:
+            grouped[getattr(obj, self.field)].append(obj)
+        return [grouped.get(key, []) for key in keys]
+
+
+class ManyToManyLoader(DataLoader):
+    """
+    Lists of ``model`` rows reachable through the ``query_name`` relation, e.g.
+    ``ManyToManyLoader(Group, 'member')`` for ``Member.groups``. One joined query.
+    """
+
+    def __init__(self, model, query_name):
+        super().__init__()
+        self.model = model
+        self.query_name = query_name
+
+    def batch_load(self, keys):
+        qs = (self.model._default_manager
+              .filter(**{f'{self.query_name}__in': keys})
+              .annotate(_loader_key=F(self.query_name))
+              .order_by('pk'))
+        grouped = defaultdict(list)
+        for obj in qs:
+            grouped[obj._loader_key].append(obj)
+        return [grouped.get(key, []) for key in keys]
+
+
+class CountLoader(DataLoader):
+    """Number of ``model`` rows per ``field`` value, optionally filtered."""
+
+    def __init__(self, model, field, **filters):
+        super().__init__()
+        self.model = model
+        self.field = field
+        self.filters = filters
+
+    def batch_load(self, keys):
+        rows = (self.model._default_manager
+                .filter(**{f'{self.field}__in': keys}, **self.filters)
+                .values(self.field)
+                .annotate(_count=Count('pk'))
+                .values_list(self.field, '_count'))
+        counts = dict(rows)
+        return [counts.get(key, 0) for key in keys]
+
+
+def get_loader(info, loader_class, *args, **kwargs):
+    """The request's ``loader_class(*args, **kwargs)``, created on first use."""
+    context = info.context
+    key = (loader_class, args, tuple(sorted(kwargs.items())))
+    if context is None:
+        return loader_class(*args, **kwargs)
+    local = getattr(context, '_dataloaders', None)
+    if local is None:
+        local = vars(context).setdefault('_dataloaders', threading.local())
+    registry = getattr(local, 'registry', None)
+    if registry is None:
+        registry = local.registry = {}
+    loader = registry.get(key)
+    if loader is None:
+        loader = registry[key] = loader_class(*args, **kwargs)
+    return loader
+
+
+def load_related(info, instance, field_name):
+    """The ForeignKey ``field_name`` of ``instance``, batched unless already cached."""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+    pk = getattr(instance, field.attname)
+    if pk is None:
+        return None
+    return get_loader(info, ModelLoader, field.related_model).load(pk)
+
+
+def load_many_related(info, instance, accessor, order_by=(), select_related=()):
+    """
+    Rows of the many-to-many or reverse ForeignKey ``accessor`` of ``instance``
+    (``member.groups``, ``prayer.replies``), batched unless prefetched.
+    """
+    prefetched = getattr(instance, '_prefetched_objects_cache', {})
+    if accessor in prefetched:
+        return list(prefetched[accessor])
+    descriptor = getattr(type(instance), accessor)
+    field = descriptor.field
+    if isinstance(descriptor, ManyToManyDescriptor):
+        if descriptor.reverse:
+            loader = get_loader(info, ManyToManyLoader, field.model, field.name)
+        else:
+            loader = get_loader(info, ManyToManyLoader, field.related_model, field.related_query_name())
+    else:
+        loader = get_loader(info, RelatedListLoader, field.model, field.attname,
+                            order_by=tuple(order_by), select_related=tuple(select_related))
+    return loader.load(instance.pk)
+
+
+def _record_leaf(parent_type, field_name):
+    """
+    ``(attribute, serialize)`` when ``parent_type.field_name`` is a nullable
+    leaf read by graphene's default resolver, else None.
+    """
+    key = (parent_type, field_name)
+    leaf = _record_leaves.get(key, False)
+    if leaf is False:
+        leaf = None
+        field = parent_type.fields.get(field_name)
+        resolver = getattr(field, 'resolve', None)
+        if (field is not None and is_leaf_type(field.type)
+                and getattr(resolver, 'func', None) is dict_or_attr_resolver and resolver.args[1] is None):
+            leaf = (resolver.args[0], field.type.serialize)
+        _record_leaves[key] = leaf
+    return leaf
+
+
+_record_leaves = {}
+
+
+class _Deferred:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+
+class BatchingExecutionContext(ExecutionContext):
+    """
+    ExecutionContext that completes ``LoaderFuture`` results level by level so
+    the loaders behind them can batch. Pass it to ``GraphQLView`` (or
+    ``schema.execute``) as ``execution_context_class``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._eager = False
+        # id(path) -> path of every non-null object or list value completed
+        self._non_null_paths = {}
+
+    @property
+    def _pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = []
+        return pending
+
+    def execute_fields(self, parent_type, source_value, path, fields):
+        if isinstance(source_value, Record) and not is_sampled(self.context_value):
+            # Rows of SmartChurch.projection: when every selected field is a
+            # plain leaf, read and serialize the attributes directly. Field
+            # middleware is not run for them, so requests sampled for resolver
+            # tracing take the regular path.
+            results = {}
+            for response_name, field_nodes in fields.items():
+                leaf = _record_leaf(parent_type, field_nodes[0].name.value)
+                if leaf is None:
+                    break
+                value = getattr(source_value, leaf[0], None)
+                try:
+                    results[response_name] = None if value is None else leaf[1](value)
+                except Exception:
+                    break
+            else:
+                return results
+        return super().execute_fields(parent_type, source_value, path, fields)
+
+    def complete_value(self, return_type, field_nodes, info, path, result):
+        if isinstance(result, LoaderFuture):
+            if self._eager:
+                result = result.get()
+            else:
+                deferred = _Deferred()
+                self._pending.append((deferred, return_type, field_nodes, info, path, result))
+                return deferred
+        if isinstance(return_type, GraphQLNonNull) and not is_leaf_type(return_type.of_type):
+            self._non_null_paths[id(path)] = path
+        return super().complete_value(return_type, field_nodes, info, path, result)
+
+    def execute_operation(self, operation, root_value):
+        self._eager = operation.operation == OperationType.MUTATION
+        data = super().execute_operation(operation, root_value)
+        if self.is_awaitable(data):
+            # Root fields resolved on worker threads complete their own futures
+            return data
+        return self.resolve_deferred(data)
+
+    def execute_root_field(self, parent_type, source_value, field_nodes, path):
+        """
+        Execute one root field and complete its deferred fields on the calling
+        thread. Used when root fields are spread over worker threads.
+        """
+        result = self.execute_field(parent_type, source_value, field_nodes, path)
+        if self.is_awaitable(result):
+            return result
+        return self.resolve_deferred(result, path)
+
+    def resolve_deferred(self, data, root_path=None):
+        """
+        Run the loaders for this thread's deferred fields and fill them into
+        ``data``: the operation's data, or the value of the root field at
+        ``root_path``. A failed non-null field that has to null something
+        above ``root_path`` raises its error for the caller to handle.
+        """
+        if not self._pending:
+            return data
+        nulled = []
+        while self._pending:
+            pending, self._local.pending = self._pending, []
+            for deferred, return_type, field_nodes, info, path, future in pending:
+                try:
+                    deferred.value = self.complete_value(return_type, field_nodes, info, path, future.get())
+                except Exception as raw_error:
+                    deferred.value = None
+                    error = located_error(raw_error, field_nodes, path.as_list())
+                    if isinstance(return_type, GraphQLNonNull):
+                        ancestor = self._nullable_ancestor(path)
+                        if ancestor is None and root_path is not None:
+                            self._local.pending = []
+                            raise error
+                        nulled.append(ancestor)
+                    self.errors.append(error)
+        data = self._fill(data)
+        for ancestor in nulled:
+            data = self._null_out(data, ancestor, root_path)
+        return data
+
+    def _nullable_ancestor(self, path):
+        """The nearest path above ``path`` that may be null; None for ``data`` itself."""
+        path = path.prev
+        while path is not None and id(path) in self._non_null_paths:
+            path = path.prev
+        return path
+
+    @staticmethod
+    def _null_out(data, path, root_path=None):
+        if path is None:
+            return None
+        keys = path.as_list()
+        if root_path is not None:
+            keys = keys[len(root_path.as_list()):]
+            if not keys:
+                return None
+        container = data
+        for key in keys[:-1]:
+            if container is None:
+                return data
+            container = container[key]
+        if container is not None:
+            container[keys[-1]] = None
+        return data
+
+    def _fill(self, value):
+        while isinstance(value, _Deferred):
+            value = value.value
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(item, (_Deferred, dict, list)):
+                    value[key] = self._fill(item)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, (_Deferred, dict, list)):
+                    value[index] = self._fill(item)
+        return value
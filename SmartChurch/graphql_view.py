@@ -0,0 +1,397 @@
+"""
+The GraphQL endpoint mounted at ``/graphql/``.
+
+``SmartChurchGraphQLView`` is graphene-django's ``GraphQLView`` except that
+documents are parsed and validated through ``document_cache``. The frontends
+send the same few documents over and over, so after warm-up a request skips
+straight to execution.
+
+``AsyncSmartChurchGraphQLView`` is the same endpoint for the ASGI app
+(``GRAPHQL_ASYNC``). Queries resolve their root fields concurrently on worker
+threads (``SmartChurch.async_execution``). Mutations, and the preparation steps
+that touch the database or cache, run in ``sync_to_async``, so nothing blocks
+the event loop.
+
+With ``GRAPHQL_PARALLEL_ROOT_FIELDS`` enabled, the sync view runs independent
+root fields on a thread pool (``SmartChurch.parallel_execution``).
+
+The SQL each operation runs is recorded by ``Monitoring.sql``; staff can ask
+for it in ``extensions.sql`` with the ``X-Debug-SQL`` header.
+
+Responses are encoded to bytes by ``SmartChurch.json_encoding`` (orjson when
+installed) and handed to ``HttpResponse`` without an intermediate string.
+
+Before execution each operation is checked against the caller's depth and
+cost budget (``SmartChurch.query_cost``).
+
+Requests may carry an Apollo ``persistedQuery`` hash instead of the query
+text (see ``SmartChurch.persisted_queries``). Hash-only GET requests that
+succeed are sent with ``Cache-Control``, so browsers and proxies can reuse
+them.
+
+The cache is an LRU keyed by the sha256 of the query text. It is bounded by
+``GRAPHQL_DOCUMENT_CACHE['MAX_ENTRIES']`` and stamped with the schema version.
+The version is a hash of the printed schema unless ``SCHEMA_VERSION`` is set.
+Whenever a different schema is seen, the cache is cleared, so a document
+validated against an old schema is never executed against a new one.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    OperationType,
+    execute,
+    get_operation_ast,
+    parse,
+    print_schema,
+    validate,
+    validate_schema,
+)
+
+from Monitoring.middleware import OPERATION_ATTR
+from Monitoring.sql import operation_label, record_operation
+from SmartChurch.async_execution import AsyncBatchingExecutionContext
+from SmartChurch.dataloader import BatchingExecutionContext
+from SmartChurch.json_encoding import response_encoder
+from SmartChurch.parallel_execution import ParallelBatchingExecutionContext
+from SmartChurch.persisted_queries import PersistedQueryError, persisted_queries, query_digest
+from SmartChurch.query_cost import check_query_cost
+from churchMember.User_Auth_middleware import authenticate_request
+
+_document_cache_settings = getattr(settings, 'GRAPHQL_DOCUMENT_CACHE', {})
+GET_MAX_AGE = getattr(settings, 'GRAPHQL_PERSISTED_QUERIES', {}).get('GET_MAX_AGE', 60)
+PARALLEL_ROOT_FIELDS = getattr(settings, 'GRAPHQL_PARALLEL_ROOT_FIELDS', {}).get('ENABLED', False)
+
+
+class DocumentCache:
+    """Thread-safe LRU of parsed and validated ``DocumentNode``s."""
+
+    def __init__(self, max_entries=1000, schema_version=None):
+        self.max_entries = max_entries
+        self.fixed_version = schema_version
+        self.schema_version = None
+        self.hits = 0
+        self.misses = 0
+        self._schema = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_schema(self, schema):
+        if schema is self._schema:
+            return
+        with self._lock:
+            if schema is self._schema:
+                return
+            version = self.fixed_version or query_digest(print_schema(schema))[:16]
+            if version != self.schema_version:
+                self._entries.clear()
+                self.schema_version = version
+            self._schema = schema
+
+    def get(self, schema, query, validation_rules=None):
+        """
+        Return ``(document, errors)`` for ``query``. ``errors`` holds parse or
+        validation errors. Only valid documents are cached.
+        """
+        self._check_schema(schema)
+        key = (query_digest(query), validation_rules)
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return document, None
+            self.misses += 1
+
+        try:
+            document = parse(query)
+        except Exception as e:
+            return None, [e]
+        errors = validate(schema, document, validation_rules, graphene_settings.MAX_VALIDATION_ERRORS)
+        if errors:
+            return document, errors
+
+        with self._lock:
+            self._entries[key] = document
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return document, None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+document_cache = DocumentCache(
+    max_entries=_document_cache_settings.get('MAX_ENTRIES', 1000),
+    schema_version=_document_cache_settings.get('SCHEMA_VERSION'),
+)
+
+
+class SmartChurchGraphQLView(GraphQLView):
+    execution_context_class = (
+        ParallelBatchingExecutionContext if PARALLEL_ROOT_FIELDS else BatchingExecutionContext
+    )
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        self.patch_cache_headers(request, response)
+        return response
+
+    @staticmethod
+    def patch_cache_headers(request, response):
+        if request.method == 'GET' and getattr(request, '_persisted_query_cacheable', False):
+            # Responses depend on the caller, so only browsers may cache authenticated ones
+            if 'HTTP_AUTHORIZATION' in request.META:
+                patch_cache_control(response, private=True, max_age=GET_MAX_AGE)
+            else:
+                patch_cache_control(response, public=True, max_age=GET_MAX_AGE)
+            patch_vary_headers(response, ('Authorization',))
+
+    def json_encode(self, request, d, pretty=False):
+        extensions = request.__dict__.pop('_graphql_extensions', None)
+        if extensions and isinstance(d, dict):
+            d = dict(d, extensions=extensions)
+        pretty = pretty or self.pretty or bool(request.GET.get("pretty"))
+        content = response_encoder.encode(d, pretty=pretty)
+        # Batch responses are joined as text by GraphQLView
+        return content.decode("utf-8") if self.batch else content
+
+    @staticmethod
+    def get_persisted_hash(request, data):
+        extensions = data.get('extensions') if isinstance(data, dict) else None
+        if extensions is None:
+            extensions = request.GET.get('extensions')
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        persisted = (extensions or {}).get('persistedQuery') if isinstance(extensions, dict) else None
+        if not persisted:
+            return None
+        if persisted.get('version') != 1:
+            raise HttpError(HttpResponseBadRequest("Unsupported persistedQuery version."))
+        return persisted.get('sha256Hash')
+
+    def prepare_operation(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Resolve, parse, validate and cost-check the request's document.
+
+        Returns ``(document, operation_ast, None)`` when it is ready to execute,
+        or ``(None, None, result)`` with the result to send instead.
+        """
+        sha256_hash = self.get_persisted_hash(request, data)
+        try:
+            query = persisted_queries.resolve(query, sha256_hash)
+        except PersistedQueryError as e:
+            return None, None, ExecutionResult(errors=[e])
+        request._persisted_query_hash = sha256_hash
+
+        if not query:
+            if show_graphiql:
+                return None, None, None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return None, None, ExecutionResult(data=None, errors=schema_validation_errors)
+
+        rules = tuple(self.validation_rules) if self.validation_rules else None
+        document, errors = document_cache.get(schema, query, rules)
+        if document is None:
+            return None, None, ExecutionResult(errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        setattr(request, OPERATION_ATTR, operation_label(operation_ast))
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None, None, None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if errors:
+            return None, None, ExecutionResult(data=None, errors=errors)
+
+        if operation_ast is not None:
+            request.user = authenticate_request(request)
+            cost_error = check_query_cost(schema, document, operation_ast, variables, request.user)
+            if cost_error is not None:
+                return None, None, ExecutionResult(data=None, errors=[cost_error])
+
+        return document, operation_ast, None
+
+    def get_execute_options(self, request, variables, operation_name, execution_context_class):
+        return {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+            "execution_context_class": execution_context_class,
+        }
+
+    @staticmethod
+    def mark_cacheable(request, result):
+        if getattr(request, '_persisted_query_hash', None) and result is not None and not result.errors:
+            request._persisted_query_cacheable = True
+
+    def execute_prepared(self, request, document, operation_ast, variables, operation_name):
+        with record_operation(request, operation_ast):
+            return self._execute_prepared(request, document, operation_ast, variables, operation_name)
+
+    def _execute_prepared(self, request, document, operation_ast, variables, operation_name):
+        schema = self.schema.graphql_schema
+        try:
+            execute_options = self.get_execute_options(
+                request, variables, operation_name, self.execution_context_class
+            )
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        document, operation_ast, early_result = self.prepare_operation(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        if document is None:
+            return early_result
+        result = self.execute_prepared(request, document, operation_ast, variables, operation_name)
+        self.mark_cacheable(request, result)
+        return result
+
+
+class AsyncSmartChurchGraphQLView(SmartChurchGraphQLView):
+    """
+    Async variant for the ASGI app. GraphiQL, batch requests and anything other
+    than GET/POST fall back to the synchronous view in a worker thread.
+    """
+
+    async_execution_context_class = AsyncBatchingExecutionContext
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        markcoroutinefunction(view)
+        return view
+
+    @method_decorator(ensure_csrf_cookie)
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() not in ("get", "post") or self.batch:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+        try:
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            result, status_code = await self.get_response_async(request, data)
+            response = HttpResponse(status=status_code, content=result, content_type="application/json")
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+        self.patch_cache_headers(request, response)
+        return response
+
+    async def get_response_async(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = await self.execute_graphql_request_async(
+            request, data, query, variables, operation_name
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            await sync_to_async(set_rollback)()
+
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            await sync_to_async(set_rollback)()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        return self.json_encode(request, response), status_code
+
+    async def execute_graphql_request_async(self, request, data, query, variables, operation_name):
+        document, operation_ast, early_result = await sync_to_async(self.prepare_operation)(
+            request, data, query, variables, operation_name
+        )
+        if document is None:
+            return early_result
+
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            # Mutations run serially (and possibly atomically) on one thread
+            result = await sync_to_async(self.execute_prepared)(
+                request, document, operation_ast, variables, operation_name
+            )
+        else:
+            try:
+                with record_operation(request, operation_ast, install=False):
+                    result = execute(
+                        self.schema.graphql_schema,
+                        document,
+                        **self.get_execute_options(
+                            request, variables, operation_name, self.async_execution_context_class
+                        ),
+                    )
+                    if hasattr(result, '__await__'):
+                        result = await result
+            except Exception as e:
+                result = ExecutionResult(errors=[e])
+        self.mark_cacheable(request, result)
+        return result
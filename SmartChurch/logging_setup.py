@@ -0,0 +1,111 @@
+"""
+Logging building blocks referenced from ``settings.LOGGING``.
+
+* ``BackgroundQueueHandler`` puts records on a bounded in-memory queue; a
+  ``QueueListener`` thread formats and writes them, so request threads never
+  block on the output stream. When the queue is full the record is dropped and
+  counted instead of stalling the request.
+* ``StructuredFormatter`` renders one JSON object per line, including any
+  ``extra={...}`` fields passed to the logging call.
+* ``SamplingFilter`` keeps only a fraction of DEBUG/INFO records from noisy
+  hot-path loggers. WARNING and above always pass.
+
+Hot-path call sites should still use lazy ``%s`` arguments (or an
+``isEnabledFor`` guard for expensive values), so nothing is formatted when the
+level is disabled.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes present on every LogRecord; anything else came from ``extra``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Sample DEBUG/INFO records per logger. ``rates`` maps logger name prefixes to
+    the fraction of records to keep, e.g. ``{'churchMember': 0.1}``.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        # Longest prefix first so 'a.b' wins over 'a'
+        self.rates = sorted((rates or {}).items(), key=lambda item: -len(item[0]))
+        self.default_rate = default_rate
+        self._cache = {}
+
+    def _rate_for(self, name):
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = self.default_rate
+            for prefix, prefix_rate in self.rates:
+                if name == prefix or name.startswith(prefix + '.'):
+                    rate = prefix_rate
+                    break
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BackgroundQueueHandler(QueueHandler):
+    def __init__(self, maxsize=10000, structured=True):
+        super().__init__(queue.Queue(maxsize))
+        self.structured = structured
+        self.dropped = 0
+        self.listener = None
+        self._start_listener()
+        atexit.register(self.close)
+        # gunicorn forks workers after settings are loaded with --preload
+        os.register_at_fork(after_in_child=self._start_listener)
+
+    def _start_listener(self):
+        target = logging.StreamHandler()
+        target.setFormatter(StructuredFormatter() if self.structured
+                            else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        self.listener = QueueListener(self.queue, target, respect_handler_level=False)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Merge args into the message now (args may be mutated later), but leave
+        # the comparatively expensive formatting to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            listener.stop()
+        super().close()
@@ -5,8 +5,9 @@ from Pastor.queries import PastorQuery
 from Pastor.mutations import PastorMutation
 from ChurchSecreatary.queries import SecretaryQuery
 from ChurchSecreatary.mutations import SecretaryMutation
+from Monitoring.queries import MonitoringQuery
 
-class RootQuery(Query, PastorQuery, SecretaryQuery, graphene.ObjectType):
+class RootQuery(Query, PastorQuery, SecretaryQuery, MonitoringQuery, graphene.ObjectType):
     pass
 
 class RootMutation(Mutation, PastorMutation, SecretaryMutation, graphene.ObjectType):  # <-- inherit from the class
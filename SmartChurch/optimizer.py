@@ -0,0 +1,176 @@
+"""
+Selection-set aware queryset optimization for DjangoObjectType list fields.
+
+``optimize(queryset, info)`` walks the fields the client selected under the
+current field (fragments included) and narrows the queryset accordingly:
+
+* plain model fields become ``only()`` columns,
+* selected ForeignKey / OneToOne fields become ``select_related()`` joins and
+  their own selections are followed recursively,
+* selected many-to-many and reverse ForeignKey fields become
+  ``prefetch_related()`` lookups whose querysets are optimized the same way.
+
+Computed fields declare what they read with ``@resolver_hints``. A selected
+field the optimizer knows nothing about (custom resolver, no hints) loads every
+column of its model, so an unexpected attribute access never costs an extra
+query per row.
+
+Connection fields (``SmartChurch.pagination``) are optimized for the selection
+under ``edges { node }``.
+
+Relations fetched this way are already cached on the instances, so the
+DataLoader helpers in ``SmartChurch.dataloader`` return them without a query.
+
+For plain ``ObjectType`` outputs built by hand, ``selected_fields(info)`` gives
+the snake_case names of the selected fields.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphene_django import DjangoObjectType
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, get_named_type
+
+from .pagination import is_connection_type
+
+
+def resolver_hints(only=(), select_related=(), prefetch_related=()):
+    """
+    Declare the model paths a custom resolver reads, relative to the type's
+    model, e.g. ``@resolver_hints(select_related=('created_by',),
+    only=('created_by__full_name',))``.
+    """
+    def decorator(resolver):
+        resolver.optimizer_hints = {
+            'only': tuple(only),
+            'select_related': tuple(select_related),
+            'prefetch_related': tuple(prefetch_related),
+        }
+        return resolver
+    return decorator
+
+
+def _field_nodes(selection_sets, info):
+    """Yield the FieldNodes of ``selection_sets``, expanding fragments."""
+    for selection_set in selection_sets:
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection
+            elif isinstance(selection, InlineFragmentNode):
+                yield from _field_nodes([selection.selection_set], info)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments.get(selection.name.value)
+                if fragment is not None:
+                    yield from _field_nodes([fragment.selection_set], info)
+
+
+def _group_by_name(nodes):
+    grouped = {}
+    for node in nodes:
+        grouped.setdefault(node.name.value, []).append(node)
+    return grouped
+
+
+def selected_fields(info):
+    """Snake_case names of the fields selected under the current field."""
+    nodes = _field_nodes([node.selection_set for node in info.field_nodes], info)
+    return {to_snake_case(node.name.value) for node in nodes if not node.name.value.startswith('__')}
+
+
+class _Plan:
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def _all_columns(model, prefix):
+    return {prefix + field.name for field in model._meta.concrete_fields}
+
+
+def _add_select_related(plan, path):
+    """select_related ``path`` and keep every hop of it in ``only()``."""
+    plan.select_related.add(path)
+    parts = path.split('__')
+    for end in range(1, len(parts) + 1):
+        plan.only.add('__'.join(parts[:end]))
+
+
+def _collect(plan, model, graphql_type, nodes, info, prefix=''):
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    if not (isinstance(graphene_type, type) and issubclass(graphene_type, DjangoObjectType)
+            and graphene_type._meta.model is model):
+        plan.only |= _all_columns(model, prefix)
+        return
+
+    plan.only.add(prefix + model._meta.pk.name)
+    for name, field_nodes in _group_by_name(_field_nodes([n.selection_set for n in nodes], info)).items():
+        if name.startswith('__'):
+            continue
+        attr = to_snake_case(name)
+        resolver = getattr(graphene_type, f'resolve_{attr}', None)
+        hints = getattr(resolver, 'optimizer_hints', None)
+        if hints is not None:
+            for path in hints['select_related']:
+                _add_select_related(plan, prefix + path)
+            plan.only.update(prefix + path for path in hints['only'])
+            plan.prefetch_related.extend(prefix + path for path in hints['prefetch_related'])
+            continue
+
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            plan.only |= _all_columns(model, prefix)
+            continue
+
+        if not field.is_relation:
+            plan.only.add(prefix + field.name)
+            continue
+
+        child_type = get_named_type(graphql_type.fields[name].type)
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            _add_select_related(plan, prefix + field.name)
+            _collect(plan, field.related_model, child_type, field_nodes, info, prefix + field.name + '__')
+        elif field.many_to_many or field.one_to_many:
+            child = _Plan()
+            _collect(child, field.related_model, child_type, field_nodes, info)
+            if field.one_to_many:
+                # Django matches prefetched rows back through the ForeignKey column
+                child.only.add(field.field.name)
+            accessor = field.name if field.concrete else field.get_accessor_name()
+            plan.prefetch_related.append(
+                Prefetch(prefix + accessor, queryset=child.apply(field.related_model._default_manager.all()))
+            )
+        else:
+            plan.only |= _all_columns(model, prefix)
+
+
+def _connection_nodes(connection_type, nodes, info):
+    """The node type of a Relay connection and its ``edges { node }`` FieldNodes."""
+    edges = [node for node in _field_nodes([n.selection_set for n in nodes], info) if node.name.value == 'edges']
+    node_nodes = [node for node in _field_nodes([e.selection_set for e in edges], info) if node.name.value == 'node']
+    edge_type = get_named_type(connection_type.fields['edges'].type)
+    return get_named_type(edge_type.fields['node'].type), node_nodes
+
+
+def optimize(queryset, info):
+    """
+    Narrow ``queryset`` to what the selection set under ``info`` needs. For a
+    connection field that is the selection under ``edges { node }``.
+    """
+    plan = _Plan()
+    graphql_type, nodes = get_named_type(info.return_type), info.field_nodes
+    if is_connection_type(graphql_type):
+        graphql_type, nodes = _connection_nodes(graphql_type, nodes, info)
+    _collect(plan, queryset.model, graphql_type, nodes, info)
+    return plan.apply(queryset)
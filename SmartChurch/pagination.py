@@ -0,0 +1,202 @@
+"""
+Relay connections with keyset cursors.
+
+A list field becomes a connection field with ``first``/``after`` arguments and
+``edges { cursor node }`` plus ``pageInfo``. Each ``Keyset`` names a stable
+ordering that ends in the primary key, e.g. ``Keyset(MemberRequest,
+'-submitted_at', '-id')``. A cursor is an opaque token that holds the ordering
+values of one row. The next page is fetched with a seek condition instead of
+OFFSET:
+
+    WHERE submitted_at <= :t AND (submitted_at < :t OR (submitted_at = :t AND id < :id))
+    ORDER BY submitted_at DESC, id DESC LIMIT first + 1
+
+With an index on the ordering columns, every page costs the same no matter how
+deep it is. OFFSET reads and throws away every row before the page. Rows
+inserted or deleted between requests do not shift later pages either.
+
+Nullable ordering columns sort their NULLs last in both directions.
+
+Settings: ``GRAPHQL_PAGINATION``.
+"""
+import base64
+import datetime
+import decimal
+import json
+
+import graphene
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from graphql import GraphQLError
+
+_pagination_settings = getattr(settings, 'GRAPHQL_PAGINATION', {})
+DEFAULT_PAGE_SIZE = _pagination_settings.get('DEFAULT_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = _pagination_settings.get('MAX_PAGE_SIZE', 200)
+
+
+def is_connection_type(graphql_type):
+    """Whether ``graphql_type`` (a named GraphQL type) is a Relay connection."""
+    fields = getattr(graphql_type, 'fields', None)
+    return bool(fields) and 'edges' in fields and 'pageInfo' in fields
+
+
+def connection_field(connection_type, **kwargs):
+    """A field returning ``connection_type``, with ``first`` and ``after`` arguments."""
+    return graphene.Field(
+        connection_type,
+        first=graphene.Int(description=f'Page size (default {DEFAULT_PAGE_SIZE}, at most {MAX_PAGE_SIZE})'),
+        after=graphene.String(description='endCursor of the previous page'),
+        **kwargs,
+    )
+
+
+def _model_field(model, path):
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class Keyset:
+    """A stable ordering of ``model`` rows and the cursors for it."""
+
+    def __init__(self, model, *ordering):
+        self.model = model
+        self.columns = []
+        for name in ordering:
+            path = name.lstrip('-')
+            self.columns.append((path, name.startswith('-'), _model_field(model, path).null))
+
+    @property
+    def paths(self):
+        return [path for path, _, _ in self.columns]
+
+    def order_by(self):
+        ordering = []
+        for path, descending, nullable in self.columns:
+            if nullable:
+                ordering.append(F(path).desc(nulls_last=True) if descending else F(path).asc(nulls_last=True))
+            else:
+                ordering.append(f'-{path}' if descending else path)
+        return ordering
+
+    def values(self, instance):
+        values = []
+        for path in self.paths:
+            value = instance
+            for name in path.split('__'):
+                value = getattr(value, name) if value is not None else None
+            values.append(value)
+        return values
+
+    def encode(self, values):
+        payload = json.dumps([_json_value(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def cursor(self, instance):
+        return self.encode(self.values(instance))
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (ValueError, UnicodeError):
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise GraphQLError('Invalid cursor', extensions={'code': 'INVALID_CURSOR'})
+        return values
+
+    def after(self, values):
+        """The rows that sort strictly after the row with ordering ``values``."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (path, descending, nullable), value in zip(self.columns, values):
+            if value is None:
+                # NULLs sort last: nothing comes after them in this column
+                equal &= Q(**{f'{path}__isnull': True})
+                continue
+            later = Q(**{f'{path}__{"lt" if descending else "gt"}': value})
+            if nullable:
+                later |= Q(**{f'{path}__isnull': True})
+            condition |= equal & later
+            equal &= Q(**{path: value})
+        path, descending, nullable = self.columns[0]
+        if values[0] is not None and not nullable:
+            # Redundant, but a plain range on the leading column lets the
+            # planner seek into the index instead of filtering from the top
+            condition &= Q(**{f'{path}__{"lte" if descending else "gte"}': values[0]})
+        return condition
+
+
+def _with_ordering_columns(queryset, paths):
+    """Make sure ``only()``/``defer()`` still load the columns the cursors read."""
+    names, defer = queryset.query.deferred_loading
+    if not names:
+        return queryset
+    if defer:
+        kept = set(names) - set(paths)
+        if kept == set(names):
+            return queryset
+        return queryset.defer(None).defer(*kept) if kept else queryset.defer(None)
+    return queryset.only(*names, *paths)
+
+
+def page_size(first):
+    if first is None:
+        return DEFAULT_PAGE_SIZE
+    if first < 0:
+        raise GraphQLError('first must not be negative', extensions={'code': 'BAD_USER_INPUT'})
+    return min(first, MAX_PAGE_SIZE)
+
+
+def connection_from_queryset(connection_type, queryset, keyset, first=None, after=None, to_nodes=list,
+                             projection=None):
+    """
+    One page of ``queryset`` in ``keyset`` order as a ``connection_type``.
+    ``to_nodes`` turns the page's rows into the nodes, all at once, so per-row
+    lookups can be batched over the page. The rows are model instances, or the
+    records of ``projection`` (``SmartChurch.projection``) when one is given.
+    """
+    limit = page_size(first)
+    queryset = _with_ordering_columns(queryset, keyset.paths).order_by(*keyset.order_by())
+    if after:
+        try:
+            queryset = queryset.filter(keyset.after(keyset.decode(after)))
+        except (ValidationError, ValueError, TypeError):
+            raise GraphQLError('Invalid cursor', extensions={'code': 'INVALID_CURSOR'})
+    if projection is None:
+        rows = list(queryset[:limit + 1])
+    else:
+        rows = list(projection.values_list(queryset, *keyset.paths)[:limit + 1])
+    has_next_page = len(rows) > limit
+    rows = rows[:limit]
+    if projection is None:
+        cursors = [keyset.cursor(row) for row in rows]
+    else:
+        width = len(projection.columns)
+        cursors = [keyset.encode(row[width:]) for row in rows]
+        rows = [projection.make(row) for row in rows]
+    edges = [
+        connection_type.Edge(node=node, cursor=cursor)
+        for node, cursor in zip(to_nodes(rows), cursors)
+    ]
+    return connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=has_next_page,
+            has_previous_page=bool(after),
+            start_cursor=cursors[0] if cursors else None,
+            end_cursor=cursors[-1] if cursors else None,
+        ),
+    )
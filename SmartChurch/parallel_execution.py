@@ -0,0 +1,112 @@
+"""
+Parallel root fields for the synchronous GraphQL view.
+
+The pastor dashboard asks for a handful of independent root fields in one
+request (``dashboardStats``, ``offeringStats``, ``offeringsByMass``, ...), each
+running its own aggregate queries. ``ParallelBatchingExecutionContext`` runs
+the first root field on the request thread and hands the rest to a small
+shared thread pool, so the request takes about as long as its slowest field
+rather than the sum of all of them.
+
+Pool threads use their own database connections. After each field,
+``close_old_connections()`` drops the connection unless ``CONN_MAX_AGE``
+allows it to be kept. Fields are run serially instead when:
+
+* the operation is a mutation,
+* there is only one root field, or
+* the request thread is inside ``transaction.atomic()``, because other threads
+  could not see its uncommitted rows.
+
+The pool is off unless ``GRAPHQL_PARALLEL_ROOT_FIELDS['ENABLED']`` is set,
+since every process then needs up to ``MAX_WORKERS`` more connections.
+
+Settings: ``GRAPHQL_PARALLEL_ROOT_FIELDS``.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from graphql.pyutils import Path, Undefined
+
+from Monitoring.sql import recording
+from SmartChurch.dataloader import BatchingExecutionContext
+
+_parallel_settings = getattr(settings, 'GRAPHQL_PARALLEL_ROOT_FIELDS', {})
+
+
+class RootFieldPool:
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Created lazily so forked gunicorn workers each get their own threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='graphql-root-field'
+                    )
+        return self._executor
+
+    @property
+    def queue_depth(self):
+        """Root fields waiting for a free pool thread."""
+        executor = self._executor
+        return executor._work_queue.qsize() if executor is not None else 0
+
+    def submit(self, fn, *args):
+        return self.executor.submit(run_with_connection_cleanup, fn, *args)
+
+
+def run_with_connection_cleanup(fn, *args):
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+root_field_pool = RootFieldPool(max_workers=_parallel_settings.get('MAX_WORKERS', 4))
+
+
+class ParallelBatchingExecutionContext(BatchingExecutionContext):
+    pool = root_field_pool
+
+    def execute_fields(self, parent_type, source_value, path, fields):
+        if (
+            path is not None
+            or self._eager
+            or len(fields) < 2
+            or connection.in_atomic_block
+        ):
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        names = list(fields)
+        futures = {
+            name: self.pool.submit(
+                self._execute_root_field,
+                parent_type, source_value, fields[name], Path(None, name, parent_type.name),
+            )
+            for name in names[1:]
+        }
+        first = names[0]
+        results = {
+            first: self.execute_root_field(
+                parent_type, source_value, fields[first], Path(None, first, parent_type.name)
+            )
+        }
+        for name, future in futures.items():
+            results[name] = future.result()
+
+        return {
+            name: results[name]
+            for name in names
+            if results[name] is not Undefined
+        }
+
+    def _execute_root_field(self, parent_type, source_value, field_nodes, path):
+        with recording(self.context_value):
+            return self.execute_root_field(parent_type, source_value, field_nodes, path)
@@ -0,0 +1,122 @@
+"""
+Persisted GraphQL queries for ``/graphql/``.
+
+Clients that speak Apollo's automatic persisted queries (APQ) send
+``extensions.persistedQuery.sha256Hash`` instead of the query text. The store
+resolves the hash from the build-time allowlist or, in ``apq`` mode, from the
+Django cache. An unknown hash answers ``PersistedQueryNotFound``; the client
+then retries once with both the text and the hash, which registers the
+document for everyone else.
+
+In ``allowlist`` mode only documents listed in the allowlist file (written by
+``manage.py build_persisted_queries``) are executed, whether they arrive as a
+hash or as text, so unknown queries are rejected before they are parsed.
+
+Settings: ``GRAPHQL_PERSISTED_QUERIES``.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError
+
+logger = logging.getLogger(__name__)
+
+_persisted_settings = getattr(settings, 'GRAPHQL_PERSISTED_QUERIES', {})
+
+APQ = 'apq'
+ALLOWLIST = 'allowlist'
+KEY_PREFIX = 'apq:v1:'
+
+
+def query_digest(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+class PersistedQueryError(GraphQLError):
+    def __init__(self, message, code):
+        super().__init__(message, extensions={'code': code})
+
+
+class PersistedQueryStore:
+    def __init__(self, mode=APQ, cache_alias='default', timeout=None, allowlist_path=None):
+        self.mode = mode
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.allowlist_path = allowlist_path
+        self._allowlist = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def allowlist(self):
+        if self._allowlist is None:
+            with self._lock:
+                if self._allowlist is None:
+                    self._allowlist = self._load_allowlist()
+        return self._allowlist
+
+    def _load_allowlist(self):
+        if not self.allowlist_path:
+            return {}
+        try:
+            with open(self.allowlist_path, encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            if self.mode == ALLOWLIST:
+                logger.warning('Persisted query allowlist %s not found; every query will be rejected',
+                               self.allowlist_path)
+            return {}
+
+    def reload(self):
+        with self._lock:
+            self._allowlist = None
+
+    def lookup(self, sha256_hash):
+        query = self.allowlist.get(sha256_hash)
+        if query is None and self.mode == APQ:
+            query = caches[self.cache_alias].get(KEY_PREFIX + sha256_hash)
+        if query is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return query
+
+    def register(self, sha256_hash, query):
+        if sha256_hash not in self.allowlist:
+            caches[self.cache_alias].set(KEY_PREFIX + sha256_hash, query, self.timeout)
+
+    def resolve(self, query, sha256_hash):
+        """
+        Return the query text to execute for a request carrying ``query`` and/or
+        ``sha256_hash``, or raise ``PersistedQueryError``.
+        """
+        if sha256_hash and not query:
+            query = self.lookup(sha256_hash)
+            if query is None:
+                if self.mode == ALLOWLIST:
+                    raise PersistedQueryError('PersistedQueryNotAllowed', 'PERSISTED_QUERY_NOT_ALLOWED')
+                raise PersistedQueryError('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND')
+            return query
+
+        if sha256_hash and query_digest(query) != sha256_hash:
+            raise PersistedQueryError('provided sha does not match query', 'PERSISTED_QUERY_HASH_MISMATCH')
+
+        if self.mode == ALLOWLIST:
+            if query and (sha256_hash or query_digest(query)) not in self.allowlist:
+                raise PersistedQueryError('PersistedQueryNotAllowed', 'PERSISTED_QUERY_NOT_ALLOWED')
+        elif sha256_hash:
+            self.register(sha256_hash, query)
+        return query
+
+
+persisted_queries = PersistedQueryStore(
+    mode=_persisted_settings.get('MODE', APQ),
+    cache_alias=_persisted_settings.get('CACHE_ALIAS', 'default'),
+    timeout=_persisted_settings.get('TIMEOUT'),
+    allowlist_path=_persisted_settings.get('ALLOWLIST'),
+)
@@ -0,0 +1,145 @@
+"""
+Static depth and cost analysis of GraphQL operations, run before execution.
+
+The cost of a field is its weight plus, for object fields, the cost of its
+selections (each object counts 1) times the number of items the field is
+expected to return:
+
+* an explicit ``limit`` / ``first`` / ``last`` argument (literal or variable)
+  is used as the item count,
+* otherwise ``list_size`` from ``QUERY_COST['FIELDS']``, or
+  ``filtered_list_size`` when one of the field's narrowing ``filters``
+  arguments is given, or ``DEFAULT_LIST_SIZE``.
+
+A Relay connection field is one object, and its ``first`` (capped at the
+pagination ``MAX_PAGE_SIZE``) is the item count of its ``edges``.
+
+Leaf fields cost nothing unless weighted, and introspection fields are ignored.
+The total is checked against the budget for the caller's role. The depth is
+checked against ``MAX_DEPTH``. A query over either limit is answered with a
+structured error (``QUERY_TOO_COMPLEX``) and never executed.
+"""
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+    is_list_type,
+    value_from_ast_untyped,
+)
+
+from .pagination import MAX_PAGE_SIZE, is_connection_type
+
+_cost_settings = getattr(settings, 'QUERY_COST', {})
+MAX_DEPTH = _cost_settings.get('MAX_DEPTH', 10)
+DEFAULT_LIST_SIZE = _cost_settings.get('DEFAULT_LIST_SIZE', 50)
+BUDGETS = _cost_settings.get('BUDGETS', {})
+FIELDS = _cost_settings.get('FIELDS', {})
+SIZE_ARGUMENTS = ('limit', 'first', 'last')
+
+
+class QueryCostAnalyzer:
+    def __init__(self, schema, document, variables=None, fields=None, default_list_size=DEFAULT_LIST_SIZE):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fields = FIELDS if fields is None else fields
+        self.default_list_size = default_list_size
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+
+    def analyze(self, operation):
+        """Return ``(cost, depth)`` for ``operation`` (an OperationDefinitionNode)."""
+        root_type = self.schema.get_root_type(operation.operation)
+        return self._selection_cost(root_type, operation.selection_set, 0)
+
+    def _fields(self, parent_type, selection_set):
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield parent_type, selection
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                yield from self._fields(fragment_type, selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                    yield from self._fields(fragment_type, fragment.selection_set)
+
+    def _argument(self, node, name):
+        for argument in node.arguments or ():
+            if argument.name.value == name:
+                return value_from_ast_untyped(argument.value, self.variables)
+        return None
+
+    def _list_size(self, node, config):
+        for name in SIZE_ARGUMENTS:
+            value = self._argument(node, name)
+            if isinstance(value, int) and value >= 0:
+                return value
+        if config.get('filters') and any(self._argument(node, name) not in (None, '') for name in config['filters']):
+            return config.get('filtered_list_size', config.get('list_size', self.default_list_size))
+        return config.get('list_size', self.default_list_size)
+
+    def _selection_cost(self, parent_type, selection_set, depth, page_size=None):
+        cost, max_depth = 0, depth
+        for field_parent, node in self._fields(parent_type, selection_set):
+            name = node.name.value
+            if name.startswith('__'):
+                continue
+            field = getattr(field_parent, 'fields', {}).get(name)
+            if field is None:
+                continue
+            config = self.fields.get(f'{field_parent.name}.{name}', {})
+            field_cost = config.get('cost', 0)
+            return_type = get_named_type(field.type)
+            if node.selection_set is not None and not is_leaf_type(return_type):
+                child_page_size = None
+                if is_connection_type(return_type):
+                    child_page_size = min(self._list_size(node, config), MAX_PAGE_SIZE)
+                child_cost, child_depth = self._selection_cost(return_type, node.selection_set, depth + 1,
+                                                               child_page_size)
+                if not is_list_type(get_nullable_type(field.type)):
+                    multiplier = 1
+                elif name == 'edges' and page_size is not None:
+                    multiplier = page_size
+                else:
+                    multiplier = self._list_size(node, config)
+                field_cost += multiplier * (1 + child_cost)
+                max_depth = max(max_depth, child_depth)
+            else:
+                max_depth = max(max_depth, depth + 1)
+            cost += field_cost
+        return cost, max_depth
+
+
+def budget_for(user):
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return BUDGETS.get('ANONYMOUS', BUDGETS.get('DEFAULT'))
+    return BUDGETS.get(getattr(user, 'role', None), BUDGETS.get('DEFAULT'))
+
+
+def check_query_cost(schema, document, operation, variables, user):
+    """Return a GraphQLError if ``operation`` is over the depth limit or ``user``'s budget."""
+    cost, depth = QueryCostAnalyzer(schema, document, variables).analyze(operation)
+    if MAX_DEPTH and depth > MAX_DEPTH:
+        return GraphQLError(
+            f"Query depth {depth} exceeds the maximum of {MAX_DEPTH}",
+            extensions={'code': 'QUERY_TOO_COMPLEX', 'depth': depth, 'maxDepth': MAX_DEPTH},
+        )
+    budget = budget_for(user)
+    if budget is not None and cost > budget:
+        return GraphQLError(
+            f"Query cost {cost} exceeds the budget of {budget}; narrow the query with filters or limits",
+            extensions={'code': 'QUERY_TOO_COMPLEX', 'cost': cost, 'budget': budget},
+        )
+    return None
@@ -48,12 +48,14 @@ INSTALLED_APPS = [
     'Pastor',
     'churchMember',
     'ChurchSecreatary',
+    'Monitoring',
     'graphql_jwt',
     'graphql_jwt.refresh_token.apps.RefreshTokenConfig',
     'corsheaders',
     ]
 
 MIDDLEWARE = [
+    'Monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +72,7 @@ GRAPHENE = {
     'MIDDLEWARE': [
         'graphql_jwt.middleware.JSONWebTokenMiddleware',
         "churchMember.User_Auth_middleware.JWTAuthenticationMiddleware",
+        "Monitoring.tracing.ResolverTracingMiddleware",
     ],
 }
 
@@ -119,6 +122,185 @@ JWT_AUTH = {
     'JWT_REFRESH_EXPIRATION_DELTA': datetime.timedelta(days=7),
 }
 
+# In-process cache of verified JWTs (UserAuthentication.tokens.verify_token)
+AUTH_TOKEN_CACHE = {
+    'MAX_ENTRIES': 4096,
+    'MAX_AGE': 300,  # seconds; entries also expire at the token's own exp
+}
+
+# Two-tier cache of member identity records (UserAuthentication.identity).
+# CACHE_ALIAS must be shared by all workers (see CACHE_URL) for them to see
+# invalidations; a process-local alias caps SHARED_TTL at LOCAL_TTL.
+IDENTITY_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 600,
+    'MAX_ENTRIES': 4096,
+}
+
+# Concurrent password checks for LoginUser across all workers
+# (UserAuthentication.login_pool); logins beyond MAX_PENDING in-flight hashes are
+# rejected with LOGIN_BUSY. The default leaves half the web workers free for
+# other requests. CACHE_ALIAS must be shared by all workers (see CACHE_URL), or
+# sync workers, which serve one request each, never reach the cap.
+LOGIN_HASH_POOL = {
+    'MAX_PENDING': config('LOGIN_MAX_PENDING', default=max(1, config('WEB_CONCURRENCY', default=1, cast=int) // 2),
+                          cast=int),
+    'CACHE_ALIAS': 'default',
+    'HOLD_TIMEOUT': 30,  # seconds before a dead worker's slot is freed
+}
+
+# Bloom filter in front of the RevokedToken denylist (UserAuthentication.revocation).
+# Revocations made by other workers are picked up within SYNC_INTERVAL seconds;
+# each sync re-reads the last SYNC_OVERLAP seconds for rows that committed late.
+# Tokens without jti/type claims (issued before revocation existed) cannot be
+# revoked and are rejected from LEGACY_TOKENS_UNTIL (an ISO 8601 timestamp) on.
+TOKEN_REVOCATION = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,
+    'SYNC_OVERLAP': 60,
+    'LEGACY_TOKENS_UNTIL': config('LEGACY_TOKENS_UNTIL', default='2026-10-25T00:00:00+00:00'),
+}
+
+# Parsed + validated GraphQL documents (SmartChurch.graphql_view.document_cache).
+# SCHEMA_VERSION defaults to a hash of the printed schema.
+GRAPHQL_DOCUMENT_CACHE = {
+    'MAX_ENTRIES': 1000,
+    'SCHEMA_VERSION': None,
+}
+
+# Persisted queries for /graphql/ (SmartChurch.persisted_queries). MODE 'apq'
+# registers unknown hashes on demand; 'allowlist' only runs documents listed in
+# ALLOWLIST, written by `manage.py build_persisted_queries`.
+# In apq mode CACHE_ALIAS must be shared by all workers (see CACHE_URL), or a
+# hash registered on one worker is unknown to the rest.
+GRAPHQL_PERSISTED_QUERIES = {
+    'MODE': config('GRAPHQL_PERSISTED_QUERIES_MODE', default='apq'),
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60 * 60 * 24 * 30,
+    'ALLOWLIST': os.path.join(BASE_DIR, 'persisted_queries.json'),
+    'GET_MAX_AGE': 60,
+}
+
+# Static query cost limits (SmartChurch.query_cost). FIELDS keys are
+# 'Type.fieldName': cost is the field's own weight, list_size the expected item
+# count when no limit/first/last argument is given (filtered_list_size when one
+# of the narrowing filters is).
+QUERY_COST = {
+    'MAX_DEPTH': 10,
+    'DEFAULT_LIST_SIZE': 50,
+    'BUDGETS': {
+        'ANONYMOUS': 300,
+        'CHURCH_MEMBER': 1500,
+        'EVANGELIST': 3000,
+        'ASSISTANT_PASTOR': 5000,
+        'CHURCH_SECRETARY': 10000,
+        'PASTOR': 10000,
+        'DEFAULT': 1500,
+    },
+    'FIELDS': {
+        'RootQuery.offeringCards': {'cost': 10, 'list_size': 3000, 'filtered_list_size': 300,
+                                    'filters': ('streetId', 'search')},
+        'RootQuery.availableCardNumbers': {'cost': 5, 'list_size': 1000, 'filtered_list_size': 100,
+                                           'filters': ('streetId',)},
+        'RootQuery.cardsOverview': {'cost': 20},
+        'RootQuery.cardApplications': {'list_size': 200},
+        'RootQuery.memberRequests': {'list_size': 200},
+        'RootQuery.secretaryTasks': {'list_size': 100},
+        'RootQuery.announcements': {'list_size': 200},
+        'RootQuery.prayerRequests': {'list_size': 10},
+        'RootQuery.recentMembers': {'list_size': 5},
+        'RootQuery.upcomingEvents': {'list_size': 5},
+        'RootQuery.dashboardStats': {'cost': 10},
+        'RootQuery.offeringStats': {'cost': 10},
+        'RootQuery.offeringsByMass': {'cost': 10, 'list_size': 5},
+        'RootQuery.offeringsByType': {'cost': 10, 'list_size': 6},
+        'RootQuery.offeringsByStreet': {'cost': 10},
+        'RootQuery.memberOfferingHistory': {'cost': 10},
+        'RootQuery.offeringCardsConnection': {'cost': 10},
+        'RootQuery.availableCardNumbersConnection': {'cost': 5},
+        'PrayerRequest.replies': {'list_size': 5},
+        'MemberType.groups': {'list_size': 5},
+    },
+}
+
+# Relay connection fields (SmartChurch.pagination): page size when no `first`
+# is given, and the largest page a client can ask for.
+GRAPHQL_PAGINATION = {
+    'DEFAULT_PAGE_SIZE': 50,
+    'MAX_PAGE_SIZE': 200,
+}
+
+# Encoder for GraphQL responses (SmartChurch.json_encoding): 'auto' uses
+# orjson when installed, 'json' forces the standard library, or give the
+# dotted path of a class with encode(data, pretty=False) -> bytes.
+GRAPHQL_JSON = {
+    'ENCODER': config('GRAPHQL_JSON_ENCODER', default='auto'),
+}
+
+# Per-operation SQL recording (Monitoring.sql). A fingerprint repeated
+# N_PLUS_ONE_THRESHOLD times in one operation is logged as a likely N+1; staff
+# sending DEBUG_HEADER get the numbers in the response's extensions.sql.
+SQL_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'N_PLUS_ONE_THRESHOLD': 10,
+    'DEBUG_HEADER': 'X-Debug-SQL',
+    'MAX_OPERATIONS': 200,
+}
+
+# Slow-query log (Monitoring.slow_queries). SQL statements slower than
+# THRESHOLD_MS during a GraphQL operation are stored with their plan in the
+# Monitoring SlowQuery table (admin), trimmed to the newest MAX_ROWS.
+SLOW_QUERY_LOG = {
+    'ENABLED': config('SLOW_QUERY_LOG', default=False, cast=bool),
+    'THRESHOLD_MS': config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=int),
+    'EXPLAIN': True,
+    'MAX_ROWS': 1000,
+    'MAX_PENDING': 100,
+}
+
+# Shared metrics registry (Monitoring.registry), scraped at /metrics/. Every
+# process writes its own mmap file in DIRECTORY, which all workers of one
+# deployment must share. Without DIRECTORY metrics stay in process memory, which
+# only works for a single process, so it is required when WORKERS (gunicorn's
+# WEB_CONCURRENCY) is above 1. Scrapers authenticate with TOKEN as a Bearer
+# token.
+METRICS = {
+    'DIRECTORY': config('METRICS_DIR', default=''),
+    'WORKERS': config('WEB_CONCURRENCY', default=1, cast=int),
+    'TOKEN': config('METRICS_TOKEN', default=''),
+    'SYNC_INTERVAL': 5,  # seconds between copies of in-process counters
+    'MAX_OPERATIONS': 100,  # distinct GraphQL operation labels per process
+}
+
+# Resolver latency histograms (Monitoring.tracing), decided per request.
+TRACING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': config('TRACING_SAMPLE_RATE', default=0.1, cast=float),
+}
+
+# Root query fields fanned out to a thread pool by the sync view
+# (SmartChurch.parallel_execution). Off by default: each pool thread holds its
+# own DB connection, so only enable it once the database allows MAX_WORKERS
+# extra connections for every gunicorn worker process.
+GRAPHQL_PARALLEL_ROOT_FIELDS = {
+    'ENABLED': config('GRAPHQL_PARALLEL_ROOT_FIELDS', default=False, cast=bool),
+    'MAX_WORKERS': 4,
+}
+
+# Serve /graphql/ with AsyncSmartChurchGraphQLView (root query fields resolved
+# concurrently). asgi.py turns this on; the WSGI app keeps the sync view.
+GRAPHQL_ASYNC = config('GRAPHQL_ASYNC', default=False, cast=bool)
+
+# Threads the async view resolves root fields on (SmartChurch.async_execution).
+# Each holds its own DB connection, so an ASGI process uses up to MAX_WORKERS
+# connections for root fields plus one for mutations and request setup.
+GRAPHQL_ASYNC_ROOT_FIELDS = {
+    'MAX_WORKERS': 4,
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     'http://127.0.0.1:5173',
@@ -168,6 +350,26 @@ DATABASES = {
     }
 }
 
+# Cache shared by every worker: identity records (UserAuthentication.identity)
+# and automatic persisted queries. Set CACHE_URL (redis://host:6379/0) in
+# production. Without it each process gets its own LocMemCache; `manage.py
+# check` warns about that and identity records are then only kept for
+# IDENTITY_CACHE['LOCAL_TTL'] seconds.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 
 
@@ -245,18 +447,49 @@ LOCALE_PATHS = [
     os.path.join(BASE_DIR, 'locale'),
 ]
 
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+
+# Records are queued and written by a background thread (SmartChurch.logging_setup);
+# hot-path loggers are sampled below WARNING.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'SmartChurch.logging_setup.SamplingFilter',
+            'rates': {
+                'churchMember.User_Auth_middleware': 0.01,
+                'UserAuthentication.queries': 0.1,
+            },
+        },
+    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'queue': {
+            '()': 'SmartChurch.logging_setup.BackgroundQueueHandler',
+            'maxsize': 10000,
+            'structured': True,
+            'filters': ['sampling'],
         },
     },
+    'root': {
+        'handlers': ['queue'],
+        'level': 'WARNING',
+    },
     'loggers': {
+        'django': {
+            'level': 'INFO',
+        },
         'UserAuthentication': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
+        },
+        'churchMember': {
+            'level': LOG_LEVEL,
+        },
+        'Pastor': {
+            'level': LOG_LEVEL,
+        },
+        'ChurchSecreatary': {
+            'level': LOG_LEVEL,
         },
     },
 }
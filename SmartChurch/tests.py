@@ -0,0 +1,334 @@
+import asyncio
+import datetime
+import decimal
+import json
+import logging
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import graphene
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from graphql import execute, parse
+
+from . import graphql_view, parallel_execution, persisted_queries as apq
+from .async_execution import AsyncBatchingExecutionContext
+from .checks import check_persisted_query_cache
+from .dataloader import BatchingExecutionContext, DataLoader, get_loader
+from .graphql_view import DocumentCache
+from .json_encoding import ENCODERS, orjson
+from .logging_setup import BackgroundQueueHandler, SamplingFilter, StructuredFormatter
+from .query_cost import QueryCostAnalyzer
+from .parallel_execution import ParallelBatchingExecutionContext, RootFieldPool
+from .projection import record_type
+
+
+def log_record(name='churchMember.views', level=logging.INFO, msg='hello %s', args=('world',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LoggingTests(SimpleTestCase):
+    def test_sampling_keeps_warnings_and_uses_longest_prefix(self):
+        sampling = SamplingFilter(rates={'churchMember': 0.0, 'churchMember.views': 1.0})
+        self.assertTrue(sampling.filter(log_record('churchMember.views')))
+        self.assertFalse(sampling.filter(log_record('churchMember.auth')))
+        self.assertTrue(sampling.filter(log_record('churchMember.auth', level=logging.WARNING)))
+        self.assertTrue(sampling.filter(log_record('Pastor.queries')))
+
+    def test_structured_formatter_includes_extra_fields(self):
+        line = json.loads(StructuredFormatter().format(log_record(operation='Dashboard')))
+        self.assertEqual((line['msg'], line['level'], line['operation']), ('hello world', 'INFO', 'Dashboard'))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = BackgroundQueueHandler(maxsize=1)
+        handler.listener.stop()
+        try:
+            handler.handle(log_record())
+            handler.handle(log_record())
+            self.assertEqual(handler.dropped, 1)
+            self.assertEqual(handler.queue.get_nowait().msg, 'hello world')
+        finally:
+            handler.listener = None
+            handler.close()
+
+
+class NameLoader(DataLoader):
+    calls = []
+
+    def batch_load(self, keys):
+        self.calls.append(list(keys))
+        return [f'child {key}' for key in keys]
+
+
+class FailingLoader(DataLoader):
+    def batch_load(self, keys):
+        raise ValueError('lookup failed')
+
+
+class Child(graphene.ObjectType):
+    id = graphene.Int(required=True)
+    name = graphene.String(required=True)
+    note = graphene.String()
+
+    def resolve_name(root, info):
+        return get_loader(info, FailingLoader if root.id == 2 else NameLoader).load(root.id)
+
+    def resolve_note(root, info):
+        return get_loader(info, FailingLoader).load(root.id)
+
+
+class Parent(graphene.ObjectType):
+    children = graphene.List(graphene.NonNull(Child))
+    title = graphene.String()
+
+    def resolve_children(root, info):
+        return [Child(id=1), Child(id=2), Child(id=3)]
+
+    def resolve_title(root, info):
+        return 'parent'
+
+
+class LoaderQuery(graphene.ObjectType):
+    parent = graphene.Field(Parent)
+    strict_parent = graphene.Field(graphene.NonNull(Parent))
+    child = graphene.Field(graphene.NonNull(Child), id=graphene.Int(required=True))
+
+    def resolve_parent(root, info):
+        return Parent()
+
+    def resolve_strict_parent(root, info):
+        return Parent()
+
+    def resolve_child(root, info, id):
+        return Child(id=id)
+
+
+loader_schema = graphene.Schema(query=LoaderQuery)
+
+
+def run_batched(document, context_class=BatchingExecutionContext):
+    return execute(loader_schema.graphql_schema, parse(document), context_value=SimpleNamespace(),
+                   execution_context_class=context_class)
+
+
+class DeferredFieldTests(SimpleTestCase):
+    def setUp(self):
+        NameLoader.calls = []
+
+    def test_loads_of_one_level_are_batched(self):
+        result = run_batched('{ a: child(id: 1) { name } b: child(id: 3) { name } }')
+        self.assertEqual(result.data, {'a': {'name': 'child 1'}, 'b': {'name': 'child 3'}})
+        self.assertEqual(NameLoader.calls[-1], [1, 3])
+
+    def test_failed_nullable_field_is_null(self):
+        result = run_batched('{ child(id: 1) { name note } }')
+        self.assertEqual(result.data, {'child': {'name': 'child 1', 'note': None}})
+        self.assertEqual([error.path for error in result.errors], [['child', 'note']])
+
+    def test_failed_non_null_field_nulls_nearest_nullable_ancestor(self):
+        result = run_batched('{ parent { title children { id name } } strictParent { title children { name } } }')
+        self.assertEqual(result.data, {
+            'parent': {'title': 'parent', 'children': None},
+            'strictParent': {'title': 'parent', 'children': None},
+        })
+        self.assertEqual(sorted(error.path for error in result.errors),
+                         [['parent', 'children', 1, 'name'], ['strictParent', 'children', 1, 'name']])
+
+    def test_failure_without_nullable_ancestor_nulls_data(self):
+        for context_class in (BatchingExecutionContext, ParallelBatchingExecutionContext):
+            with self.subTest(context_class=context_class.__name__):
+                result = run_batched('{ parent { title } child(id: 2) { name } }', context_class)
+                self.assertIsNone(result.data)
+                self.assertEqual([error.path for error in result.errors], [['child', 'name']])
+
+
+class DocumentCacheTests(SimpleTestCase):
+    def test_valid_documents_are_reused(self):
+        cache = DocumentCache(max_entries=1)
+        document, errors = cache.get(loader_schema.graphql_schema, '{ parent { title } }')
+        self.assertIsNone(errors)
+        self.assertIs(cache.get(loader_schema.graphql_schema, '{ parent { title } }')[0], document)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.get(loader_schema.graphql_schema, '{ child(id: 1) { name } }')
+        self.assertEqual(len(cache), 1)
+
+    def test_invalid_documents_are_not_cached(self):
+        cache = DocumentCache()
+        for _ in range(2):
+            self.assertTrue(cache.get(loader_schema.graphql_schema, '{ parent { missing } }')[1])
+        self.assertEqual((len(cache), cache.misses), (0, 2))
+
+    def test_new_schema_clears_the_cache(self):
+        cache = DocumentCache()
+        cache.get(loader_schema.graphql_schema, '{ parent { title } }')
+        other = graphene.Schema(query=LoaderQuery, types=[graphene.Enum('Extra', [('A', 1)])])
+        cache.get(other.graphql_schema, '{ child(id: 1) { id } }')
+        self.assertEqual(len(cache), 1)
+
+
+def post_graphql(client, body):
+    return client.post('/graphql/', json.dumps(body), content_type='application/json').json()
+
+
+class PersistedQueryTests(SimpleTestCase):
+    QUERY = '{ __typename }'
+
+    def setUp(self):
+        self.store = apq.PersistedQueryStore(mode=apq.APQ)
+        for module in (apq, graphql_view):
+            patcher = mock.patch.object(module, 'persisted_queries', self.store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(caches['default'].clear)
+
+    def persisted(self, sha256_hash, query=None):
+        body = {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha256_hash}}}
+        if query is not None:
+            body['query'] = query
+        return post_graphql(self.client, body)
+
+    def test_unknown_hash_is_registered_by_the_retry(self):
+        digest = apq.query_digest(self.QUERY)
+        self.assertEqual(self.persisted(digest)['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+        self.assertEqual(self.persisted(digest, self.QUERY)['data'], {'__typename': 'RootQuery'})
+        self.assertEqual(self.persisted(digest)['data'], {'__typename': 'RootQuery'})
+
+    def test_hash_must_match_the_query(self):
+        data = self.persisted(apq.query_digest('{ other }'), self.QUERY)
+        self.assertEqual(data['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_HASH_MISMATCH')
+
+    def test_allowlist_mode_rejects_unlisted_queries(self):
+        self.store.mode = apq.ALLOWLIST
+        self.store._allowlist = {apq.query_digest(self.QUERY): self.QUERY}
+        self.assertEqual(self.persisted(apq.query_digest(self.QUERY))['data'], {'__typename': 'RootQuery'})
+        data = post_graphql(self.client, {'query': '{ __schema { queryType { name } } }'})
+        self.assertEqual(data['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_ALLOWED')
+
+    def test_process_local_apq_cache_is_reported(self):
+        self.assertEqual([w.id for w in check_persisted_query_cache(None)], ['SmartChurch.W002'])
+        self.store.mode = apq.ALLOWLIST
+        self.assertEqual(check_persisted_query_cache(None), [])
+
+
+class QueryCostTests(SimpleTestCase):
+    def analyze(self, query, variables=None, fields=None):
+        document = parse(query)
+        analyzer = QueryCostAnalyzer(loader_schema.graphql_schema, document, variables, fields=fields or {},
+                                     default_list_size=10)
+        return analyzer.analyze(document.definitions[0])
+
+    def test_list_size_comes_from_limits_and_configuration(self):
+        self.assertEqual(self.analyze('{ parent { children { id } } }'), (11, 3))
+        self.assertEqual(self.analyze('{ parent { children { id } } }',
+                                      fields={'Parent.children': {'cost': 5, 'list_size': 3}}), (1 + 5 + 3, 3))
+
+    def test_fragments_are_counted(self):
+        query = '{ parent { ...kids } } fragment kids on Parent { children { ... on Child { id } } }'
+        self.assertEqual(self.analyze(query), (11, 3))
+
+    def test_over_budget_query_is_rejected_before_execution(self):
+        query = '{ offeringCards { id } offeringCardsConnection(first: 5) { edges { node { id } } } }'
+        with mock.patch('ChurchSecreatary.queries._offering_cards') as offering_cards:
+            data = post_graphql(self.client, {'query': query})
+        self.assertEqual(data['errors'][0]['extensions']['code'], 'QUERY_TOO_COMPLEX')
+        self.assertEqual(data['errors'][0]['extensions']['budget'], 300)
+        offering_cards.assert_not_called()
+
+
+class AsyncRootFieldTests(SimpleTestCase):
+    def test_root_fields_share_a_bounded_pool(self):
+        pool = RootFieldPool(max_workers=1)
+        self.addCleanup(lambda: pool.executor.shutdown())
+        with mock.patch.object(AsyncBatchingExecutionContext, 'pool', pool), \
+                mock.patch('SmartChurch.parallel_execution.close_old_connections') as close_old_connections:
+            result = asyncio.run(run_batched('{ a: child(id: 1) { name } b: child(id: 3) { name } parent { title } }',
+                                             AsyncBatchingExecutionContext))
+        self.assertEqual(result.data, {'a': {'name': 'child 1'}, 'b': {'name': 'child 3'},
+                                       'parent': {'title': 'parent'}})
+        self.assertEqual(len(pool.executor._threads), 1)
+        self.assertEqual(close_old_connections.call_count, 3)
+
+
+class ParallelRootFieldTests(SimpleTestCase):
+    def test_sync_view_is_serial_by_default(self):
+        self.assertFalse(graphql_view.PARALLEL_ROOT_FIELDS)
+        self.assertIs(graphql_view.SmartChurchGraphQLView.execution_context_class, BatchingExecutionContext)
+
+    def test_root_fields_after_the_first_go_to_the_pool(self):
+        pool = RootFieldPool(max_workers=2)
+        self.addCleanup(lambda: pool.executor.shutdown())
+        with mock.patch.object(ParallelBatchingExecutionContext, 'pool', pool), \
+                mock.patch.object(pool, 'submit', wraps=pool.submit) as submit, \
+                mock.patch.object(parallel_execution, 'close_old_connections'):
+            result = run_batched('{ a: child(id: 1) { name } b: child(id: 3) { name } parent { title } }',
+                                 ParallelBatchingExecutionContext)
+        self.assertEqual(result.data, {'a': {'name': 'child 1'}, 'b': {'name': 'child 3'},
+                                       'parent': {'title': 'parent'}})
+        self.assertEqual(submit.call_count, 2)
+
+
+class Row(graphene.ObjectType):
+    name = graphene.String()
+    number = graphene.Int()
+
+
+class RowQuery(graphene.ObjectType):
+    rows = graphene.List(Row)
+
+    def resolve_rows(root, info):
+        return [record_type(Row)(name=f'row {number}', number=number) for number in range(3)]
+
+
+row_schema = graphene.Schema(query=RowQuery)
+
+
+class RecordFastPathTests(SimpleTestCase):
+    def run_rows(self, sampled):
+        fields = []
+
+        def spy(next, root, info, **kwargs):
+            fields.append(f'{info.parent_type.name}.{info.field_name}')
+            return next(root, info, **kwargs)
+
+        result = execute(row_schema.graphql_schema, parse('{ rows { name number } }'), middleware=[spy],
+                         context_value=SimpleNamespace(_trace_resolvers=sampled),
+                         execution_context_class=BatchingExecutionContext)
+        self.assertEqual(result.data['rows'][2], {'name': 'row 2', 'number': 2})
+        return fields
+
+    def test_record_leaves_skip_resolvers_when_not_sampled(self):
+        self.assertEqual(self.run_rows(sampled=False), ['RowQuery.rows'])
+
+    def test_sampled_requests_run_field_middleware(self):
+        self.assertEqual(self.run_rows(sampled=True).count('Row.name'), 3)
+
+
+class JsonEncodingTests(SimpleTestCase):
+    DATA = {
+        'amount': decimal.Decimal('1500.50'),
+        'date': datetime.date(2026, 10, 4),
+        'at': datetime.datetime(2026, 10, 4, 9, 30),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'name': 'Neema Mkuu',
+        'tags': ('choir',),
+    }
+    EXPECTED = {'amount': 1500.5, 'date': '2026-10-04', 'at': '2026-10-04T09:30:00',
+                'id': '12345678-1234-5678-1234-567812345678', 'name': 'Neema Mkuu', 'tags': ['choir']}
+
+    def check_encoder(self, name):
+        encoder = ENCODERS[name]()
+        self.assertEqual(json.loads(encoder.encode(self.DATA)), self.EXPECTED)
+        self.assertEqual(json.loads(encoder.encode(self.DATA, pretty=True)), self.EXPECTED)
+        self.assertIn('é'.encode('utf-8'), encoder.encode({'name': 'é'}))
+
+    def test_stdlib_encoder(self):
+        self.check_encoder('json')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_encoder_matches_stdlib(self):
+        self.check_encoder('orjson')
+        self.assertEqual(ENCODERS['orjson']().encode(self.DATA), ENCODERS['json']().encode(self.DATA))
@@ -18,15 +18,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from graphene_django.views import GraphQLView
 from SmartChurch.main_schema import schema
+from SmartChurch.graphql_view import AsyncSmartChurchGraphQLView, SmartChurchGraphQLView
 from django.views.decorators.csrf import csrf_exempt
 from churchMember.views import upload_media
 
+graphql_view_class = AsyncSmartChurchGraphQLView if settings.GRAPHQL_ASYNC else SmartChurchGraphQLView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql/", csrf_exempt(graphql_view_class.as_view(graphiql=True))),
     path('api/upload/', upload_media, name='upload_media'),
+    path('metrics/', include('Monitoring.urls')),
 ]
 
 # if settings.DEBUG:
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import Member
+from .models import Member, RevokedToken
 
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
     list_display = ('email', 'full_name', 'role', 'is_active', 'is_staff')
     list_filter = ('role', 'is_active', 'is_staff')
-    search_fields = ('email', 'full_name')
\ No newline at end of file
+    search_fields = ('email', 'full_name')
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'member', 'expires_at', 'revoked_at')
+    search_fields = ('jti', 'member__email')
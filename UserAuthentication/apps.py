@@ -1 +1,10 @@
+from django.apps import AppConfig
 
+
+class UserauthenticationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'UserAuthentication'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from SmartChurch import checks  # noqa: F401
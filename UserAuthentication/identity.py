@@ -0,0 +1,154 @@
+"""
+Cached identity records for authenticated members.
+
+Authenticating a request only needs a handful of Member columns, so instead of
+loading the full row every time we keep an identity record (id, email,
+full_name, role, street_id, group ids and flags) in two tiers:
+
+* an in-process LRU with a short TTL, which bounds how long another gunicorn
+  worker can serve a record after a change it did not see, and
+* the shared Django cache (``IDENTITY_CACHE['CACHE_ALIAS']``), which the
+  ``UserAuthentication.signals`` handlers invalidate on save, delete and
+  ``Member.groups`` changes. Invalidations only reach other workers when that
+  cache really is shared (``CACHE_URL``); for a per-process ``LocMemCache``
+  records are kept for ``LOCAL_TTL`` instead of ``SHARED_TTL``, and a system
+  check warns (``SmartChurch.checks``).
+
+``member_from_identity`` turns a record into a Member instance whose remaining
+columns are deferred, so ``user.role`` or ``user.full_name`` never hit the
+database while ``created_by=user`` and lazy access to other fields still work.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from SmartChurch.checks import process_local_cache
+from .models import Member
+
+IDENTITY_FIELDS = ('id', 'email', 'full_name', 'role', 'street_id', 'is_active', 'is_staff', 'is_superuser')
+
+_identity_settings = getattr(settings, 'IDENTITY_CACHE', {})
+LOCAL_TTL = _identity_settings.get('LOCAL_TTL', 30)
+SHARED_TTL = _identity_settings.get('SHARED_TTL', 600)
+CACHE_ALIAS = _identity_settings.get('CACHE_ALIAS', 'default')
+KEY_PREFIX = 'identity:v1:'
+
+
+class LocalIdentityCache:
+    """Small thread-safe LRU with per-entry TTL for the in-process tier."""
+
+    def __init__(self, max_entries=4096, ttl=LOCAL_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user id -> (expires_at, identity)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def count_shared(self, hit):
+        """Count a lookup in the shared tier after a local miss."""
+        with self._lock:
+            if hit:
+                self.shared_hits += 1
+            else:
+                self.shared_misses += 1
+
+    def set(self, user_id, identity):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, identity)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_identities = LocalIdentityCache(max_entries=_identity_settings.get('MAX_ENTRIES', 4096))
+
+
+def _shared_cache():
+    return caches[CACHE_ALIAS]
+
+
+def shared_ttl():
+    """Lifetime of records in the shared tier: LOCAL_TTL unless the cache is shared."""
+    return LOCAL_TTL if process_local_cache(CACHE_ALIAS) else SHARED_TTL
+
+
+def _cache_key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def load_identity(user_id):
+    """Read the identity record for ``user_id`` straight from the database."""
+    row = Member.objects.filter(id=user_id).values(*IDENTITY_FIELDS).first()
+    if row is None:
+        return None
+    row['group_ids'] = list(
+        Member.groups.through.objects.filter(member_id=user_id).values_list('group_id', flat=True)
+    )
+    return row
+
+
+def get_identity(user_id):
+    """Return the cached identity dict for ``user_id`` (None if no such member)."""
+    identity = local_identities.get(user_id)
+    if identity is not None:
+        return identity
+    shared = _shared_cache()
+    identity = shared.get(_cache_key(user_id))
+    local_identities.count_shared(identity is not None)
+    if identity is None:
+        identity = load_identity(user_id)
+        if identity is None:
+            return None
+        shared.set(_cache_key(user_id), identity, shared_ttl())
+    local_identities.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id):
+    local_identities.delete(user_id)
+    _shared_cache().delete(_cache_key(user_id))
+
+
+def member_from_identity(identity):
+    """Build a Member whose non-identity columns are deferred until accessed."""
+    values = [identity[f.attname] for f in Member._meta.concrete_fields if f.attname in IDENTITY_FIELDS]
+    member = Member.from_db(DEFAULT_DB_ALIAS, IDENTITY_FIELDS, values)
+    member.group_ids = list(identity['group_ids'])
+    return member
+
+
+def get_member(user_id):
+    """Active Member for ``user_id`` built from the identity cache, or None."""
+    identity = get_identity(user_id)
+    if identity is None or not identity['is_active']:
+        return None
+    return member_from_identity(identity)
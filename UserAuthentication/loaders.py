@@ -0,0 +1,18 @@
+"""
+Request-scoped loaders for UserAuthentication relations; see SmartChurch.dataloader.
+"""
+from SmartChurch.dataloader import get_loader, load_many_related, load_related, ModelLoader
+
+from .models import Group
+
+
+def member_street(info, member):
+    return load_related(info, member, 'street')
+
+
+def member_groups(info, member):
+    # Members built from the identity cache already carry their group ids
+    group_ids = getattr(member, 'group_ids', None)
+    if group_ids is not None:
+        return get_loader(info, ModelLoader, Group).load_many(group_ids)
+    return load_many_related(info, member, 'groups')
@@ -0,0 +1,83 @@
+"""
+Bounded concurrency for password checks.
+
+PBKDF2 verification is deliberately slow, and a burst of logins used to
+occupy every worker for the full hash time. ``authenticate_member`` still
+verifies through ``django.contrib.auth.authenticate`` on the request thread,
+so ``AUTHENTICATION_BACKENDS``, the ``user_login_failed`` signal and hash
+upgrades behave as usual, but the number of logins hashing at once is capped
+by ``LOGIN_HASH_POOL['MAX_PENDING']``. Callers beyond that are rejected
+immediately with ``LoginPoolSaturated`` instead of queueing behind the storm.
+
+The sync gunicorn workers of the Procfile serve one request per process, so a
+per-process cap would never be reached. The slots are therefore keys in
+``LOGIN_HASH_POOL['CACHE_ALIAS']``, taken with an atomic ``cache.add()`` and
+shared by every worker; a slot whose holder died frees itself after
+``HOLD_TIMEOUT`` seconds. With a process-local cache (``CACHE_URL`` unset) the
+cap only applies within a process, and ``manage.py check`` warns about it.
+"""
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import caches
+
+_pool_settings = getattr(settings, 'LOGIN_HASH_POOL', {})
+CACHE_ALIAS = _pool_settings.get('CACHE_ALIAS', 'default')
+
+
+class LoginPoolSaturated(Exception):
+    """Raised when too many password checks are already running."""
+
+
+class LoginSlots:
+    def __init__(self, max_pending=16, cache_alias=CACHE_ALIAS, hold_timeout=30, key_prefix='login-slot'):
+        self.max_pending = max_pending
+        self.cache_alias = cache_alias
+        self.hold_timeout = hold_timeout
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        # This process's share, for the metrics endpoint
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _acquire(self):
+        cache = caches[self.cache_alias]
+        holder = uuid.uuid4().hex
+        # Random order spreads concurrent callers over the free slots
+        for index in random.sample(range(self.max_pending), self.max_pending):
+            key = f'{self.key_prefix}:{index}'
+            if cache.add(key, holder, timeout=self.hold_timeout):
+                return key
+        return None
+
+    @contextmanager
+    def slot(self):
+        key = self._acquire() if self.max_pending > 0 else None
+        if key is None:
+            with self._lock:
+                self.rejected += 1
+            raise LoginPoolSaturated()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            caches[self.cache_alias].delete(key)
+
+
+login_slots = LoginSlots(
+    max_pending=_pool_settings.get('MAX_PENDING', 16),
+    hold_timeout=_pool_settings.get('HOLD_TIMEOUT', 30),
+)
+
+
+def authenticate_member(request, email, password):
+    """``authenticate()`` ``email``/``password``, within the login slots shared by all workers."""
+    with login_slots.slot():
+        return authenticate(request, email=email, password=password)
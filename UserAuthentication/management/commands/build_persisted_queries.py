@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from graphql import GraphQLError, parse, validate
+
+from SmartChurch.main_schema import schema
+from SmartChurch.persisted_queries import query_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the persisted query allowlist from the frontend's GraphQL documents. "
+        "Accepts .graphql/.gql files (one document per file, hashed exactly as sent) "
+        "and Apollo persisted query manifests (.json), or directories containing them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'GRAPHQL_PERSISTED_QUERIES', {}).get('ALLOWLIST'),
+            help="Allowlist file to write (defaults to GRAPHQL_PERSISTED_QUERIES['ALLOWLIST']).",
+        )
+        parser.add_argument('--merge', action='store_true', help="Keep entries already in the output file.")
+
+    def _documents(self, path):
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                if child.suffix in ('.graphql', '.gql', '.json'):
+                    yield from self._documents(child)
+        elif path.suffix == '.json':
+            manifest = json.loads(path.read_text(encoding='utf-8'))
+            for operation in manifest.get('operations', []):
+                yield f"{path}:{operation.get('name', '?')}", operation['body']
+        else:
+            yield str(path), path.read_text(encoding='utf-8')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError("No --output given and GRAPHQL_PERSISTED_QUERIES['ALLOWLIST'] is not set.")
+        output = Path(options['output'])
+        allowlist = {}
+        if options['merge'] and output.exists():
+            allowlist = json.loads(output.read_text(encoding='utf-8'))
+
+        graphql_schema = schema.graphql_schema
+        for raw in options['paths']:
+            path = Path(raw)
+            if not path.exists():
+                raise CommandError(f"{path} does not exist")
+            for source, document in self._documents(path):
+                try:
+                    errors = validate(graphql_schema, parse(document))
+                except GraphQLError as e:
+                    errors = [e]
+                if errors:
+                    raise CommandError(f"{source}: {errors[0].message}")
+                allowlist[query_digest(document)] = document
+
+        output.write_text(json.dumps(allowlist, indent=2, sort_keys=True), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(allowlist)} persisted queries to {output}"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from UserAuthentication.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Delete denylist rows for tokens that have already expired."
+
+    def handle(self, *args, **options):
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired revoked tokens"))
@@ -85,4 +85,15 @@ class PasswordResetToken(models.Model):
         return self.expires_at > timezone.now()
 
     def __str__(self):
-        return f"Token for {self.member.email}"
\ No newline at end of file
+        return f"Token for {self.member.email}"
+
+
+class RevokedToken(models.Model):
+    """Denylist of revoked JWT ids (jti); rows can be pruned once expired."""
+    jti = models.CharField(max_length=64, unique=True)
+    member = models.ForeignKey(Member, null=True, blank=True, on_delete=models.CASCADE)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Revoked {self.jti}"
@@ -2,18 +2,20 @@ import graphene
 import graphql_jwt
 import jwt
 from django.conf import settings
-from django.contrib.auth import authenticate, logout
+from django.contrib.auth import logout
 from django.core.mail import send_mail
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.template.loader import render_to_string
 from django.template import TemplateDoesNotExist
 from graphene_django.types import DjangoObjectType
+from graphql import GraphQLError
 from .models import Member, Street, Group, PasswordResetToken
 from .inputs import LoginInput, RegisterInput, ForgotPasswordInput, ResetPasswordInput
 from .outputs import LoginOutput, RegisterOutput, ForgotPasswordOutput, ResetPasswordOutput
+from .tokens import issue_access_token, issue_refresh_token, verify_token, revoke_token, REFRESH
+from .login_pool import authenticate_member, LoginPoolSaturated
 import datetime
-import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,24 +27,19 @@ class LoginUser(graphene.Mutation):
     Output = LoginOutput
 
     def mutate(self, info, input):
-        user = authenticate(email=input.email, password=input.password)
+        try:
+            user = authenticate_member(info.context, input.email, input.password)
+        except LoginPoolSaturated:
+            logger.warning('Login rejected, too many password checks in flight: %s', input.email)
+            raise GraphQLError(_('Login service is busy, please try again shortly'), extensions={'code': 'LOGIN_BUSY'})
         if not user:
-            logger.error(f'Invalid credentials for email: {input.email}')
+            logger.warning('Invalid credentials for email: %s', input.email)
             raise Exception(_('Invalid credentials'))
         
-        access_token = jwt.encode({
-            'user_id': user.id,
-            'email': user.email,
-            'exp': int(time.time() + 15 * 60)  # 15 minutes from now
-        }, settings.SECRET_KEY, algorithm='HS256')
-        
-        refresh_token = jwt.encode({
-            'user_id': user.id,
-            'email': user.email,
-            'exp': int(time.time() + 7 * 24 * 60 * 60)  # 7 days from now
-        }, settings.SECRET_KEY, algorithm='HS256')
+        access_token = issue_access_token(user)  # 15 minutes
+        refresh_token = issue_refresh_token(user)  # 7 days
         
-        logger.info(f'Login successful for user {user.id}: access_token generated')
+        logger.info('Login successful for user %s', user.id)
         return LoginOutput(access_token=access_token, refresh_token=refresh_token, member=user)
 
 class RegisterUser(graphene.Mutation):
@@ -168,40 +165,46 @@ class RefreshToken(graphene.Mutation):
         refresh_token = graphene.String(required=True)
 
     access_token = graphene.String()
+    refresh_token = graphene.String()
 
     def mutate(self, info, refresh_token):
-        logger.info(f'Received refresh_token: {refresh_token}')
         try:
             if not refresh_token:
                 raise Exception('No refresh token provided')
-            payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=['HS256'])
-            logger.info(f'Decoded refresh_token payload: {payload}')
-            user = Member.objects.filter(id=payload['user_id']).first()
+            payload, user = verify_token(refresh_token, token_type=REFRESH)
             if not user:
-                raise Exception(f'User with ID {payload["user_id"]} not found')
-            access_token = jwt.encode({
-                'user_id': user.id,
-                'email': user.email,
-                'exp': int(time.time() + 15 * 60)
-            }, settings.SECRET_KEY, algorithm='HS256')
-            logger.info(f'Generated new access_token for user {user.id}')
-            return RefreshToken(access_token=access_token)
+                raise Exception(f'User with ID {payload.get("user_id")} not found')
+            # Rotate: each refresh token can be exchanged exactly once
+            if payload.get('jti') and not revoke_token(refresh_token):
+                raise jwt.InvalidTokenError('Token has been revoked')
+            access_token = issue_access_token(user)
+            logger.info('Rotated tokens for user %s', user.id)
+            return RefreshToken(access_token=access_token, refresh_token=issue_refresh_token(user))
         except jwt.ExpiredSignatureError:
             logger.error('Refresh token expired')
             raise Exception('Refresh token expired')
         except jwt.InvalidTokenError as e:
-            logger.error(f'Invalid refresh token: {str(e)}')
+            logger.warning('Invalid refresh token: %s', e)
             raise Exception(f'Invalid refresh token: {str(e)}')
         except Exception as e:
-            logger.error(f'Refresh token error: {str(e)}')
+            logger.error('Refresh token error: %s', e)
             raise Exception(f'Refresh token error: {str(e)}')
 
 class Logout(graphene.Mutation):
     class Meta:
         output = graphene.Boolean
 
+    class Arguments:
+        refresh_token = graphene.String()
+
     @staticmethod
-    def mutate(root, info):
+    def mutate(root, info, refresh_token=None):
+        # Revoke the presented access token and, when given, the refresh token
+        auth_header = info.context.META.get('HTTP_AUTHORIZATION', '')
+        if auth_header.startswith('Bearer '):
+            revoke_token(auth_header.split(' ', 1)[1].strip())
+        if refresh_token:
+            revoke_token(refresh_token)
         logout(info.context)
         return True
 
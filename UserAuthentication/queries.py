@@ -1,17 +1,26 @@
-from venv import logger
 import graphene
 from graphene_django.types import DjangoObjectType
 from UserAuthentication.models import *
 from UserAuthentication.mutations import Mutation
 import jwt
-from django.conf import settings
+from .tokens import verify_token
+from .loaders import member_street, member_groups
+from SmartChurch.optimizer import optimize
 import logging
 
+logger = logging.getLogger(__name__)
 
 class MemberType(DjangoObjectType):
     class Meta:
         model = Member
         fields = ('id', 'email', 'full_name', 'phone_number', 'street', 'groups', 'role')
+
+    def resolve_street(self, info):
+        return member_street(info, self)
+
+    def resolve_groups(self, info):
+        return member_groups(info, self)
+
 class StreetType(DjangoObjectType):
     class Meta:
         model = Street
@@ -28,13 +37,13 @@ class Query(graphene.ObjectType):
     me = graphene.Field(MemberType)
     
     def resolve_streets(self, info):
-        return Street.objects.all()
+        return optimize(Street.objects.all(), info)
 
     def resolve_groups(self, info):
-        return Group.objects.all()
+        return optimize(Group.objects.all(), info)
 
     def resolve_me(self, info):
-        logger.info('Resolving ME_QUERY')
+        logger.debug('Resolving ME_QUERY')
         # Manually extract and validate token from header
         auth_header = info.context.META.get('HTTP_AUTHORIZATION')
         if not auth_header:
@@ -46,23 +55,20 @@ class Query(graphene.ObjectType):
             raise Exception('Invalid Authorization header format')
         
         token = auth_header.split(' ')[1]
-        logger.info(f'Extracted token: {token}')
         
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            logger.info(f'Decoded payload: {payload}')
-            user = Member.objects.filter(id=payload['user_id'], email=payload['email']).first()
-            if not user:
-                logger.error(f'User not found: {payload["user_id"]}')
+            payload, user = verify_token(token)
+            if not user or user.email != payload.get('email'):
+                logger.error('User not found: %s', payload.get('user_id'))
                 raise Exception('User not found')
-            logger.info(f'Authenticated user: {user.id}, {user.email}')
+            logger.debug('Authenticated user: %s', user.id)
             return user
         except jwt.ExpiredSignatureError:
             logger.error('Token expired')
             raise Exception('Token expired')
         except jwt.InvalidTokenError as e:
-            logger.error(f'Invalid token: {str(e)}')
+            logger.error('Invalid token: %s', e)
             raise Exception(f'Invalid token: {str(e)}')
         except Exception as e:
-            logger.error(f'Authentication error: {str(e)}')
+            logger.error('Authentication error: %s', e)
             raise Exception(f'Authentication error: {str(e)}')
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Per-worker view of the revoked-token denylist.
+
+Checking ``RevokedToken`` on every request would add a query to the hot auth
+path, so each worker keeps a bloom filter of revoked ``jti`` values in front of
+the table. A miss in the filter (the common case) means the token was never
+revoked; only a hit, a real revocation or a rare false positive, falls through to
+the indexed table lookup. The filter is filled lazily from the table and then
+kept in sync incrementally, at most once every
+``TOKEN_REVOCATION['SYNC_INTERVAL']`` seconds, by reading the rows revoked since
+the previous sync started. The window reaches ``SYNC_OVERLAP`` seconds further
+back: ``revoked_at`` is stamped before the row commits, and ids commit out of
+order, so a row can become visible after a later one was already read.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RevokedToken
+
+_revocation_settings = getattr(settings, 'TOKEN_REVOCATION', {})
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    def __init__(self, capacity=100_000, error_rate=0.001, sync_interval=5, sync_overlap=60):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._bloom = None
+        self._synced_at = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        # Approximate counters for the metrics endpoint
+        self.bloom_negatives = 0
+        self.confirmed = 0
+        self.false_positives = 0
+
+    def _rebuild(self):
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        started = timezone.now()
+        for jti in RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True).iterator():
+            bloom.add(jti)
+        self._bloom, self._synced_at = bloom, started
+
+    def _add_recent(self):
+        started = timezone.now()
+        rows = RevokedToken.objects.filter(revoked_at__gte=self._synced_at - self.sync_overlap)
+        for jti in rows.values_list('jti', flat=True):
+            # The overlap re-reads rows; only count new ones towards capacity
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+        self._synced_at = started
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        with self._lock:
+            if not force and now < self._next_sync:
+                return
+            if self._bloom is None or self._bloom.count >= self.capacity:
+                self._rebuild()
+            else:
+                self._add_recent()
+            self._next_sync = now + self.sync_interval
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        if revoked:
+            self.confirmed += 1
+        else:
+            self.false_positives += 1
+        return revoked
+
+    def revoke(self, jti, expires_at, member_id=None):
+        """Record ``jti`` as revoked; returns False if it already was."""
+        _, created = RevokedToken.objects.get_or_create(
+            jti=jti, defaults={'expires_at': expires_at, 'member_id': member_id}
+        )
+        self.sync()
+        with self._lock:
+            self._bloom.add(jti)
+        return created
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._next_sync = 0.0
+
+
+revocation_list = RevocationList(
+    capacity=_revocation_settings.get('CAPACITY', 100_000),
+    error_rate=_revocation_settings.get('ERROR_RATE', 0.001),
+    sync_interval=_revocation_settings.get('SYNC_INTERVAL', 5),
+    sync_overlap=_revocation_settings.get('SYNC_OVERLAP', 60),
+)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .identity import invalidate_identity
+from .models import Member
+from .tokens import token_cache
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_member_tokens(sender, instance, **kwargs):
+    # Saving covers deactivation (is_active=False) and password/role changes
+    token_cache.invalidate_user(instance.pk)
+    invalidate_identity(instance.pk)
+
+
+@receiver(m2m_changed, sender=Member.groups.through)
+def invalidate_member_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_identity(instance.pk)
+        return
+    # group.member_set changes: pk_set holds member ids, except for clear()
+    if action in ('post_add', 'post_remove'):
+        member_ids = pk_set or ()
+    elif action == 'pre_clear':
+        member_ids = list(instance.member_set.values_list('id', flat=True))
+    else:
+        return
+    for member_id in member_ids:
+        invalidate_identity(member_id)
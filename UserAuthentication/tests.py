@@ -1,3 +1,218 @@
-from django.test import TestCase
+import datetime
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from churchMember import User_Auth_middleware
+from churchMember.auth import GraphQLJWTAuthentication
+from SmartChurch.checks import check_identity_cache, check_login_slot_cache, process_local_cache
+from . import identity, login_pool, tokens
+from .identity import get_member, local_identities
+from .models import Group, Member, RevokedToken
+from .revocation import revocation_list
+from .tokens import issue_access_token, issue_refresh_token, token_cache, verify_token
+
+
+def graphql(client, query, token=None, variables=None):
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+    response = client.post('/graphql/', json.dumps({'query': query, 'variables': variables or {}}),
+                           content_type='application/json', **headers)
+    return response.json()
+
+
+class AuthTestCase(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        local_identities.clear()
+        self.member = Member.objects.create_user(email='member@example.com', full_name='Member')
+        self.token = issue_access_token(self.member)
+
+
+class RequestUserTests(AuthTestCase):
+    def test_token_is_verified_once_per_request(self):
+        with mock.patch.object(User_Auth_middleware, 'verify_token',
+                               wraps=User_Auth_middleware.verify_token) as verify:
+            data = graphql(self.client, '{ streets { id } groups { id } announcements { id } }', self.token)
+        self.assertNotIn('errors', data)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_request_user_is_memoized(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user = User_Auth_middleware.authenticate_request(request)
+        self.assertEqual(user.pk, self.member.pk)
+        self.assertIs(User_Auth_middleware.authenticate_request(request), user)
+
+    def test_invalid_token_is_anonymous(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertFalse(User_Auth_middleware.authenticate_request(request).is_authenticated)
+
+
+class TokenCacheTests(AuthTestCase):
+    def test_repeated_verification_is_served_from_cache(self):
+        verify_token(self.token)
+        hits = token_cache.hits
+        with self.assertNumQueries(0):
+            payload, user = verify_token(self.token)
+        self.assertEqual(token_cache.hits, hits + 1)
+        self.assertEqual((payload['user_id'], user.pk), (self.member.pk, self.member.pk))
+
+    def test_saving_member_drops_cached_tokens(self):
+        verify_token(self.token)
+        self.member.is_active = False
+        self.member.save()
+        self.assertEqual(len(token_cache), 0)
+        self.assertIsNone(verify_token(self.token)[1])
+
+    def test_graphql_me_and_rest_share_verification(self):
+        data = graphql(self.client, '{ me { email } }', self.token)
+        self.assertEqual(data['data']['me']['email'], self.member.email)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        with self.assertNumQueries(0):
+            user, _ = GraphQLJWTAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.member.pk)
+
+
+class IdentityCacheTests(AuthTestCase):
+    def test_role_change_and_deactivation_are_seen(self):
+        self.assertEqual(get_member(self.member.pk).role, self.member.role)
+        self.member.role = 'PASTOR'
+        self.member.save()
+        self.assertEqual(get_member(self.member.pk).role, 'PASTOR')
+        self.member.is_active = False
+        self.member.save()
+        self.assertIsNone(get_member(self.member.pk))
+
+    def test_group_changes_are_seen(self):
+        group = Group.objects.create(name='Choir')
+        self.assertEqual(get_member(self.member.pk).group_ids, [])
+        self.member.groups.add(group)
+        self.assertEqual(get_member(self.member.pk).group_ids, [group.pk])
+        group.member_set.clear()
+        self.assertEqual(get_member(self.member.pk).group_ids, [])
+
+    def test_process_local_cache_keeps_local_ttl(self):
+        self.assertTrue(process_local_cache(identity.CACHE_ALIAS))
+        self.assertEqual(identity.shared_ttl(), identity.LOCAL_TTL)
+        self.assertEqual([w.id for w in check_identity_cache(None)], ['SmartChurch.W001'])
+        with mock.patch.object(identity, 'process_local_cache', return_value=False):
+            self.assertEqual(identity.shared_ttl(), identity.SHARED_TTL)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginTests(TestCase):
+    LOGIN = 'mutation($email: String!, $password: String!) { loginUser(input: {email: $email, password: $password}) { accessToken member { email } } }'
+
+    def setUp(self):
+        caches[login_pool.CACHE_ALIAS].clear()
+        self.member = Member.objects.create_user(email='login@example.com', full_name='Login', password='s3cret-pass')
+
+    def login(self, password):
+        return graphql(self.client, self.LOGIN, variables={'email': self.member.email, 'password': password})
+
+    def test_login_goes_through_authentication_backends(self):
+        data = self.login('s3cret-pass')
+        self.assertEqual(data['data']['loginUser']['member']['email'], self.member.email)
+        self.assertEqual(verify_token(data['data']['loginUser']['accessToken'])[1].pk, self.member.pk)
+
+    def test_failed_login_sends_user_login_failed(self):
+        failures = []
+
+        def on_failure(sender, credentials, **kwargs):
+            failures.append(credentials['email'])
+
+        user_login_failed.connect(on_failure)
+        try:
+            data = self.login('wrong')
+        finally:
+            user_login_failed.disconnect(on_failure)
+        self.assertEqual(data['errors'][0]['message'], 'Invalid credentials')
+        self.assertEqual(failures, [self.member.email])
+
+    def test_logins_beyond_the_limit_are_rejected(self):
+        with mock.patch.object(login_pool, 'login_slots', login_pool.LoginSlots(max_pending=1)) as slots:
+            with slots.slot():
+                data = self.login('s3cret-pass')
+            self.assertEqual(data['errors'][0]['extensions']['code'], 'LOGIN_BUSY')
+            self.assertEqual((slots.rejected, slots.in_flight), (1, 0))
+            self.assertIsNotNone(self.login('s3cret-pass')['data']['loginUser'])
+
+    def test_slots_are_shared_by_all_workers(self):
+        # Two sync workers, one request each, behind the same cache
+        worker_a, worker_b = login_pool.LoginSlots(max_pending=1), login_pool.LoginSlots(max_pending=1)
+        with worker_a.slot():
+            with self.assertRaises(login_pool.LoginPoolSaturated):
+                with worker_b.slot():
+                    pass
+        with worker_b.slot():
+            self.assertEqual((worker_a.rejected, worker_b.rejected, worker_b.in_flight), (0, 1, 1))
+
+    def test_slot_of_a_dead_worker_is_freed(self):
+        slots = login_pool.LoginSlots(max_pending=1, hold_timeout=1)
+        self.assertIsNotNone(slots._acquire())
+        self.assertIsNone(slots._acquire())
+        with mock.patch('time.time', return_value=time.time() + 2):
+            self.assertIsNotNone(slots._acquire())
+
+    def test_process_local_slot_cache_is_reported(self):
+        self.assertEqual([w.id for w in check_login_slot_cache(None)], ['SmartChurch.W003'])
+
+
+class RevocationTests(AuthTestCase):
+    REFRESH = 'mutation($token: String!) { refreshToken(refreshToken: $token) { accessToken refreshToken } }'
+
+    def setUp(self):
+        super().setUp()
+        revocation_list.reset()
+
+    def test_refresh_tokens_rotate_once(self):
+        refresh = issue_refresh_token(self.member)
+        rotated = graphql(self.client, self.REFRESH, variables={'token': refresh})['data']['refreshToken']
+        self.assertEqual(verify_token(rotated['accessToken'])[1].pk, self.member.pk)
+        replay = graphql(self.client, self.REFRESH, variables={'token': refresh})
+        self.assertIn('revoked', replay['errors'][0]['message'])
+        self.assertIsNotNone(graphql(self.client, self.REFRESH, variables={'token': rotated['refreshToken']})['data'])
+
+    def test_access_token_is_not_a_refresh_token(self):
+        data = graphql(self.client, self.REFRESH, variables={'token': self.token})
+        self.assertIn('Expected a refresh token', data['errors'][0]['message'])
+
+    def test_logout_revokes_the_access_token(self):
+        verify_token(self.token)
+        self.assertTrue(graphql(self.client, 'mutation { logout }', self.token)['data']['logout'])
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_token(self.token)
+
+    def test_sync_sees_rows_committed_out_of_id_order(self):
+        expires = timezone.now() + datetime.timedelta(hours=1)
+        RevokedToken.objects.create(id=100, jti='later-id', expires_at=expires)
+        revocation_list.sync(force=True)
+        # Committed after the sync above, with a lower id
+        RevokedToken.objects.create(id=50, jti='earlier-id', expires_at=expires)
+        revocation_list.sync(force=True)
+        self.assertTrue(revocation_list.is_revoked('earlier-id'))
+        self.assertFalse(revocation_list.is_revoked('never-revoked'))
+
+    def test_legacy_tokens_expire_with_the_compatibility_window(self):
+        legacy_refresh = jwt.encode({'user_id': self.member.pk, 'email': self.member.email,
+                                     'exp': int(time.time()) + tokens.REFRESH_TOKEN_LIFETIME},
+                                    settings.SECRET_KEY, algorithm=tokens.ALGORITHM)
+        with mock.patch.object(tokens, 'LEGACY_TOKENS_UNTIL', time.time() + 3600):
+            self.assertEqual(verify_token(legacy_refresh, token_type=tokens.REFRESH)[1].pk, self.member.pk)
+            with self.assertRaisesMessage(jwt.InvalidTokenError, 'Expected a access token'):
+                verify_token(legacy_refresh)
+            legacy_access = jwt.encode({'user_id': self.member.pk, 'email': self.member.email,
+                                        'exp': int(time.time()) + tokens.ACCESS_TOKEN_LIFETIME},
+                                       settings.SECRET_KEY, algorithm=tokens.ALGORITHM)
+            self.assertEqual(verify_token(legacy_access)[1].pk, self.member.pk)
+            replay = graphql(self.client, self.REFRESH, variables={'token': legacy_access})
+            self.assertIn('Expected a refresh token', replay['errors'][0]['message'])
+        with mock.patch.object(tokens, 'LEGACY_TOKENS_UNTIL', time.time() - 1):
+            with self.assertRaisesMessage(jwt.InvalidTokenError, 'no longer accepted'):
+                verify_token(legacy_refresh, token_type=tokens.REFRESH)
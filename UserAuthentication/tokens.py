@@ -0,0 +1,199 @@
+"""
+Issuing and verification of the HS256 JWTs used by the GraphQL and REST APIs.
+
+Every authenticated request used to decode its Bearer token and query the
+Member table again. ``verify_token`` keeps recently verified tokens in a small
+in-process LRU cache keyed by the token digest, so repeated requests from the
+same session skip the signature check. The member itself comes from the
+identity cache (``UserAuthentication.identity``), so no user query is needed
+either. Entries expire at the token's ``exp`` (or ``MAX_AGE``, whichever comes
+first) and are dropped as soon as the member is saved or deleted (see
+``UserAuthentication.signals``).
+
+Tokens carry a ``jti`` and a ``type`` claim. Refresh tokens are single use:
+``RefreshToken`` revokes the presented token and issues a new pair, and
+``Logout`` revokes both tokens. Revocation is checked through the per-worker
+bloom filter in ``UserAuthentication.revocation``. Tokens issued before these
+claims existed cannot be revoked; they are accepted until
+``TOKEN_REVOCATION['LEGACY_TOKENS_UNTIL']`` and never as both kinds.
+"""
+import datetime
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+
+from .identity import get_member
+from .revocation import revocation_list
+
+ALGORITHM = 'HS256'
+ACCESS_TOKEN_LIFETIME = 15 * 60  # 15 minutes
+REFRESH_TOKEN_LIFETIME = 7 * 24 * 60 * 60  # 7 days
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+_cache_settings = getattr(settings, 'AUTH_TOKEN_CACHE', {})
+_legacy_until = getattr(settings, 'TOKEN_REVOCATION', {}).get('LEGACY_TOKENS_UNTIL')
+# Tokens without jti/type claims are accepted until then (a timestamp)
+LEGACY_TOKENS_UNTIL = datetime.datetime.fromisoformat(_legacy_until).timestamp() if _legacy_until else 0
+
+
+class TokenCache:
+    """Bounded, thread-safe LRU of verified token payloads."""
+
+    def __init__(self, max_entries=4096, max_age=300):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # digest -> (expires_at, payload, user id)
+        self._by_user = {}  # user id -> set of digests
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                self._discard(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry
+
+    def set(self, digest, payload, user_id):
+        expires_at = min(payload.get('exp') or 0, time.time() + self.max_age)
+        with self._lock:
+            if digest in self._entries:
+                self._discard(digest)
+            self._entries[digest] = (expires_at, payload, user_id)
+            self._by_user.setdefault(user_id, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for digest in self._by_user.pop(user_id, ()):
+                self._entries.pop(digest, None)
+
+    def discard(self, digest):
+        with self._lock:
+            if digest in self._entries:
+                self._discard(digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, digest):
+        _, _, user_id = self._entries.pop(digest)
+        digests = self._by_user.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user_id]
+
+
+token_cache = TokenCache(
+    max_entries=_cache_settings.get('MAX_ENTRIES', 4096),
+    max_age=_cache_settings.get('MAX_AGE', 300),
+)
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _check_legacy_claims(payload, token_type):
+    # Issued before jti/type claims were added: such tokens cannot be revoked,
+    # so they are only accepted until every one of them has expired
+    if time.time() >= LEGACY_TOKENS_UNTIL:
+        raise jwt.InvalidTokenError('Token is no longer accepted, please sign in again')
+    # Only refresh tokens live longer than an access token, so a token with at
+    # most an access lifetime left is an access token and never refreshes
+    is_refresh = (payload.get('exp') or 0) - time.time() > ACCESS_TOKEN_LIFETIME
+    if is_refresh != (token_type == REFRESH):
+        raise jwt.InvalidTokenError(f'Expected a {token_type} token')
+
+
+def _check_claims(payload, token_type):
+    claimed_type = payload.get('type')
+    jti = payload.get('jti')
+    if not claimed_type or not jti:
+        _check_legacy_claims(payload, token_type)
+        return
+    if claimed_type != token_type:
+        raise jwt.InvalidTokenError(f'Expected a {token_type} token')
+    if revocation_list.is_revoked(jti):
+        raise jwt.InvalidTokenError('Token has been revoked')
+
+
+def verify_token(token, token_type=ACCESS):
+    """
+    Verify ``token`` and return ``(payload, user)``.
+
+    ``user`` is None when the token is valid but its member no longer exists or
+    is inactive. Invalid, expired, revoked or wrongly typed tokens raise the
+    usual ``jwt`` exceptions. Each call builds a fresh Member from the identity
+    cache.
+    """
+    digest = token_digest(token)
+    entry = token_cache.get(digest)
+    if entry is not None:
+        _check_claims(entry[1], token_type)
+        return entry[1], get_member(entry[2])
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])  # raises on invalid/expired
+    _check_claims(payload, token_type)
+    user_id = payload.get('user_id')
+    user = get_member(user_id) if user_id else None
+    if user is not None:
+        token_cache.set(digest, payload, user_id)
+    return payload, user
+
+
+def revoke_token(token):
+    """
+    Add ``token`` to the denylist. Returns False for tokens without a jti and
+    for tokens that were already revoked.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM], options={'verify_exp': False})
+    except jwt.InvalidTokenError:
+        return False
+    if not payload.get('jti'):
+        return False
+    expires_at = datetime.datetime.fromtimestamp(payload.get('exp') or time.time(), tz=datetime.timezone.utc)
+    created = revocation_list.revoke(payload['jti'], expires_at, payload.get('user_id'))
+    token_cache.discard(token_digest(token))
+    return created
+
+
+def _encode(user, lifetime, token_type):
+    return jwt.encode({
+        'user_id': user.id,
+        'email': user.email,
+        'exp': int(time.time() + lifetime),
+        'jti': uuid.uuid4().hex,
+        'type': token_type,
+    }, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def issue_access_token(user):
+    return _encode(user, ACCESS_TOKEN_LIFETIME, ACCESS)
+
+
+def issue_refresh_token(user):
+    return _encode(user, REFRESH_TOKEN_LIFETIME, REFRESH)
@@ -0,0 +1,117 @@
+"""
+Dashboard latency under concurrent load, sync view vs async view.
+
+A burst of CONCURRENCY dashboard requests is sent to:
+
+* ``SmartChurchGraphQLView`` on one sync worker, which handles the burst one
+  request at a time (the later requests queue behind the earlier ones), and
+* ``AsyncSmartChurchGraphQLView`` through the ASGI handler, where requests
+  interleave and each resolves its root fields on worker threads.
+
+Every SQL statement is delayed by LATENCY_MS to stand in for the network round
+trip to PostgreSQL, which is what the async path overlaps.
+
+    python -m benchmarks.bench_async
+"""
+import asyncio
+import json
+import time
+
+from benchmarks.common import setup_django, test_database, percentile, report
+
+setup_django()
+
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test import AsyncRequestFactory, RequestFactory  # noqa: E402
+
+from SmartChurch.graphql_view import AsyncSmartChurchGraphQLView, SmartChurchGraphQLView  # noqa: E402
+from UserAuthentication.models import Group, Member, Street  # noqa: E402
+from UserAuthentication.tokens import issue_access_token  # noqa: E402
+from benchmarks.bench_document_cache import DOCUMENTS  # noqa: E402
+from churchMember.models import Announcement, PrayerReply, PrayerRequest  # noqa: E402
+
+CONCURRENCY = 16
+ROUNDS = 5
+LATENCY_MS = 2
+
+
+def simulated_latency(execute, sql, params, many, context):
+    time.sleep(LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+def add_latency(sender, connection, **kwargs):
+    connection.execute_wrappers.append(simulated_latency)
+
+
+def seed():
+    streets = [Street.objects.create(name=f"Street {i}") for i in range(5)]
+    groups = [Group.objects.create(name=f"Group {i}") for i in range(5)]
+    members = []
+    for i in range(40):
+        member = Member.objects.create_user(
+            email=f"member{i}@example.com", full_name=f"Member {i}", password="x",
+            street=streets[i % 5], role="PASTOR" if i == 0 else "CHURCH_MEMBER",
+        )
+        member.groups.set(groups[: i % 5 + 1])
+        members.append(member)
+    for i in range(20):
+        Announcement.objects.create(title=f"Announcement {i}", content="...", created_by=members[i])
+        prayer = PrayerRequest.objects.create(member=members[i], request=f"Request {i}")
+        PrayerReply.objects.create(prayer=prayer, responder=members[0], message="Praying")
+    return issue_access_token(members[0])
+
+
+def sync_burst(view, body, token):
+    """Latencies of a burst served one by one, as a single sync worker would."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(CONCURRENCY):
+        request = RequestFactory().post("/graphql/", body, content_type="application/json",
+                                        HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = view(request)
+        assert response.status_code == 200, response.content
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def async_burst(view, body, token):
+    start = time.perf_counter()
+
+    async def one():
+        request = AsyncRequestFactory().post("/graphql/", body, content_type="application/json",
+                                             headers={"Authorization": f"Bearer {token}"})
+        response = await view(request)
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one() for _ in range(CONCURRENCY)))
+
+
+def main():
+    body = json.dumps({"query": DOCUMENTS["dashboard"]})
+    sync_view = SmartChurchGraphQLView.as_view()
+    async_view = AsyncSmartChurchGraphQLView.as_view()
+    with test_database() as connection:
+        token = seed()
+        connection_created.connect(add_latency)
+        connection.execute_wrappers.append(simulated_latency)
+        sync_latencies, async_latencies = [], []
+        sync_burst(sync_view, body, token)
+        asyncio.run(async_burst(async_view, body, token))
+        for _ in range(ROUNDS):
+            sync_latencies += sync_burst(sync_view, body, token)
+            async_latencies += asyncio.run(async_burst(async_view, body, token))
+        connection.execute_wrappers.remove(simulated_latency)
+        connection_created.disconnect(add_latency)
+
+    rows = [
+        (name, f"{percentile(values, 50) * 1000:.1f}", f"{percentile(values, 99) * 1000:.1f}")
+        for name, values in (("sync worker", sync_latencies), ("async view", async_latencies))
+    ]
+    report(f"Dashboard latency, {CONCURRENCY} concurrent requests, {LATENCY_MS} ms per query",
+           rows, ("view", "p50 ms", "p99 ms"))
+
+
+if __name__ == "__main__":
+    main()
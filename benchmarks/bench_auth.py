@@ -0,0 +1,102 @@
+"""
+Authentication overhead versus GraphQL response size.
+
+Runs ``offeringCards`` over an increasing number of cards with the legacy
+per-field JWT middleware (decode + user query for every resolved field) and with
+the request-scoped middleware, and reports the median wall time of each.
+
+    python -m benchmarks.bench_auth
+"""
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+import time  # noqa: E402
+
+import jwt  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from churchMember.User_Auth_middleware import JWTAuthenticationMiddleware  # noqa: E402
+from ChurchSecreatary.models import OfferingCard  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Street  # noqa: E402
+
+SIZES = (10, 100, 300, 1000)
+QUERY = """
+query {
+  offeringCards {
+    id code street number isTaken assignedToName assignedPhone
+    pledgedAhadi progressAhadi
+  }
+}
+"""
+
+
+class LegacyJWTAuthenticationMiddleware:
+    """The pre-request-scoped behaviour: decode and load the user for every field."""
+
+    def resolve(self, next, root, info, **kwargs):
+        request = info.context
+        auth_header = request.headers.get("Authorization", "")
+        user = AnonymousUser()
+        if auth_header.startswith("Bearer "):
+            payload = jwt.decode(auth_header.split("Bearer ")[1], settings.SECRET_KEY, algorithms=["HS256"])
+            user = get_user_model().objects.filter(id=payload.get("user_id")).first() or user
+        request.user = user
+        return next(root, info, **kwargs)
+
+
+def seed(total):
+    street, _ = Street.objects.get_or_create(name="Benchmark")
+    existing = OfferingCard.objects.filter(street=street).count()
+    OfferingCard.objects.bulk_create(
+        OfferingCard(street=street, number=n, code=f"BE-{n:04d}")
+        for n in range(existing + 1, total + 1)
+    )
+
+
+def count_queries(fn):
+    calls = []
+
+    def counter(execute, sql, params, many, context):
+        calls.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        fn()
+    return len(calls)
+
+
+def run(middleware, token):
+    request = RequestFactory().post("/graphql/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    result = schema.execute(QUERY, context_value=request, middleware=[middleware])
+    assert not result.errors, result.errors
+    return result
+
+
+def main():
+    with test_database():
+        user = get_user_model().objects.create_user(email="bench@example.com", full_name="Bench", password="x")
+        token = jwt.encode({"user_id": user.id, "email": user.email, "exp": int(time.time() + 3600)},
+                           settings.SECRET_KEY, algorithm="HS256")
+        rows = []
+        for size in SIZES:
+            seed(size)
+            legacy, scoped = LegacyJWTAuthenticationMiddleware(), JWTAuthenticationMiddleware()
+            rows.append((
+                size,
+                median_ms(timeit(lambda: run(legacy, token), repeat=3)),
+                count_queries(lambda: run(legacy, token)),
+                median_ms(timeit(lambda: run(scoped, token), repeat=3)),
+                count_queries(lambda: run(scoped, token)),
+            ))
+        report("offeringCards with per-field vs request-scoped JWT auth",
+               rows, ("cards", "per-field ms", "queries", "request ms", "queries"))
+
+
+if __name__ == "__main__":
+    main()
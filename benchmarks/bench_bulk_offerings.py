@@ -0,0 +1,116 @@
+"""
+Latency of bulkRecordOfferingEntries per batch.
+
+Seeds a street of 2,000 assigned cards and records batches of 50, 250 and
+2,000 entries through the mutation. The same batch is also written with the
+previous per-item loop (card lookup, entry insert, assignment lookup and
+churchMember.Offering insert for every item, in autocommit) for comparison.
+
+    python -m benchmarks.bench_bulk_offerings
+"""
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from ChurchSecreatary.models import CardAssignment, OfferingBatch, OfferingCard, OfferingEntry  # noqa: E402
+from churchMember.models import Offering  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+CARDS = 2000
+SIZES = (50, 250, 2000)
+DATE = "2026-03-01"
+
+MUTATION = parse("""
+    mutation Record($input: BulkOfferingEntryInput!) {
+      bulkRecordOfferingEntries(input: $input) { ok count totalAhadi }
+    }
+""")
+
+
+def seed():
+    street = Street.objects.create(name="Bench Street")
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    OfferingCard.objects.bulk_create(
+        OfferingCard(street=street, number=n, code=f"BS-{n:04d}") for n in range(1, CARDS + 1)
+    )
+    cards = list(OfferingCard.objects.filter(street=street))
+    CardAssignment.objects.bulk_create(
+        CardAssignment(card=card, member=member, full_name="Holder", phone_number="0700000000", year=2026)
+        for card in cards
+    )
+    member.role = "PASTOR"
+    member.save()
+    return member, street, [card.id for card in cards]
+
+
+def batch_input(street, card_ids, size):
+    entry_types = ("AHADI", "SHUKRANI", "MAJENGO")
+    return {
+        "meta": {"streetId": street.id, "recorderName": "Bench", "date": DATE, "massType": "SELI"},
+        "entries": [
+            {"cardId": card_ids[i % len(card_ids)], "entryType": entry_types[i % 3], "amount": 1000}
+            for i in range(size)
+        ],
+    }
+
+
+def run(user, variables):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, MUTATION, context_value=request, variable_values=variables,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def per_item(street, variables):
+    # The mutation as it was: every item costs four round trips
+    batch = OfferingBatch.objects.create(street=street, recorder_name="Bench", date=DATE, mass_type="SELI")
+    for item in variables["input"]["entries"]:
+        card = OfferingCard.objects.filter(id=item["cardId"]).select_related("street").first()
+        entry = OfferingEntry.objects.create(card=card, entry_type=item["entryType"], amount=item["amount"],
+                                             date=batch.date, batch=batch)
+        assign = CardAssignment.objects.filter(card=card, year=2026).order_by("-active").first()
+        Offering.objects.create(member=assign.member if assign else None, amount=entry.amount,
+                                offering_type=entry.entry_type, mass_type=batch.mass_type, street=card.street,
+                                date=entry.date)
+
+
+def count_queries(fn):
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        fn()
+    return count
+
+
+def main():
+    with test_database():
+        user, street, card_ids = seed()
+        rows = []
+        for size in SIZES:
+            variables = {"input": batch_input(street, card_ids, size)}
+            repeat = 10 if size < 2000 else 3
+            rows.append((
+                size,
+                count_queries(lambda: run(user, variables)),
+                median_ms(timeit(lambda: run(user, variables), repeat=repeat)),
+                median_ms(timeit(lambda: per_item(street, variables), repeat=repeat)),
+            ))
+    report(f"bulkRecordOfferingEntries ({CARDS} assigned cards)", rows,
+           ("entries", "queries", "pipeline ms", "per-item ms"))
+
+
+if __name__ == "__main__":
+    main()
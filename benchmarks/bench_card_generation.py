@@ -0,0 +1,90 @@
+"""
+bulkGenerateCards over every street.
+
+Seeds 40 streets and generates cards 1-300 for all of them (12,000 cards)
+through the mutation. It then runs the mutation again, when every card
+already exists. The first run is compared with the previous per-card loop
+(an exists() and a save() per number).
+
+    python -m benchmarks.bench_card_generation
+"""
+import time
+
+from benchmarks.common import setup_django, test_database, report
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from ChurchSecreatary.models import OfferingCard  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+STREETS = 40
+NUMBERS = 300
+
+MUTATION = parse("""
+    mutation { bulkGenerateCards(input: { startNumber: 1, endNumber: 300 }) { ok created skipped conflicts } }
+""")
+
+
+def seed():
+    # Two-letter prefixes that never collide: AA, AB, ...
+    Street.objects.bulk_create(Street(name=f"{chr(65 + i // 26)}{chr(65 + i % 26)} Street") for i in range(STREETS))
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    member.role = "PASTOR"
+    member.save()
+    return member
+
+
+def run(user):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, MUTATION, context_value=request,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result.data["bulkGenerateCards"]
+
+
+def per_card():
+    # The mutation as it was
+    for st in Street.objects.all():
+        for n in range(1, NUMBERS + 1):
+            if OfferingCard.objects.filter(street=st, number=n).exists():
+                continue
+            OfferingCard(street=st, number=n).save()
+
+
+def measured(fn):
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        result = fn()
+    return result, count, f"{(time.perf_counter() - start) * 1000:.0f}"
+
+
+def main():
+    rows = []
+    with test_database():
+        user = seed()
+        for label in ("empty", "all exist"):
+            result, queries, ms = measured(lambda: run(user))
+            rows.append((f"mutation, {label}", result["created"], result["skipped"], queries, ms))
+        OfferingCard.objects.all().delete()
+        _, queries, ms = measured(per_card)
+        rows.append(("per-card loop, empty", OfferingCard.objects.count(), 0, queries, ms))
+    report(f"card generation ({STREETS} streets x {NUMBERS})", rows,
+           ("run", "created", "skipped", "queries", "ms"))
+
+
+if __name__ == "__main__":
+    main()
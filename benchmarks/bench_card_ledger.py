@@ -0,0 +1,100 @@
+"""
+Collected totals from CardLedger vs aggregating OfferingEntry.
+
+Seeds 1,000 assigned cards with 100 entries each over two years (100,000
+entries) and builds the ledger. Times the collected-totals lookups of an
+offeringCardsConnection page and of cardsOverview both ways.
+
+    python -m benchmarks.bench_card_ledger
+"""
+import datetime
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.db.models import Count, Q, Sum  # noqa: E402
+
+from ChurchSecreatary import ledger  # noqa: E402
+from ChurchSecreatary.models import CardAssignment, CardLedger, OfferingCard, OfferingEntry  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+CARDS = 1000
+ENTRIES_PER_CARD = 100
+PAGE = 50
+
+
+def seed():
+    street = Street.objects.create(name="Bench Street")
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    OfferingCard.objects.bulk_create(
+        OfferingCard(street=street, number=n, code=f"BS-{n:04d}") for n in range(1, CARDS + 1)
+    )
+    cards = list(OfferingCard.objects.all())
+    CardAssignment.objects.bulk_create(
+        CardAssignment(card=card, member=member, full_name="Holder", phone_number="0700000000",
+                       pledged_ahadi=100000, pledged_shukrani=50000, pledged_majengo=20000)
+        for card in cards
+    )
+    start = datetime.date(2025, 1, 5)
+    OfferingEntry.objects.bulk_create(
+        (
+            OfferingEntry(card=card, entry_type=("AHADI", "SHUKRANI", "MAJENGO")[i % 3], amount=1000,
+                          date=start + datetime.timedelta(weeks=i))
+            for card in cards for i in range(ENTRIES_PER_CARD)
+        ),
+        batch_size=1000,
+    )
+    ledger.rebuild()
+    return [card.id for card in cards[:PAGE]]
+
+
+def page_from_entries(card_ids):
+    return list(OfferingEntry.objects.filter(card_id__in=card_ids).values('card_id', 'entry_type')
+                .annotate(total=Sum('amount')).order_by())
+
+
+def page_from_ledger(card_ids):
+    return list(CardLedger.objects.filter(card_id__in=card_ids).values('card_id', 'entry_type')
+                .annotate(total=Sum('total')).order_by())
+
+
+def overview_from_entries():
+    entries = OfferingEntry.objects.all()
+    return (
+        entries.filter(date__year=2026).values('card_id').annotate(n=Count('id')).count(),
+        entries.values('card_id').annotate(total=Sum('amount')).order_by('total').first(),
+        entries.aggregate(ahadi=Sum('amount', filter=Q(entry_type='AHADI')),
+                          shukrani=Sum('amount', filter=Q(entry_type='SHUKRANI')),
+                          majengo=Sum('amount', filter=Q(entry_type='MAJENGO'))),
+    )
+
+
+def overview_from_ledger():
+    rows = CardLedger.objects.filter(entry_count__gt=0)
+    return (
+        rows.filter(year=2026).values('card_id').distinct().count(),
+        rows.values('card_id').annotate(total=Sum('total')).order_by('total').first(),
+        rows.aggregate(ahadi=Sum('total', filter=Q(entry_type='AHADI')),
+                       shukrani=Sum('total', filter=Q(entry_type='SHUKRANI')),
+                       majengo=Sum('total', filter=Q(entry_type='MAJENGO'))),
+    )
+
+
+def main():
+    with test_database():
+        page_ids = seed()
+        rows = [
+            (f"card page totals ({PAGE} cards)",
+             median_ms(timeit(lambda: page_from_entries(page_ids), repeat=20)),
+             median_ms(timeit(lambda: page_from_ledger(page_ids), repeat=20))),
+            ("cardsOverview totals",
+             median_ms(timeit(overview_from_entries, repeat=10)),
+             median_ms(timeit(overview_from_ledger, repeat=10))),
+        ]
+    report(f"collected totals ({CARDS * ENTRIES_PER_CARD} entries)", rows,
+           ("lookup", "entries ms", "ledger ms"))
+
+
+if __name__ == "__main__":
+    main()
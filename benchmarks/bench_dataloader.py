@@ -0,0 +1,79 @@
+"""
+Queries per request for list fields backed by DataLoaders.
+
+Seeds an increasing number of announcements, prayer requests and devotionals
+and runs the matching GraphQL queries through ``BatchingExecutionContext``.
+With per-row relation access the query count grew with the list length; with
+the loaders it stays flat.
+
+    python -m benchmarks.bench_dataloader
+"""
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from churchMember.models import Announcement, DailyDevotional, DevotionalInteraction, PrayerReply, PrayerRequest  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Group, Member, Street  # noqa: E402
+
+SIZES = (10, 100, 500)
+QUERIES = {
+    "announcements": """{ announcements { title createdByFullName targetGroupName
+                          createdBy { fullName street { name } groups { name } } } }""",
+    "prayerRequests": "{ prayerRequests { member replies { responder message } } }",
+    "devotionals": "{ devotionals(limit: %d) { title amenCount author { fullName } } }",
+}
+
+
+def seed(total):
+    street = Street.objects.get_or_create(name="Benchmark")[0]
+    groups = [Group.objects.get_or_create(name=f"Bench {i}")[0] for i in range(3)]
+    start = Member.objects.count()
+    for i in range(start, total):
+        member = Member.objects.create(email=f"bench{i}@example.com", full_name=f"Bench {i}", street=street)
+        member.groups.set(groups[: i % 3 + 1])
+        Announcement.objects.create(title=f"A{i}", content="-", created_by=member, target_group=groups[i % 3])
+        prayer = PrayerRequest.objects.create(member=member, request="-")
+        PrayerReply.objects.bulk_create(PrayerReply(prayer=prayer, responder=member, message="-") for _ in range(2))
+        devotional = DailyDevotional.objects.create(title=f"D{i}", content="-", author=member)
+        DevotionalInteraction.objects.create(member=member, devotional=devotional, amened=True)
+
+
+def count_queries(fn):
+    calls = []
+
+    def counter(execute, sql, params, many, context):
+        calls.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        fn()
+    return len(calls)
+
+
+def run(query):
+    request = RequestFactory().post("/graphql/")
+    result = schema.execute(query, context_value=request, execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def main():
+    with test_database():
+        rows = []
+        for size in SIZES:
+            seed(size)
+            for name, query in QUERIES.items():
+                if "%d" in query:
+                    query = query % size
+                rows.append((size, name, count_queries(lambda: run(query)),
+                             median_ms(timeit(lambda: run(query), repeat=3))))
+        report("List fields with request-scoped DataLoaders", rows, ("rows", "field", "queries", "ms"))
+
+
+if __name__ == "__main__":
+    main()
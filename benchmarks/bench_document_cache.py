@@ -0,0 +1,77 @@
+"""
+Per-request cost of parsing and validating GraphQL documents.
+
+Sends a few frontend-sized documents through graphene-django's stock
+``GraphQLView`` and through ``SmartChurchGraphQLView`` (document cache) against
+an empty database, so parse + validate dominate the difference.
+
+    python -m benchmarks.bench_document_cache
+"""
+import json
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+from graphene_django.views import GraphQLView  # noqa: E402
+
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.graphql_view import SmartChurchGraphQLView, document_cache  # noqa: E402
+
+DOCUMENTS = {
+    "dashboard": """
+        query Dashboard {
+          dashboardStats { totalMembers activeGroups prayerRequests totalOfferings weeklyOfferings
+                           monthlyOfferings newMembersThisMonth newPrayerRequestsToday }
+          offeringStats { thisWeek lastWeek thisMonth lastMonth trend }
+          upcomingEvents { id title date time location description }
+          prayerRequests { id member request date status replies { responder message date } }
+          announcements { ...AnnouncementFields }
+        }
+        fragment AnnouncementFields on AnnouncementType {
+          id title content category isPinned eventDate eventTime location createdAt
+          createdByFullName targetGroupName
+          createdBy { id fullName email street { name } groups { id name } }
+        }
+    """,
+    "cards": """
+        query Cards($streetId: Int, $search: String) {
+          offeringCards(streetId: $streetId, search: $search) {
+            id code street number isTaken assignedToName assignedToId assignmentId assignedPhone
+            assignedYear pledgedAhadi pledgedShukrani pledgedMajengo progressAhadi progressShukrani progressMajengo
+          }
+          cardsOverview(streetId: $streetId) {
+            totalCards takenCards freeCards activelyUsedCards leastActiveCard
+            totalPledgedAhadi totalPledgedShukrani totalPledgedMajengo
+          }
+        }
+    """,
+}
+
+
+def post(view, query):
+    request = RequestFactory().post("/graphql/", json.dumps({"query": query}), content_type="application/json")
+    response = view(request)
+    assert response.status_code == 200, response.content
+    return response
+
+
+def main():
+    stock = GraphQLView.as_view(execution_context_class=BatchingExecutionContext)
+    cached = SmartChurchGraphQLView.as_view()
+    with test_database():
+        rows = []
+        for name, query in DOCUMENTS.items():
+            post(cached, query)
+            rows.append((
+                name,
+                median_ms(timeit(lambda: post(stock, query), repeat=50)),
+                median_ms(timeit(lambda: post(cached, query), repeat=50)),
+            ))
+        report("Request time, stock view vs document cache", rows, ("document", "stock ms", "cached ms"))
+        print(f"\ncache: {len(document_cache)} entries, {document_cache.hits} hits, {document_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Encoding GraphQL responses to the bytes sent to the client.
+
+Executes a 50-card offeringCardsConnection page, cardApplications and
+offeringCards (5,000 rows each) and memberOfferingHistory (15,000 entries) on
+the data seeded by ``bench_serialization``. It then times encoding each
+result and building the ``HttpResponse``, three ways: graphene-django's
+original ``json.dumps`` to ``str``, ``StdlibEncoder`` and ``OrjsonEncoder``.
+
+    python -m benchmarks.bench_json
+"""
+import json
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.http import HttpResponse  # noqa: E402
+from graphql import parse  # noqa: E402
+
+from benchmarks.bench_serialization import (  # noqa: E402
+    CARD_APPLICATIONS, OFFERING_CARDS, ROWS, member_history, run, seed,
+)
+from SmartChurch.json_encoding import OrjsonEncoder, StdlibEncoder  # noqa: E402
+
+CARDS_PAGE = parse("""
+    { offeringCardsConnection(first: 50) {
+        edges { cursor node { id code street number isTaken assignedToName assignedPhone pledgedAhadi
+                              progressAhadi } }
+        pageInfo { hasNextPage endCursor } } }
+""")
+
+
+def graphene_encode(data):
+    # What GraphQLView.json_encode did: a str, encoded again by HttpResponse
+    return json.dumps(data, separators=(',', ':'))
+
+
+def main():
+    stdlib, fast = StdlibEncoder(), OrjsonEncoder()
+    with test_database():
+        user = seed()
+        payloads = [
+            ("offeringCardsConnection(50)", {"data": run(user, CARDS_PAGE).data}),
+            ("cardApplications", {"data": run(user, CARD_APPLICATIONS).data}),
+            ("offeringCards", {"data": run(user, OFFERING_CARDS).data}),
+            ("memberOfferingHistory", {"data": run(user, member_history(user.id)).data}),
+        ]
+    rows = []
+    for label, payload in payloads:
+        assert json.loads(fast.encode(payload)) == json.loads(stdlib.encode(payload)) == payload
+        repeat = 200 if label.endswith("(50)") else 15
+        rows.append((
+            label,
+            f"{len(fast.encode(payload)) / 1024:.0f}",
+            median_ms(timeit(lambda: HttpResponse(graphene_encode(payload)), repeat=repeat)),
+            median_ms(timeit(lambda: HttpResponse(stdlib.encode(payload)), repeat=repeat)),
+            median_ms(timeit(lambda: HttpResponse(fast.encode(payload)), repeat=repeat)),
+        ))
+    report(f"response encoding ({ROWS} cards)", rows, ("payload", "KiB", "graphene ms", "json ms", "orjson ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Caller-side cost of logging on the request path.
+
+Replays the auth logging of one GraphQL request (a header check, a decoded
+token, the authenticated user and a resolver message) under the previous setup,
+``basicConfig(level=DEBUG)`` with f-string messages written synchronously, and
+under ``settings.LOGGING`` (lazy ``%s`` arguments, sampled hot-path loggers,
+background queue handler). Output goes to a temporary file in both cases so the
+numbers include a real ``write()``.
+
+    python -m benchmarks.bench_logging
+"""
+from benchmarks.common import setup_django, timeit, report
+
+setup_django()
+
+import logging  # noqa: E402
+import logging.config  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+
+REQUESTS = 2000
+TOKEN = "eyJhbGciOiJIUzI1NiJ9." + "x" * 180
+PAYLOAD = {"user_id": 42, "email": "member@example.com", "exp": 1900000000, "type": "access"}
+
+
+def legacy_request(auth, queries):
+    auth.info(f"Extracted token: {TOKEN}")
+    auth.info(f"Decoded payload: {PAYLOAD}")
+    auth.info(f"Authenticated user: {PAYLOAD['email']}")
+    queries.info(f"Authenticated user: {PAYLOAD['user_id']}, {PAYLOAD['email']}")
+
+
+def current_request(auth, queries):
+    if auth.isEnabledFor(logging.DEBUG):
+        auth.debug("Authenticated user: %s", PAYLOAD["email"])
+    queries.debug("Resolving ME_QUERY")
+    queries.debug("Authenticated user: %s", PAYLOAD["user_id"])
+    auth.info("Login successful for user %s", PAYLOAD["user_id"])
+
+
+def reset_logging():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(configure, request):
+    auth = logging.getLogger("churchMember.User_Auth_middleware")
+    queries = logging.getLogger("UserAuthentication.queries")
+    with tempfile.TemporaryFile("w+") as sink:
+        stderr, sys.stderr = sys.stderr, sink
+        try:
+            configure()
+            timings = timeit(lambda: [request(auth, queries) for _ in range(REQUESTS)], repeat=5)
+            reset_logging()
+            sink.seek(0, 2)
+            written = sink.tell()
+        finally:
+            sys.stderr = stderr
+    return [t / REQUESTS for t in timings], written
+
+
+def main():
+    reset_logging()
+    legacy, legacy_bytes = measure(lambda: logging.basicConfig(level=logging.DEBUG, force=True), legacy_request)
+    current, current_bytes = measure(lambda: logging.config.dictConfig(settings.LOGGING), current_request)
+    report(f"Logging cost per request ({REQUESTS} requests x 5 rounds)", [
+        ("basicConfig DEBUG, f-strings", f"{statistics.median(legacy) * 1e6:.1f}", legacy_bytes),
+        ("settings.LOGGING", f"{statistics.median(current) * 1e6:.1f}", current_bytes),
+    ], ("setup", "us/request", "bytes written"))
+
+
+if __name__ == "__main__":
+    main()
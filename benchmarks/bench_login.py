@@ -0,0 +1,101 @@
+"""
+Login throughput and the latency other requests see during a login burst.
+
+Simulates WORKERS sync workers behind one shared cache: each thread sends
+LoginUser mutations one at a time, as a sync worker would, while a probe
+thread keeps running a cheap query. The test compares the plain
+``authenticate()`` path with login slots capped at MAX_PENDING, fewer than
+the callers, so the cap is actually reached.
+
+    python -m benchmarks.bench_login
+"""
+from benchmarks.common import setup_django, test_database, report, percentile
+
+setup_django()
+
+import threading  # noqa: E402
+import time  # noqa: E402
+
+from django.contrib.auth import authenticate  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication import login_pool, mutations  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+WORKERS = 8
+MAX_PENDING = 2
+LOGINS_PER_THREAD = 3
+LOGIN = 'mutation { loginUser(input: {email: "%s", password: "%s"}) { accessToken } }'
+PROBE = '{ streets { id name } }'
+
+
+def execute(query):
+    return schema.execute(query, context_value=RequestFactory().post('/graphql/'))
+
+
+def burst(email, password):
+    ok, busy, probe_latencies = [0], [0], []
+    done = threading.Event()
+
+    def login_worker():
+        for _ in range(LOGINS_PER_THREAD):
+            result = execute(LOGIN % (email, password))
+            if result.errors:
+                busy[0] += 1
+            else:
+                ok[0] += 1
+        connection.close()
+
+    def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            execute(PROBE)
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+        connection.close()
+
+    threads = [threading.Thread(target=login_worker) for _ in range(WORKERS)]
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+    return ok[0], busy[0], elapsed, probe_latencies
+
+
+def legacy_authenticate_member(request, email, password):
+    return authenticate(request, email=email, password=password)
+
+
+def main():
+    with test_database():
+        street = Street.objects.create(name='Benchmark')
+        member = Member.objects.create_user(email='login@example.com', full_name='Login', password='s3cret-pass', street=street)
+        rows = []
+        login_pool.login_slots = login_pool.LoginSlots(max_pending=MAX_PENDING)
+        limited = mutations.authenticate_member
+        for label, impl in (('sync authenticate()', legacy_authenticate_member), ('login slots', limited)):
+            mutations.authenticate_member = impl
+            ok, busy, elapsed, probes = burst(member.email, 's3cret-pass')
+            rows.append((
+                label,
+                ok,
+                busy,
+                f"{ok / elapsed:.2f}",
+                f"{percentile(probes, 50) * 1000:.1f}",
+                f"{percentile(probes, 99) * 1000:.1f}",
+            ))
+        mutations.authenticate_member = limited
+        report(f"{WORKERS} workers x {LOGINS_PER_THREAD} logins, {MAX_PENDING} login slots",
+               rows, ('path', 'ok', 'rejected', 'logins/s', 'probe p50 ms', 'probe p99 ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Cost of the shared metrics registry on the hot path.
+
+Times the operations the pipeline performs per request and per SQL statement
+against a file-backed registry, and the cost of rendering a scrape.
+
+    python -m benchmarks.bench_metrics
+"""
+import tempfile
+import time
+
+from benchmarks.common import setup_django, report
+
+setup_django()
+
+from Monitoring.registry import MetricsRegistry  # noqa: E402
+
+N = 100_000
+
+
+def per_call_us(fn, n=N):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return f"{(time.perf_counter() - start) / n * 1e6:.2f}"
+
+
+def main():
+    registry = MetricsRegistry(directory=tempfile.mkdtemp(prefix="bench-metrics-"))
+    queries = registry.counter("bench_queries_total", "")
+    latency = registry.histogram("bench_latency_seconds", "")
+    memory = MetricsRegistry(directory=None)
+    memory_queries = memory.counter("bench_queries_total", "")
+
+    rows = [
+        ("counter.inc (mmap)", per_call_us(lambda: queries.inc(alias="default"))),
+        ("counter.inc (memory)", per_call_us(lambda: memory_queries.inc(alias="default"))),
+        ("histogram.observe (mmap)", per_call_us(lambda: latency.observe(0.012, route="graphql/", operation="Dash"))),
+    ]
+    for i in range(500):
+        latency.observe(0.01, route=f"route{i % 20}", operation=f"Op{i}")
+    rows.append(("render, 500 histograms", f"{float(per_call_us(registry.render, n=20)) / 1000:.2f} ms"))
+    report("Metrics registry", rows, ("operation", "us / call"))
+
+
+if __name__ == "__main__":
+    main()
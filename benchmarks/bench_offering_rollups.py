@@ -0,0 +1,116 @@
+"""
+Pastor offering reports from daily rollups vs the raw Offering table.
+
+Seeds 200,000 offerings on the Sundays of two years, over 20 streets, four
+mass types and three offering types, then builds the rollups. Times the
+aggregates behind dashboardStats, offeringStats and offeringsByMass/Type/Street
+over the raw table (as the resolvers used to run them) and the whole report
+operation on the rollups. The report asks for the full history and for the
+last 90 days.
+
+    python -m benchmarks.bench_offering_rollups
+"""
+import datetime
+import random
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.db.models import Sum  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from churchMember import rollups  # noqa: E402
+from churchMember.models import DailyOfferingRollup, Offering  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+OFFERINGS = 200000
+WEEKS = 104
+STREETS = 20
+
+REPORT = """
+    {{ dashboardStats {{ totalOfferings weeklyOfferings monthlyOfferings }}
+       offeringStats {{ thisWeek lastWeek thisMonth lastMonth }}
+       offeringsByMass{args} {{ type amount percentage }}
+       offeringsByType{args} {{ type amount percentage }}
+       offeringsByStreet{args} {{ name total memberCount }} }}
+"""
+
+
+def seed():
+    random.seed(1)
+    streets = list(Street.objects.bulk_create(Street(name=f"Street {i}") for i in range(STREETS)))
+    today = timezone.localdate()
+    Offering.objects.bulk_create(
+        (
+            Offering(amount=random.randint(1, 200) * 500, street=random.choice(streets),
+                     offering_type=random.choice(("AHADI", "SHUKRANI", "MAJENGO")),
+                     mass_type=random.choice(("MAJOR", "MORNING_GLORY", "EVENING_GLORY", "SELI")),
+                     date=today - datetime.timedelta(weeks=random.randrange(WEEKS)))
+            for _ in range(OFFERINGS)
+        ),
+        batch_size=2000,
+    )
+    rollups.rebuild()
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    member.role = "PASTOR"
+    member.save()
+    return member
+
+
+def run(user, document):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, document, context_value=request,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def raw_report(start=None):
+    # The queries the resolvers ran against Offering before the rollups
+    now = timezone.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    week_start = now - datetime.timedelta(days=now.weekday())
+    last_month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+    for qs in (
+        Offering.objects.all(),
+        Offering.objects.filter(date__gte=now - datetime.timedelta(days=7)),
+        Offering.objects.filter(date__gte=month_start),
+        Offering.objects.filter(date__gte=week_start),
+        Offering.objects.filter(date__gte=week_start - datetime.timedelta(days=7), date__lt=week_start),
+        Offering.objects.filter(date__gte=month_start),
+        Offering.objects.filter(date__gte=last_month_start, date__lt=month_start),
+    ):
+        qs.aggregate(total=Sum('amount'))
+    ranged = Offering.objects.filter(date__gte=start) if start else Offering.objects.all()
+    for group in ('mass_type', 'offering_type'):
+        ranged.aggregate(total=Sum('amount'))
+        list(ranged.values(group).annotate(amount=Sum('amount')).order_by('-amount'))
+    list(ranged.values('street_id', 'street__name').annotate(amount=Sum('amount')).order_by('-amount'))
+
+
+def main():
+    with test_database():
+        user = seed()
+        since = timezone.localdate() - datetime.timedelta(days=90)
+        rows = []
+        for label, start in (("all history", None), ("last 90 days", since)):
+            args = f'(start: "{start.isoformat()}")' if start else ""
+            document = parse(REPORT.format(args=args))
+            rows.append((
+                label,
+                median_ms(timeit(lambda: raw_report(start), repeat=5)),
+                median_ms(timeit(lambda: run(user, document), repeat=5)),
+            ))
+        count = DailyOfferingRollup.objects.count()
+    report(f"offering reports ({OFFERINGS} offerings, {count} rollup rows)", rows,
+           ("range", "raw Offering ms", "rollups ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Keyset vs OFFSET pagination of memberRequestsConnection.
+
+Seeds 20,000 member requests and fetches a 50-row page near the start, the
+middle and the end of the list, with the keyset condition the connection
+uses and with an equivalent OFFSET query. The whole memberRequestsConnection
+operation is timed too, as is the deprecated unbounded memberRequests list.
+
+    python -m benchmarks.bench_pagination
+"""
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from ChurchSecreatary.models import MemberRequest  # noqa: E402
+from ChurchSecreatary.queries import MEMBER_REQUESTS  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Member  # noqa: E402
+
+ROWS = 20000
+PAGE = 50
+
+CONNECTION = parse("""
+    query Page($after: String) {
+      memberRequestsConnection(first: 50, after: $after) {
+        edges { node { id memberName requestType status submittedDate } }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+""")
+LIST = parse("{ memberRequests { id memberName requestType status submittedDate } }")
+
+
+def seed():
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    now = timezone.now()
+    MemberRequest.objects.bulk_create(
+        MemberRequest(member=member, request_type="OTHER", submitted_at=now - timezone.timedelta(minutes=i))
+        for i in range(ROWS)
+    )
+    member.role = "PASTOR"
+    member.save()
+    return member
+
+
+def run(user, document, variables=None):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, document, context_value=request, variable_values=variables,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def ordered_requests():
+    return MemberRequest.objects.select_related("member").order_by(*MEMBER_REQUESTS.order_by())
+
+
+def keyset_page(cursor):
+    qs = ordered_requests()
+    if cursor:
+        qs = qs.filter(MEMBER_REQUESTS.after(MEMBER_REQUESTS.decode(cursor)))
+    return list(qs[:PAGE])
+
+
+def offset_page(offset):
+    return list(ordered_requests()[offset:offset + PAGE])
+
+
+def main():
+    with test_database():
+        user = seed()
+        rows = []
+        for label, offset in (("start", 0), ("middle", ROWS // 2), ("end", ROWS - PAGE)):
+            # The cursor of the row just before the page
+            cursor = MEMBER_REQUESTS.cursor(ordered_requests()[offset - 1]) if offset else None
+            assert [r.id for r in keyset_page(cursor)] == [r.id for r in offset_page(offset)]
+            rows.append((
+                f"{label} (row {offset})",
+                median_ms(timeit(lambda: keyset_page(cursor), repeat=20)),
+                median_ms(timeit(lambda: offset_page(offset), repeat=20)),
+                median_ms(timeit(lambda: run(user, CONNECTION, {"after": cursor}), repeat=20)),
+            ))
+        rows.append(("unbounded list", "-", "-", median_ms(timeit(lambda: run(user, LIST), repeat=3))))
+    report(f"member requests ({ROWS} rows), one page of {PAGE}", rows,
+           ("page", "keyset ms", "OFFSET ms", "GraphQL ms"))
+
+
+if __name__ == "__main__":
+    main()
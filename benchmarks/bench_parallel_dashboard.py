@@ -0,0 +1,115 @@
+"""
+Wall-clock time of the composite pastor dashboard query, serial vs parallel
+root fields.
+
+The same document is executed with ``BatchingExecutionContext`` (root fields
+one after another) and ``ParallelBatchingExecutionContext`` (root fields on
+the pool). Each root field is also timed on its own to show the slowest one,
+which is the floor for the parallel run. Every SQL statement is delayed by
+LATENCY_MS to stand in for the round trip to PostgreSQL.
+
+    python -m benchmarks.bench_parallel_dashboard
+"""
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from SmartChurch.parallel_execution import ParallelBatchingExecutionContext  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+from churchMember.models import Offering, PrayerRequest  # noqa: E402
+
+LATENCY_MS = 2
+
+FIELDS = {
+    "dashboardStats": "dashboardStats { totalMembers activeGroups prayerRequests totalOfferings weeklyOfferings "
+                      "monthlyOfferings newMembersThisMonth newPrayerRequestsToday }",
+    "offeringStats": "offeringStats { thisWeek lastWeek thisMonth lastMonth trend }",
+    "offeringsByMass": "offeringsByMass { type amount percentage }",
+    "offeringsByType": "offeringsByType { type amount percentage }",
+    "offeringsByStreet": "offeringsByStreet { name total memberCount average trend }",
+    "recentOfferings": "recentOfferings { id date memberName street amount offeringType massType attendant }",
+    "upcomingEvents": "upcomingEvents { id title date }",
+    "prayerRequests": "prayerRequests { id member request status }",
+}
+
+
+def simulated_latency(execute, sql, params, many, context):
+    time.sleep(LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+def add_latency(sender, connection, **kwargs):
+    connection.execute_wrappers.append(simulated_latency)
+
+
+def seed():
+    rng = random.Random(7)
+    streets = [Street.objects.create(name=f"Street {i}") for i in range(8)]
+    members = [
+        Member.objects.create_user(email=f"member{i}@example.com", full_name=f"Member {i}",
+                                   password="x", street=streets[i % 8])
+        for i in range(80)
+    ]
+    today = datetime.date.today()
+    Offering.objects.bulk_create(
+        Offering(
+            member=rng.choice(members), street=rng.choice(streets), attendant=members[0],
+            amount=Decimal(rng.randint(1, 100) * 500),
+            offering_type=rng.choice(["TITHE", "AHADI", "SHUKRANI", "MAJENGO"]),
+            mass_type=rng.choice(["MAJOR", "MORNING_GLORY", "EVENING_GLORY", "SELI"]),
+            date=today - datetime.timedelta(days=rng.randint(0, 90)),
+        )
+        for _ in range(3000)
+    )
+    for i in range(10):
+        PrayerRequest.objects.create(member=members[i], request=f"Request {i}")
+    return members[0]
+
+
+def run(document, context_class, user):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, document, context_value=request,
+                     execution_context_class=context_class)
+    assert not result.errors, result.errors
+    return result
+
+
+def main():
+    dashboard = parse("query Dashboard { %s }" % " ".join(FIELDS.values()))
+    with test_database() as connection:
+        user = seed()
+        user.role = "PASTOR"
+        user.save()
+        connection_created.connect(add_latency)
+        connection.execute_wrappers.append(simulated_latency)
+
+        rows = []
+        for name, selection in FIELDS.items():
+            document = parse("{ %s }" % selection)
+            rows.append((name, median_ms(timeit(lambda: run(document, BatchingExecutionContext, user), repeat=10))))
+        report("Root fields on their own", rows, ("field", "ms"))
+
+        run(dashboard, ParallelBatchingExecutionContext, user)
+        report("Composite dashboard query", [
+            ("serial", median_ms(timeit(lambda: run(dashboard, BatchingExecutionContext, user), repeat=20))),
+            ("parallel", median_ms(timeit(lambda: run(dashboard, ParallelBatchingExecutionContext, user), repeat=20))),
+        ], ("root fields", "ms"))
+
+        connection.execute_wrappers.remove(simulated_latency)
+        connection_created.disconnect(add_latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Pastor offering reports with closed months vs daily rollups only.
+
+Seeds the offerings of bench_offering_rollups (200,000 offerings on the
+Sundays of two years), times the report over the full history and the last
+90 days on the rollups, then closes every finished month and times it again
+on the snapshots plus the open month's rollups. Also times closing one month.
+
+    python -m benchmarks.bench_period_close
+"""
+import datetime
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.utils import timezone  # noqa: E402
+from graphql import parse  # noqa: E402
+
+from benchmarks.bench_offering_rollups import REPORT, run, seed  # noqa: E402
+from ChurchSecreatary import periods  # noqa: E402
+from ChurchSecreatary.models import MonthlyOfferingSnapshot, OfferingPeriod  # noqa: E402
+from churchMember.models import Offering  # noqa: E402
+
+
+def finished_months():
+    this_month = timezone.localdate().replace(day=1)
+    months = sorted({(d.year, d.month) for d in Offering.objects.dates('date', 'month')})
+    return [(year, month) for year, month in months if datetime.date(year, month, 1) < this_month]
+
+
+def main():
+    with test_database():
+        user = seed()
+        since = timezone.localdate() - datetime.timedelta(days=90)
+        documents = [
+            ("all history", parse(REPORT.format(args=""))),
+            ("last 90 days", parse(REPORT.format(args=f'(start: "{since.isoformat()}")'))),
+        ]
+        open_ms = [median_ms(timeit(lambda: run(user, document), repeat=9)) for _, document in documents]
+
+        months = finished_months()
+        close_ms = []
+        for year, month in months:
+            close_ms.extend(timeit(lambda: periods.close(year, month, user), repeat=1))
+        closed_ms = [median_ms(timeit(lambda: run(user, document), repeat=9)) for _, document in documents]
+        snapshots = MonthlyOfferingSnapshot.objects.count()
+        closed = OfferingPeriod.objects.filter(is_closed=True).count()
+
+    rows = [(label, before, after) for (label, _), before, after in zip(documents, open_ms, closed_ms)]
+    report(f"offering reports ({closed} closed months, {snapshots} snapshot rows)", rows,
+           ("range", "rollups ms", "closed months ms"))
+    report("month close", [("close one month", median_ms(close_ms))], ("operation", "ms"))
+
+
+if __name__ == "__main__":
+    main()
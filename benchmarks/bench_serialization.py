@@ -0,0 +1,98 @@
+"""
+Per-row cost of the large secretary lists.
+
+Seeds 5,000 offering cards (each with an assignment and three entries), 5,000
+card applications and a member with 5,000 offering entries, then executes
+offeringCards, cardApplications and memberOfferingHistory { entries } and
+reports the median time per operation and per row.
+
+    python -m benchmarks.bench_serialization
+"""
+import statistics
+
+from benchmarks.common import setup_django, test_database, timeit, report
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from ChurchSecreatary.models import CardApplication, CardAssignment, OfferingCard, OfferingEntry  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Member, Street  # noqa: E402
+
+ROWS = 5000
+STREETS = 10
+
+OFFERING_CARDS = parse("""
+    { offeringCards { id code street number isTaken assignedToName assignedToId assignmentId assignedPhone
+                      assignedYear pledgedAhadi pledgedShukrani pledgedMajengo progressAhadi progressShukrani
+                      progressMajengo } }
+""")
+CARD_APPLICATIONS = parse("""
+    { cardApplications { id fullName phoneNumber street preferredNumber note pledgedAhadi pledgedShukrani
+                         pledgedMajengo status createdAt } }
+""")
+
+
+def member_history(member_id):
+    return parse(f"""
+        {{ memberOfferingHistory(memberId: {member_id}) {{ totalAhadi entries {{ code date entryType amount }} }} }}
+    """)
+
+
+def seed():
+    streets = [Street.objects.create(name=f"{chr(65 + i)}{chr(65 + i)} Street") for i in range(STREETS)]
+    member = Member.objects.create_user(email="member@example.com", full_name="Member", password="x")
+    per_street = ROWS // STREETS
+    OfferingCard.objects.bulk_create(
+        OfferingCard(street=street, number=n, code=f"{street.name[:2]}-{n:03d}", is_taken=True, assigned_to=member)
+        for street in streets for n in range(1, per_street + 1)
+    )
+    cards = list(OfferingCard.objects.all())
+    CardAssignment.objects.bulk_create(
+        CardAssignment(card=card, member=member, full_name=f"Holder {card.id}", phone_number="0700000000",
+                       pledged_ahadi=120000, pledged_shukrani=60000, pledged_majengo=30000)
+        for card in cards
+    )
+    OfferingEntry.objects.bulk_create(
+        OfferingEntry(card=card, entry_type=entry_type, amount=5000)
+        for card in cards for entry_type in ("AHADI", "SHUKRANI", "MAJENGO")
+    )
+    CardApplication.objects.bulk_create(
+        CardApplication(full_name=f"Applicant {i}", phone_number="0700000000", street=streets[i % STREETS],
+                        preferred_number=i % 300 + 1, pledged_ahadi=100000)
+        for i in range(ROWS)
+    )
+    member.role = "PASTOR"
+    member.save()
+    return member
+
+
+def run(user, document):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = execute(schema.graphql_schema, document, context_value=request,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def main():
+    with test_database():
+        user = seed()
+        rows = []
+        for label, document, count in (
+            ("offeringCards", OFFERING_CARDS, ROWS),
+            ("cardApplications", CARD_APPLICATIONS, ROWS),
+            ("memberOfferingHistory.entries", member_history(user.id), ROWS * 3),
+        ):
+            run(user, document)
+            median = statistics.median(timeit(lambda: run(user, document), repeat=7))
+            rows.append((label, count, f"{median * 1000:.1f}", f"{median / count * 1e6:.1f}"))
+    report(f"large lists ({ROWS} cards)", rows, ("field", "rows", "ms", "us/row"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Overhead of ResolverTracingMiddleware.
+
+Executes a list-heavy query (announcements with their authors, streets and
+groups) without the middleware, with the middleware on an unsampled request
+and on a sampled one.
+
+    python -m benchmarks.bench_tracing
+"""
+import tempfile
+
+from benchmarks.common import setup_django, test_database, timeit, report, median_ms
+
+setup_django()
+
+from django.test import RequestFactory  # noqa: E402
+from graphql import execute, parse  # noqa: E402
+
+from Monitoring import registry as registry_module  # noqa: E402
+from Monitoring.tracing import TRACE_ATTR, ResolverTracingMiddleware  # noqa: E402
+from SmartChurch.dataloader import BatchingExecutionContext  # noqa: E402
+from SmartChurch.main_schema import schema  # noqa: E402
+from UserAuthentication.models import Group, Member, Street  # noqa: E402
+from churchMember.models import Announcement  # noqa: E402
+
+QUERY = parse("""
+    { announcements { id title content category isPinned createdAt createdByFullName targetGroupName
+                      createdBy { id fullName email street { name } groups { id name } } } }
+""")
+
+
+def seed():
+    streets = [Street.objects.create(name=f"Street {i}") for i in range(5)]
+    groups = [Group.objects.create(name=f"Group {i}") for i in range(5)]
+    members = []
+    for i in range(20):
+        member = Member.objects.create_user(email=f"member{i}@example.com", full_name=f"Member {i}",
+                                            password="x", street=streets[i % 5])
+        member.groups.set(groups[: i % 5 + 1])
+        members.append(member)
+    for i in range(100):
+        Announcement.objects.create(title=f"Announcement {i}", content="...", created_by=members[i % 20],
+                                    target_group=groups[i % 5])
+    members[0].role = "PASTOR"
+    members[0].save()
+    return members[0]
+
+
+def run(user, middleware, sampled):
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    request.__dict__[TRACE_ATTR] = sampled
+    result = execute(schema.graphql_schema, QUERY, context_value=request, middleware=middleware,
+                     execution_context_class=BatchingExecutionContext)
+    assert not result.errors, result.errors
+    return result
+
+
+def main():
+    registry_module.registry.directory = tempfile.mkdtemp(prefix="bench-tracing-")
+    tracing = [ResolverTracingMiddleware()]
+    with test_database():
+        user = seed()
+        run(user, tracing, True)
+        rows = [
+            ("no middleware", median_ms(timeit(lambda: run(user, [], False), repeat=30))),
+            ("not sampled", median_ms(timeit(lambda: run(user, tracing, False), repeat=30))),
+            ("sampled", median_ms(timeit(lambda: run(user, tracing, True), repeat=30))),
+        ]
+    report("announcements (100 rows), resolver tracing", rows, ("mode", "ms"))
+
+
+if __name__ == "__main__":
+    main()
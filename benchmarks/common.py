@@ -0,0 +1,70 @@
+"""
+Shared helpers for the standalone benchmark scripts in this directory.
+
+Each script is run from the repository root, e.g. ``python -m benchmarks.bench_auth``.
+The scripts create a throwaway test database using the configured
+``DJANGO_SETTINGS_MODULE`` so they never touch real data.
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SmartChurch.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create an empty test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timeit(fn, repeat=5, number=1):
+    """Return per-call timings (seconds) of ``fn`` over ``repeat`` rounds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def report(title, rows, headers):
+    """Print a fixed-width results table."""
+    print(f"\n{title}")
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
+
+
+def median_ms(timings):
+    return f"{statistics.median(timings) * 1000:.2f}"
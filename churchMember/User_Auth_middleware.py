@@ -1,52 +1,67 @@
 import logging
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 import jwt
-from django.conf import settings
+from UserAuthentication.tokens import verify_token
 
 logger = logging.getLogger(__name__)
 
+# Attribute used to memoize the authenticated user on the HttpRequest
+REQUEST_USER_ATTR = "_jwt_user"
+
+
+def authenticate_request(request):
+    """
+    Resolve the Bearer token on ``request`` to a Member (or AnonymousUser).
+
+    The token is decoded and the user loaded at most once per HTTP request; the
+    result is memoized on the request so every GraphQL field reads the same user.
+    """
+    cached = request.__dict__.get(REQUEST_USER_ATTR)
+    if cached is not None:
+        return cached
+
+    auth_header = request.headers.get("Authorization", "")
+    user = AnonymousUser()
+
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header.split("Bearer ")[1]
+        try:
+            # Shared verification service; cached per token digest (raises on invalid/expired)
+            payload, user_obj = verify_token(token)
+            user_id = payload.get("user_id")
+            if user_obj:
+                user = user_obj
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Authenticated user: %s", user.email)
+            else:
+                logger.warning("No user found with id %s from token.", user_id)
+
+        except jwt.ExpiredSignatureError:
+            logger.warning("JWT token is invalid or expired.")
+        except (jwt.InvalidTokenError, InvalidToken, TokenError) as e:
+            logger.warning("Invalid JWT token: %s", e)
+        except Exception as e:
+            logger.error("Unexpected error decoding JWT: %s", e)
+    else:
+        logger.debug("Authorization header missing or improperly formatted.")
+
+    request.__dict__[REQUEST_USER_ATTR] = user
+    return user
+
+
 class JWTAuthenticationMiddleware:
-    
+    """
+    Graphene field middleware exposing the request-scoped JWT user as
+    ``info.context.user``.
+
+    Graphene invokes field middleware for every resolved field, so the actual
+    authentication happens once in ``authenticate_request``; every later field
+    only pays for a dict lookup.
+    """
 
     def resolve(self, next, root, info, **kwargs):
         request = info.context
-        auth_header = request.headers.get("Authorization", "")
-        user = AnonymousUser()
-
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split("Bearer ")[1]
-            try:
-                # Decode token using the same method used for issuing tokens (PyJWT + SECRET_KEY)
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])  # raises on invalid/expired
-
-                # Get user from token
-                User = get_user_model()
-                user_id = payload.get("user_id")
-                user_obj = User.objects.filter(id=user_id).first()
-                if user_obj:
-                    user = user_obj
-                    print(f"Authenticated user: {user.email}")
-                    logger.info(f"Authenticated user: {user.email}")
-                else:
-                    print(f"No user found with id {user_id} from token.")
-                    logger.warning(f"No user found with id {user_id} from token.")
-
-            except jwt.ExpiredSignatureError:
-                print("JWT token is invalid or expired.")
-                logger.warning("JWT token is invalid or expired.")
-            except (jwt.InvalidTokenError, InvalidToken, TokenError) as e:
-                print(f"Invalid JWT token: {str(e)}")
-                logger.warning(f"Invalid JWT token: {str(e)}")
-            except Exception as e:
-                print(f"Unexpected error decoding JWT: {str(e)}")
-                logger.error(f"Unexpected error decoding JWT: {str(e)}")
-        else:
-            print("Authorization header missing or improperly formatted.")
-            logger.info("Authorization header missing or improperly formatted.")
-
-        request.user = user
-        info.context.user = user
+        if REQUEST_USER_ATTR not in request.__dict__:
+            request.user = authenticate_request(request)
         return next(root, info, **kwargs)
@@ -1,10 +1,8 @@
 from typing import Tuple, Optional
-from django.contrib.auth import get_user_model
-from django.contrib.auth.models import AnonymousUser
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from django.conf import settings
 import jwt
+from UserAuthentication.tokens import verify_token
 
 
 class GraphQLJWTAuthentication(BaseAuthentication):
@@ -12,7 +10,8 @@ class GraphQLJWTAuthentication(BaseAuthentication):
     DRF authentication backend that accepts the same Bearer token your GraphQL
     middleware (churchMember.User_Auth_middleware.JWTAuthenticationMiddleware) expects.
 
-    It decodes the JWT using settings.SECRET_KEY and HS256 and extracts user_id.
+    Tokens are verified through UserAuthentication.tokens.verify_token, so a
+    session's repeated requests reuse the cached payload and user.
     """
 
     keyword = "Bearer"
@@ -24,12 +23,9 @@ class GraphQLJWTAuthentication(BaseAuthentication):
 
         token = auth_header.split(f"{self.keyword} ", 1)[1].strip()
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])  # same as GraphQL middleware
-            user_id = payload.get("user_id")
-            if not user_id:
+            payload, user = verify_token(token)  # same cache as the GraphQL middleware
+            if not payload.get("user_id"):
                 raise AuthenticationFailed("Invalid token: user_id missing")
-            User = get_user_model()
-            user = User.objects.filter(id=user_id).first()
             if not user:
                 raise AuthenticationFailed("User not found")
             return (user, None)
@@ -0,0 +1,15 @@
+"""
+Request-scoped loaders for churchMember relations; see SmartChurch.dataloader.
+"""
+from SmartChurch.dataloader import get_loader, CountLoader, RelatedListLoader
+
+from .models import DevotionalInteraction, PrayerReply
+
+
+def prayer_replies(info, prayer_id):
+    return get_loader(info, RelatedListLoader, PrayerReply, 'prayer_id',
+                      order_by=('created_at',), select_related=('responder',)).load(prayer_id)
+
+
+def devotional_amen_count(info, devotional_id):
+    return get_loader(info, CountLoader, DevotionalInteraction, 'devotional_id', amened=True).load(devotional_id)
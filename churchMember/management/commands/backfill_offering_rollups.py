@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from churchMember import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily offering rollups from the offerings, for a date range or the whole history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        written = rollups.rebuild(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily offering rollups"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UserAuthentication', '0004_revokedtoken'),
+        ('churchMember', '0008_alter_offering_offering_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['-created_at', '-id'], name='announcement_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prayerrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='prayerrequest_created_idx'),
+        ),
+    ]
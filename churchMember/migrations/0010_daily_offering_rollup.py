@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Offering = apps.get_model('churchMember', 'Offering')
+    DailyOfferingRollup = apps.get_model('churchMember', 'DailyOfferingRollup')
+    totals = (
+        Offering.objects.values('date', 'street_id', 'mass_type', 'offering_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    DailyOfferingRollup.objects.bulk_create(
+        (DailyOfferingRollup(amount=row.pop('total'), **row) for row in totals),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UserAuthentication', '0004_revokedtoken'),
+        ('churchMember', '0009_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOfferingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('mass_type', models.CharField(choices=[('MAJOR', 'Major'), ('MORNING_GLORY', 'Morning Glory'), ('EVENING_GLORY', 'Evening Glory'), ('SELI', 'SELI')], max_length=50)),
+                ('offering_type', models.CharField(choices=[('TITHE', 'Tithe'), ('SPECIAL_OFFERING', 'Special Offering'), ('GENERAL_CONTRIBUTION', 'General Contribution'), ('AHADI', 'Ahadi'), ('SHUKRANI', 'Shukrani'), ('MAJENGO', 'Majengo')], max_length=50)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('street', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offering_rollups', to='UserAuthentication.street')),
+            ],
+            options={
+                'unique_together': {('date', 'street', 'mass_type', 'offering_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
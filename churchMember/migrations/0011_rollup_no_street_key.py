@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:54
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_no_street_duplicates(apps, schema_editor):
+    # Rows without a street could be created twice before the constraint below
+    DailyOfferingRollup = apps.get_model('churchMember', 'DailyOfferingRollup')
+    duplicates = (
+        DailyOfferingRollup.objects.filter(street__isnull=True)
+        .values('date', 'mass_type', 'offering_type')
+        .annotate(rows=Count('id'), total=Sum('amount'), offerings=Sum('count'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        rows = DailyOfferingRollup.objects.filter(
+            street__isnull=True, date=row['date'],
+            mass_type=row['mass_type'], offering_type=row['offering_type'],
+        ).order_by('id')
+        keep = rows.first()
+        rows.exclude(id=keep.id).delete()
+        DailyOfferingRollup.objects.filter(id=keep.id).update(amount=row['total'], count=row['offerings'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('churchMember', '0010_daily_offering_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_no_street_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailyofferingrollup',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyofferingrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'street', 'mass_type', 'offering_type'), name='dailyofferingrollup_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyofferingrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('street__isnull', True)), fields=('date', 'mass_type', 'offering_type'), name='dailyofferingrollup_no_street_key'),
+        ),
+    ]
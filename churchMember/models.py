@@ -39,6 +39,33 @@ class Offering(models.Model):
         return f"{self.amount} {self.offering_type} by {self.member.full_name if self.member else 'Anonymous'}"
 
 
+class DailyOfferingRollup(models.Model):
+    """Offering totals per day, street, mass type and offering type.
+    Kept in step with Offering by churchMember.rollups; rebuild history with
+    the backfill_offering_rollups command.
+    """
+    date = models.DateField()
+    street = models.ForeignKey(Street, on_delete=models.SET_NULL, null=True, related_name='offering_rollups')
+    mass_type = models.CharField(max_length=50, choices=Offering.MASS_TYPES)
+    offering_type = models.CharField(max_length=50, choices=Offering.OFFERING_TYPES)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'street', 'mass_type', 'offering_type'],
+                                    name='dailyofferingrollup_key'),
+            # NULLs are distinct in the key above, so rows without a street get their own
+            models.UniqueConstraint(fields=['date', 'mass_type', 'offering_type'],
+                                    condition=models.Q(street__isnull=True),
+                                    name='dailyofferingrollup_no_street_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.street_id} {self.mass_type} {self.offering_type}: {self.amount} ({self.count})"
+
+
 class Event(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -89,6 +116,9 @@ class PrayerRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['-created_at', '-id'], name='prayerrequest_created_idx')]
+
     def __str__(self):
         return f"Prayer by {self.member.full_name}"
 
@@ -161,6 +191,9 @@ class Announcement(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     rsvp_count = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [models.Index(fields=['-created_at', '-id'], name='announcement_created_idx')]
+
     def __str__(self):
         return self.title
 
@@ -0,0 +1,94 @@
+"""
+Daily offering rollups (``DailyOfferingRollup``).
+
+Each (date, street, mass_type, offering_type) has one row with the amount and
+number of offerings recorded for it. Code that creates ``Offering`` rows calls
+``record()`` in the same transaction, and the deltas are added by the database
+(``SmartChurch.counters``).
+
+The Pastor offering reports (``dashboardStats``, ``offeringStats`` and
+``offeringsBy*``) aggregate rollups instead of the raw ``Offering`` table.
+Their cost grows with the number of days in the range, not the number of
+offerings. Months closed by the secretaries (``ChurchSecreatary.periods``) are
+read from their monthly snapshots instead.
+
+Deleting a street sets its offerings' street to NULL; ``forget_street()``
+(a ``pre_delete`` receiver in ``churchMember.signals``) folds its rollups into
+the rows without a street first.
+
+``rebuild()`` (``manage.py backfill_offering_rollups``) recomputes the rollups
+for a date range, or the whole history, from ``Offering``.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from SmartChurch.counters import increment
+from .models import DailyOfferingRollup, Offering
+
+KEY_FIELDS = ('date', 'street_id', 'mass_type', 'offering_type')
+
+_CENTS = Decimal('0.01')
+_amount_field = Offering._meta.get_field('amount')
+
+
+def _amount(value):
+    # The amount as the database stores it (inputs may arrive as floats)
+    return _amount_field.to_python(value).quantize(_CENTS)
+
+
+def deltas(offerings):
+    """``{(date, street_id, mass_type, offering_type): [amount, count]}`` of ``offerings``."""
+    changes = defaultdict(lambda: [Decimal(0), 0])
+    for offering in offerings:
+        change = changes[tuple(getattr(offering, name) for name in KEY_FIELDS)]
+        change[0] += _amount(offering.amount)
+        change[1] += 1
+    return changes
+
+
+def record(offerings):
+    """Add newly saved ``offerings`` to the rollups."""
+    increment(DailyOfferingRollup, KEY_FIELDS, ('amount', 'count'), deltas(offerings))
+
+
+def forget_street(street):
+    """
+    Move the rollups of ``street`` onto the rows without a street before it is
+    deleted, as its offerings' street is set to NULL.
+    """
+    rows = DailyOfferingRollup.objects.filter(street=street)
+    changes = {(row.date, None, row.mass_type, row.offering_type): [row.amount, row.count] for row in rows}
+    with transaction.atomic():
+        increment(DailyOfferingRollup, KEY_FIELDS, ('amount', 'count'), changes)
+        rows.delete()
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the rollups of the days from ``start`` to ``end`` (inclusive,
+    either open). Returns the number of rollup rows written.
+    """
+    days = {}
+    if start:
+        days['date__gte'] = start
+    if end:
+        days['date__lte'] = end
+    totals = (
+        Offering.objects.filter(**days)
+        .values(*KEY_FIELDS)
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        DailyOfferingRollup.objects.filter(**days).delete()
+        rows = DailyOfferingRollup.objects.bulk_create(
+            (
+                DailyOfferingRollup(amount=row.pop('total'), **row)
+                for row in totals
+            ),
+            batch_size=500,
+        )
+    return len(rows)
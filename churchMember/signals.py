@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from UserAuthentication.models import Street
+from . import rollups
+
+
+@receiver(pre_delete, sender=Street)
+def fold_street_rollups(sender, instance, **kwargs):
+    # The rollups' street would be set to NULL next to existing no-street rows
+    rollups.forget_street(instance)
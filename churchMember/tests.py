@@ -1,3 +1,69 @@
+import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
 from django.test import TestCase
 
-# Create your tests here.
+from UserAuthentication.models import Street
+from . import rollups
+from .models import DailyOfferingRollup, Offering
+
+SUNDAY = datetime.date(2026, 10, 4)
+
+
+class OfferingRollupTests(TestCase):
+    def setUp(self):
+        self.street = Street.objects.create(name='Pride Street')
+        self.other = Street.objects.create(name='Hope Street')
+
+    def offer(self, amount, street=None, date=SUNDAY, offering_type='TITHE'):
+        offerings = [Offering.objects.create(amount=amount, offering_type=offering_type, mass_type='MAJOR',
+                                             street=street, date=date)]
+        rollups.record(offerings)
+        return offerings[0]
+
+    def assert_rollups_match_offerings(self):
+        raw = {
+            tuple(row[name] for name in rollups.KEY_FIELDS): (row['total'], row['count'])
+            for row in Offering.objects.values(*rollups.KEY_FIELDS)
+            .annotate(total=Sum('amount'), count=Count('id')).order_by()
+        }
+        rolled = {
+            tuple(row[name] for name in rollups.KEY_FIELDS): (row['amount'], row['count'])
+            for row in DailyOfferingRollup.objects.values(*rollups.KEY_FIELDS, 'amount', 'count')
+        }
+        self.assertEqual(rolled, raw)
+
+    def test_recorded_offerings_match_raw_totals(self):
+        self.offer('5000.00', self.street)
+        self.offer(2500.5, self.street)
+        self.offer('1000.00', self.other, offering_type='AHADI')
+        self.offer('700.00', date=SUNDAY + datetime.timedelta(days=7))
+        self.assert_rollups_match_offerings()
+        self.assertEqual(DailyOfferingRollup.objects.get(street=self.street).amount, Decimal('7500.50'))
+
+    def test_offerings_without_a_street_share_one_row(self):
+        self.offer('300.00')
+        self.offer('200.00')
+        row = DailyOfferingRollup.objects.get(street__isnull=True)
+        self.assertEqual((row.amount, row.count), (Decimal('500.00'), 2))
+        self.assert_rollups_match_offerings()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyOfferingRollup.objects.create(date=SUNDAY, mass_type='MAJOR', offering_type='TITHE')
+
+    def test_deleting_a_street_folds_its_rollups(self):
+        self.offer('300.00')
+        self.offer('5000.00', self.street)
+        self.offer('1000.00', self.other)
+        self.street.delete()
+        self.assertEqual(DailyOfferingRollup.objects.get(street__isnull=True).amount, Decimal('5300.00'))
+        self.assert_rollups_match_offerings()
+
+    def test_rebuild_matches_raw_totals(self):
+        self.offer('5000.00', self.street)
+        self.offer('300.00')
+        Offering.objects.create(amount='900.00', offering_type='TITHE', mass_type='SELI', street=self.other, date=SUNDAY)
+        DailyOfferingRollup.objects.filter(street=self.street).update(amount=0)
+        self.assertEqual(rollups.rebuild(), 3)
+        self.assert_rollups_match_offerings()